@@ -0,0 +1,399 @@
+"""
+Last Updated: 19-10-2026
+
+This script benchmarks the analysis hot paths on synthetic ensembles (see
+`synthetic_ensembles.py`):
+
+    wasserstein_trace                 two cut edge series
+    wasserstein_trace_ground_truth    a cut edge series against a truth frame
+    wasserstein_trace_shares_11/18    two share matrices for 11 or 18 districts
+    get_weighted_stats_11/18          quartiles of every district of a share matrix
+    weighted_quantile_11/18           1% and 99% whiskers of every district
+    tree_count_7x7                    `tree_counter.process_line` over 7x7 plans
+
+Each benchmark is run at each of the given sizes (the number of plans). The wall
+time is the fastest of `--repeat` runs, and the peak memory is measured in a
+separate run with `tracemalloc` (which numpy reports its buffers to) so that the
+tracing does not slow the timed runs down.
+
+Each run is appended to a JSON history file along with the git commit and the
+machine it was run on. The results are compared against a baseline run in the
+history (the one saved with `--save-baseline`, or else the previous run), and
+any benchmark that is slower or uses more memory than the baseline by more than
+`--threshold` is flagged as a regression.
+
+Usage:
+
+    python benchmarks/run_benchmarks.py --sizes 10000,100000,1000000
+    python benchmarks/run_benchmarks.py -b wasserstein_trace --sizes 1e7,1e8
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import click
+import numpy as np
+
+script_dir = Path(__file__).resolve().parent
+top_dir = script_dir.parent
+sys.path.insert(0, str(top_dir.joinpath("figure_and_table_generation/figure_scripts")))
+sys.path.insert(0, str(top_dir.joinpath("data_processing/other_processing_scripts")))
+# The progress bars of the helpers would otherwise be timed along with them.
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+import networkx as nx
+from helper_files.box_share_helpers import get_weighted_stats, weighted_quantile
+from helper_files.wasserstein_trace_tally import (
+    wasserstein_trace,
+    wasserstein_trace_ground_truth,
+    wasserstein_trace_shares,
+)
+from tree_counter import compute_n_spanning_trees, process_line
+from synthetic_ensembles import (
+    cut_edge_series,
+    grid_plans,
+    share_matrix,
+    true_distribution,
+)
+
+HISTORY_FILE = script_dir.joinpath("benchmark_history.json")
+# The number of points in each Wasserstein trace, as in the figure scripts.
+N_ITEMS = 500
+
+
+def _setup_trace(n, rng):
+    return cut_edge_series(n, rng), cut_edge_series(n, rng)
+
+
+def _run_trace(args):
+    df1, df2 = args
+    wasserstein_trace(
+        counts1=df1["cut_edges"],
+        counts2=df2["cut_edges"],
+        weights1=df1["n_reps"],
+        weights2=df2["n_reps"],
+        resolution=len(df1) / N_ITEMS,
+    )
+
+
+def _setup_ground_truth(n, rng):
+    return cut_edge_series(n, rng), true_distribution()
+
+
+def _run_ground_truth(args):
+    df, df_truth = args
+    wasserstein_trace_ground_truth(
+        counts=df["cut_edges"],
+        ref_counts=df_truth["cuts"],
+        weights=df["n_reps"],
+        ref_weights=df_truth["tree_count"],
+        resolution=len(df) / N_ITEMS,
+    )
+
+
+def _setup_shares(n_districts):
+    def setup(n, rng):
+        return share_matrix(n, n_districts, rng), share_matrix(n, n_districts, rng)
+
+    return setup
+
+
+def _run_shares(args):
+    (shares1, weights1), (shares2, weights2) = args
+    wasserstein_trace_shares(
+        shares1_df=shares1,
+        shares2_df=shares2,
+        weights1=weights1,
+        weights2=weights2,
+        resolution=len(shares1) / N_ITEMS,
+    )
+
+
+def _setup_sorted_shares(n_districts):
+    def setup(n, rng):
+        shares, weights = share_matrix(n, n_districts, rng)
+        return np.sort(shares.to_numpy(), axis=1), weights.to_numpy()
+
+    return setup
+
+
+def _run_weighted_stats(args):
+    arr, weights = args
+    for i in range(arr.shape[1]):
+        get_weighted_stats(arr[:, i], weights)
+
+
+def _run_weighted_quantile(args):
+    arr, weights = args
+    for i in range(arr.shape[1]):
+        weighted_quantile(arr[:, i], 0.01, weights)
+        weighted_quantile(arr[:, i], 0.99, weights)
+
+
+def _setup_tree_count(n, rng):
+    graph = nx.convert_node_labels_to_integers(nx.grid_2d_graph(7, 7))
+    return graph, grid_plans(n, (7, 7), 7, rng)
+
+
+def _run_tree_count(args):
+    graph, plans = args
+    # The subgraph tree counts are cached on the function, so the cache is cleared
+    # for every run to time the counting and not just the lookups.
+    compute_n_spanning_trees.cache = {}
+    for line in plans:
+        process_line(graph, 7, line)
+
+
+# The name of each benchmark and its (setup, run) functions. The setup makes the
+# synthetic inputs for a size and is not timed.
+BENCHMARKS = {
+    "wasserstein_trace": (_setup_trace, _run_trace),
+    "wasserstein_trace_ground_truth": (_setup_ground_truth, _run_ground_truth),
+    "wasserstein_trace_shares_11": (_setup_shares(11), _run_shares),
+    "wasserstein_trace_shares_18": (_setup_shares(18), _run_shares),
+    "get_weighted_stats_11": (_setup_sorted_shares(11), _run_weighted_stats),
+    "get_weighted_stats_18": (_setup_sorted_shares(18), _run_weighted_stats),
+    "weighted_quantile_11": (_setup_sorted_shares(11), _run_weighted_quantile),
+    "weighted_quantile_18": (_setup_sorted_shares(18), _run_weighted_quantile),
+    "tree_count_7x7": (_setup_tree_count, _run_tree_count),
+}
+
+
+def run_benchmark(name, size, repeat=3, seed=0):
+    """
+    Times and memory-profiles a benchmark at one size.
+
+    Parameters
+    ----------
+    name : str
+        The benchmark (a key of `BENCHMARKS`).
+    size : int
+        The number of plans in the synthetic ensemble.
+    repeat : int
+        The number of timed runs.
+    seed : int
+        The seed of the synthetic ensemble.
+
+    Returns
+    -------
+    dict
+        The `benchmark`, `size`, the fastest wall time `seconds`, all of the run
+        `times`, and the `peak_mb` of memory allocated during a run.
+    """
+    setup, run = BENCHMARKS[name]
+    args = setup(size, np.random.default_rng(seed))
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(args)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run(args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "benchmark": name,
+        "size": size,
+        "seconds": min(times),
+        "times": times,
+        "peak_mb": peak / 2**20,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=top_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(history_file=HISTORY_FILE):
+    """
+    Loads the benchmark history, a list of runs each with its `results`.
+    """
+    history_file = Path(history_file)
+    if not history_file.exists():
+        return []
+    with open(history_file, "r") as f:
+        return json.load(f)
+
+
+def find_baseline(history):
+    """
+    Returns the run marked as the baseline, or else the latest run, or None.
+    """
+    for entry in reversed(history):
+        if entry.get("baseline"):
+            return entry
+    return history[-1] if history else None
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compares results against a baseline run.
+
+    Parameters
+    ----------
+    results : list[dict]
+        The results of `run_benchmark`.
+    baseline : dict or None
+        A run from the history.
+    threshold : float
+        The relative increase in time or memory that counts as a regression.
+
+    Returns
+    -------
+    list[dict]
+        The results with the baseline `base_seconds` and `base_peak_mb`, the
+        `time_ratio` and `memory_ratio`, and whether each is a `regression`.
+    """
+    base = {}
+    if baseline is not None:
+        base = {(r["benchmark"], r["size"]): r for r in baseline["results"]}
+
+    compared = []
+    for result in results:
+        result = dict(result)
+        old = base.get((result["benchmark"], result["size"]))
+        result["regression"] = False
+        if old is not None:
+            result["base_seconds"] = old["seconds"]
+            result["base_peak_mb"] = old["peak_mb"]
+            result["time_ratio"] = result["seconds"] / old["seconds"]
+            result["memory_ratio"] = result["peak_mb"] / max(old["peak_mb"], 1e-9)
+            result["regression"] = (
+                result["time_ratio"] > 1 + threshold
+                or result["memory_ratio"] > 1 + threshold
+            )
+        compared.append(result)
+    return compared
+
+
+def _parse_sizes(ctx, param, value):
+    try:
+        return [int(float(size)) for size in value.split(",")]
+    except ValueError:
+        raise click.BadParameter(f"Expected comma separated sizes, got {value!r}")
+
+
+@click.command()
+@click.option(
+    "-b",
+    "--benchmark",
+    "names",
+    multiple=True,
+    type=click.Choice(list(BENCHMARKS)),
+    help="The benchmarks to run. Defaults to all of them.",
+)
+@click.option(
+    "--sizes",
+    default="10000,100000,1000000",
+    show_default=True,
+    callback=_parse_sizes,
+    help="Comma separated numbers of plans, e.g. 1e4,1e5,1e6,1e7,1e8.",
+)
+@click.option("--repeat", type=int, default=3, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option(
+    "--history-file",
+    type=click.Path(dir_okay=False),
+    default=str(HISTORY_FILE),
+    show_default=True,
+)
+@click.option("--threshold", type=float, default=0.1, show_default=True)
+@click.option(
+    "--save-baseline",
+    is_flag=True,
+    help="Mark this run as the baseline for later comparisons.",
+)
+@click.option(
+    "--no-save",
+    is_flag=True,
+    help="Do not add this run to the history.",
+)
+@click.option(
+    "--fail-on-regression",
+    is_flag=True,
+    help="Exit with status 1 if any benchmark regressed.",
+)
+def main(
+    names,
+    sizes,
+    repeat,
+    seed,
+    history_file,
+    threshold,
+    save_baseline,
+    no_save,
+    fail_on_regression,
+):
+    history = load_history(history_file)
+    baseline = find_baseline(history)
+
+    results = []
+    for name in names or list(BENCHMARKS):
+        for size in sizes:
+            result = run_benchmark(name, size, repeat=repeat, seed=seed)
+            results.append(result)
+            print(
+                f"{name:<32} {size:>11,} {result['seconds']:>10.3f}s "
+                f"{result['peak_mb']:>10.1f}MB",
+                flush=True,
+            )
+
+    compared = compare(results, baseline, threshold)
+    regressions = [r for r in compared if r["regression"]]
+    if baseline is not None:
+        print(f"\nCompared to {baseline['timestamp']} ({baseline.get('commit')}):")
+        for r in compared:
+            if "time_ratio" not in r:
+                continue
+            flag = "  REGRESSION" if r["regression"] else ""
+            print(
+                f"{r['benchmark']:<32} {r['size']:>11,} "
+                f"time x{r['time_ratio']:.2f} memory x{r['memory_ratio']:.2f}{flag}"
+            )
+
+    if not no_save:
+        history.append(
+            {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "machine": platform.node(),
+                "processor": platform.processor() or platform.machine(),
+                "baseline": save_baseline,
+                "seed": seed,
+                "repeat": repeat,
+                "results": results,
+            }
+        )
+        tmp_file = Path(history_file).with_name(Path(history_file).name + ".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(history, f, indent=1)
+        tmp_file.replace(history_file)
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {threshold:.0%}")
+        if fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
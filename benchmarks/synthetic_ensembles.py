@@ -0,0 +1,178 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains generators for synthetic ensembles that look like the processed
+chains closely enough to benchmark the analysis helpers on, without needing any of
+the HPC data:
+
+    cut_edge_series   : a `_cut_edges.parquet`-like frame with `step`,
+                        `accepted_count`, `cut_edges` and `n_reps`
+    true_distribution : a truth frame like `true_counts_7x7_7.csv`
+    share_matrix      : Democratic vote shares for 11 (VA) or 18 (PA) districts
+                        with their `n_reps` weights
+    grid_plans        : contiguous partitions of a grid in the JSONL format read
+                        by `tree_counter.py`
+
+Everything is vectorized with numpy, so even the 1e8 row cut edge series are made
+in a few seconds (memory permitting). All generators take a numpy Generator, so the
+same seed always gives the same ensemble.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _n_reps(n, rng, accept_rate=0.05):
+    # In a chain that accepts a fraction p of its proposals, each plan is repeated a
+    # geometric number of times.
+    return rng.geometric(accept_rate, size=n).astype(np.int64)
+
+
+def cut_edge_series(n, rng, low=28, high=42, accept_rate=0.05):
+    """
+    Generates a cut edge series of a chain of `n` accepted plans. The number of cut
+    edges is a lazy random walk reflected into [low, high], so consecutive plans are
+    correlated as in an MCMC chain.
+
+    Parameters
+    ----------
+    n : int
+        The number of accepted plans.
+    rng : numpy.random.Generator
+        The random number generator.
+    low, high : int
+        The range of the number of cut edges.
+    accept_rate : float
+        The acceptance rate of the chain, which sets the distribution of `n_reps`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The `step`, `accepted_count`, `cut_edges` and `n_reps` of each plan.
+    """
+    moves = rng.integers(-1, 2, size=n, dtype=np.int64)
+    walk = np.cumsum(moves) + (low + high) // 2
+    width = high - low
+    # Reflecting the unbounded walk into the range keeps it a walk.
+    folded = np.abs((walk - low) % (2 * width) - width)
+    cut_edges = (high - folded).astype(np.int64)
+
+    n_reps = _n_reps(n, rng, accept_rate)
+    step = np.concatenate([[0], np.cumsum(n_reps[:-1])])
+    return pd.DataFrame(
+        {
+            "step": step,
+            "accepted_count": np.arange(1, n + 1, dtype=np.int64),
+            "cut_edges": cut_edges,
+            "n_reps": n_reps,
+        }
+    )
+
+
+def true_distribution(low=28, high=42):
+    """
+    Generates a truth frame in the format of `true_counts_7x7_7.csv`, with a bell
+    shaped distribution over [low, high].
+
+    Returns
+    -------
+    pandas.DataFrame
+        The `cuts`, `tree_count`, `n_plans` and `probability` of each number of cut
+        edges.
+    """
+    cuts = np.arange(low, high + 1)
+    center = (low + high) / 2
+    tree_count = np.exp(-0.5 * ((cuts - center) / (0.2 * (high - low))) ** 2) * 1e11
+    return pd.DataFrame(
+        {
+            "cuts": cuts,
+            "tree_count": tree_count,
+            "n_plans": np.ones(len(cuts), dtype=np.int64),
+            "probability": 100 * tree_count / tree_count.sum(),
+        }
+    )
+
+
+def share_matrix(n, n_districts, rng, accept_rate=0.05):
+    """
+    Generates the Democratic vote shares of `n` plans with `n_districts` districts.
+    Each district's share is a random walk around its own mean, as the shares of a
+    district drift when the plan is changed a little at a time.
+
+    Parameters
+    ----------
+    n : int
+        The number of plans.
+    n_districts : int
+        The number of districts (11 for VA, 18 for PA).
+    rng : numpy.random.Generator
+        The random number generator.
+    accept_rate : float
+        The acceptance rate of the chain, which sets the distribution of `n_reps`.
+
+    Returns
+    -------
+    (pandas.DataFrame, pandas.Series):
+        The shares with the columns `district_01`, ..., and the `n_reps` of each
+        plan.
+    """
+    means = np.linspace(0.25, 0.75, n_districts)
+    noise = rng.normal(0, 0.002, size=(n, n_districts)).astype(np.float32)
+    walk = np.cumsum(noise, axis=0)
+    walk -= np.linspace(0, 1, n, dtype=np.float32)[:, None] * walk[-1]
+    shares = np.clip(means + walk, 0.01, 0.99)
+    # Shares are ratios of vote counts, so they take a limited number of values.
+    shares = np.round(shares, 4)
+    df = pd.DataFrame(
+        shares, columns=[f"district_{i:02d}" for i in range(1, n_districts + 1)]
+    )
+    return df, pd.Series(_n_reps(n, rng, accept_rate), name="n_reps")
+
+
+def grid_plans(n, grid_size, n_parts, rng):
+    """
+    Generates `n` partitions of a grid into `n_parts` contiguous districts. Each
+    plan cuts the grid, in a boustrophedon order along a random axis, into runs of
+    random lengths, so every district is connected.
+
+    Parameters
+    ----------
+    n : int
+        The number of plans.
+    grid_size : (int, int)
+        The dimensions of the grid.
+    n_parts : int
+        The number of districts.
+    rng : numpy.random.Generator
+        The random number generator.
+
+    Returns
+    -------
+    list[dict]
+        The plans as `{"assignment": [...]}` lines with 1-indexed districts, with the
+        nodes numbered as in `networkx.convert_node_labels_to_integers` of
+        `networkx.grid_2d_graph(*grid_size)`.
+    """
+    rows, cols = grid_size
+    n_nodes = rows * cols
+    index = np.arange(n_nodes).reshape(rows, cols)
+    snake_rows = index.copy()
+    snake_rows[1::2] = snake_rows[1::2, ::-1]
+    snake_cols = index.T.copy()
+    snake_cols[1::2] = snake_cols[1::2, ::-1]
+    orders = [snake_rows.ravel(), snake_cols.ravel()]
+
+    ideal = n_nodes / n_parts
+    plans = []
+    for _ in range(n):
+        order = orders[rng.integers(2)]
+        if rng.integers(2):
+            order = order[::-1]
+        jitter = rng.uniform(-0.25, 0.25, size=n_parts - 1) * ideal
+        cuts = np.round(np.arange(1, n_parts) * ideal + jitter).astype(int)
+        cuts = np.clip(np.sort(cuts), 1, n_nodes - 1)
+        labels = np.searchsorted(cuts, np.arange(n_nodes), side="right") + 1
+        assignment = np.empty(n_nodes, dtype=np.int64)
+        assignment[order] = labels
+        plans.append({"assignment": assignment.tolist()})
+    return plans
@@ -0,0 +1,351 @@
+"""
+Last Updated: 19-10-2026
+
+This is a single command line entry point for the analyses that are otherwise run
+as separate scripts with hardcoded paths:
+
+    python cli_files/rrc.py trace        Wasserstein trace of a cut edges file
+    python cli_files/rrc.py box-stats    weighted box statistics of vote shares
+    python cli_files/rrc.py histograms   cut edge histograms
+    python cli_files/rrc.py heatmaps     node value (flip frequency) heatmaps
+    python cli_files/rrc.py tree-count   spanning tree counts of an enumeration
+    python cli_files/rrc.py smc-sweep    Wasserstein distances of an SMC sweep
+    python cli_files/rrc.py pa-report    the PA averages report
+
+Only click and the standard library are imported when the CLI starts. The heavy
+dependencies (pandas, scipy, matplotlib, geopandas, ...) are imported inside each
+subcommand, so that a run only pays for what it uses. The time taken to start the
+CLI, to import the modules of the subcommand and to run it is reported on stderr.
+"""
+
+import time
+
+_START = time.perf_counter()
+
+import importlib
+import sys
+from pathlib import Path
+
+import click
+
+top_dir = Path(__file__).resolve().parents[1]
+
+# The folder that each group of modules is imported from. The figure and table
+# scripts both keep their shared modules in a `helper_files` package, so only one
+# of the two folders is put on the path in a run.
+MODULE_DIRS = {
+    "figures": top_dir.joinpath("figure_and_table_generation/figure_scripts"),
+    "tables": top_dir.joinpath("figure_and_table_generation/table_scripts"),
+    "processing": top_dir.joinpath("data_processing/other_processing_scripts"),
+    "other": top_dir.joinpath("other_data_files/script_files"),
+}
+
+
+def _import(folder, *names):
+    """
+    Imports modules from one of the `MODULE_DIRS`, adding the time spent to the
+    import time reported at the end of the run.
+    """
+    start = time.perf_counter()
+    path = str(MODULE_DIRS[folder])
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    modules = [importlib.import_module(name) for name in names]
+    ctx = click.get_current_context()
+    ctx.meta["rrc_import_time"] = ctx.meta.get("rrc_import_time", 0.0) + (
+        time.perf_counter() - start
+    )
+    return modules[0] if len(modules) == 1 else modules
+
+
+def _split_keys(value):
+    keys = value.split(",")
+    if len(keys) != 2:
+        raise click.BadParameter(f"Expected DEM,REP but got {value!r}")
+    return tuple(keys)
+
+
+@click.group()
+@click.pass_context
+def rrc(ctx):
+    ctx.meta["rrc_run_start"] = time.perf_counter()
+    click.echo(f"rrc: started in {ctx.meta['rrc_run_start'] - _START:.3f}s", err=True)
+
+
+@rrc.result_callback()
+@click.pass_context
+def _report(ctx, *args, **kwargs):
+    end = time.perf_counter()
+    import_time = ctx.meta.get("rrc_import_time", 0.0)
+    run_time = end - ctx.meta["rrc_run_start"] - import_time
+    click.echo(
+        f"rrc: imports {import_time:.3f}s, run {run_time:.3f}s, "
+        f"total {end - _START:.3f}s",
+        err=True,
+    )
+
+
+@rrc.command()
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--truth",
+    type=click.Path(exists=True, dir_okay=False),
+    help="A true counts CSV (from tree-count) to compare against.",
+)
+@click.option(
+    "--reference",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Another cut edges file to compare against as it runs.",
+)
+@click.option("--n-accepted", type=int, required=True)
+@click.option("--n-items", type=int, default=500, show_default=True)
+@click.option("-o", "--out-file", type=click.Path(dir_okay=False), required=True)
+def trace(file, truth, reference, n_accepted, n_items, out_file):
+    """
+    Computes the Wasserstein trace of the cut edges of the first N_ACCEPTED plans
+    of FILE, either against a true distribution or against a second ensemble, and
+    writes it as a CSV of `accepted,distance`.
+    """
+    if (truth is None) == (reference is None):
+        raise click.UsageError("Give exactly one of --truth and --reference.")
+
+    pd = _import("figures", "pandas")
+    ensemble_index, trace_tally = _import(
+        "figures", "helper_files.ensemble_index", "helper_files.wasserstein_trace_tally"
+    )
+
+    columns = ["cut_edges", "n_reps"]
+    df = ensemble_index.read_accepted_prefix(file, n_accepted, columns=columns)
+    df = df.iloc[:n_accepted, :]
+    if truth is not None:
+        df_truth = pd.read_csv(truth)
+        ticks, distances = trace_tally.wasserstein_trace_ground_truth(
+            counts=df["cut_edges"],
+            ref_counts=df_truth["cuts"],
+            weights=df["n_reps"],
+            ref_weights=df_truth["tree_count"],
+            resolution=n_accepted / n_items,
+        )
+    else:
+        ref_df = ensemble_index.read_accepted_prefix(
+            reference, n_accepted, columns=columns
+        ).iloc[:n_accepted, :]
+        ticks, distances = trace_tally.wasserstein_trace(
+            counts1=df["cut_edges"],
+            counts2=ref_df["cut_edges"],
+            weights1=df["n_reps"],
+            weights2=ref_df["n_reps"],
+            resolution=n_accepted / n_items,
+        )
+    pd.DataFrame({"accepted": ticks, "distance": distances}).to_csv(
+        out_file, index=False
+    )
+
+
+@rrc.command("box-stats")
+@click.argument("files", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "-e",
+    "--election",
+    "keys",
+    default="G16DPRS,G16RPRS",
+    show_default=True,
+    callback=lambda ctx, param, value: _split_keys(value),
+    help="The Democratic and Republican tally keys.",
+)
+@click.option(
+    "--whiskers", type=float, nargs=2, default=(0.01, 0.99), show_default=True
+)
+@click.option("-o", "--out-file", type=click.Path(dir_okay=False), required=True)
+def box_stats(files, keys, whiskers, out_file):
+    """
+    Computes the weighted quartiles and whiskers of the sorted Democratic vote
+    shares of each district, as drawn in the boxplot figures, for each of FILES.
+    """
+    np, pd = _import("figures", "numpy", "pandas")
+    box_share_helpers = _import("figures", "helper_files.box_share_helpers")
+    partisan_metrics = _import("processing", "partisan_metrics")
+
+    rows = []
+    for file in files:
+        plans, tallies = partisan_metrics.read_election_tallies(file, [keys])
+        dem, rep = tallies[keys[0]], tallies[keys[1]]
+        shares = np.sort(dem / (dem + rep), axis=1)
+        weights = plans["n_reps"].to_numpy()
+        for i in range(shares.shape[1]):
+            data = shares[:, i]
+            q1, med, q3 = box_share_helpers.get_weighted_stats(data, weights)
+            rows.append(
+                {
+                    "file": Path(file).name,
+                    "district": i + 1,
+                    "q1": q1,
+                    "med": med,
+                    "q3": q3,
+                    "whislo": box_share_helpers.weighted_quantile(
+                        data, whiskers[0], weights
+                    ),
+                    "whishi": box_share_helpers.weighted_quantile(
+                        data, whiskers[1], weights
+                    ),
+                }
+            )
+    pd.DataFrame(rows).to_csv(out_file, index=False)
+
+
+@rrc.command()
+@click.argument("files", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--prefix",
+    type=int,
+    default=None,
+    help="Only count the plans with an accepted count below this.",
+)
+@click.option("-o", "--out-file", type=click.Path(dir_okay=False), required=True)
+def histograms(files, prefix, out_file):
+    """
+    Computes the cut edge distribution (in percent of steps) of each of FILES,
+    using the cached histograms next to the files.
+    """
+    pd = _import("figures", "pandas")
+    cut_edge_histograms = _import("figures", "helper_files.cut_edge_histograms")
+
+    frames = []
+    for file in files:
+        values, percent = cut_edge_histograms.cut_edge_percentages(file, prefix)
+        frames.append(
+            pd.DataFrame(
+                {"file": Path(file).name, "cut_edges": values, "percent": percent}
+            )
+        )
+    pd.concat(frames, ignore_index=True).to_csv(out_file, index=False)
+
+
+@rrc.command()
+@click.argument("files", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "-s",
+    "--shapefile",
+    type=click.Path(exists=True),
+    required=True,
+    help="The shapefile (or a directory holding it) with one row per node.",
+)
+@click.option("-o", "--out-dir", type=click.Path(file_okay=False), required=True)
+@click.option("--cmap", type=str, default="viridis", show_default=True)
+@click.option("--size", type=float, default=6.0, show_default=True)
+@click.option("--dpi", type=int, default=200, show_default=True)
+@click.option(
+    "--shared-scale/--own-scale",
+    default=True,
+    show_default=True,
+    help="Whether all heatmaps use the color range of all of the files.",
+)
+def heatmaps(files, shapefile, out_dir, cmap, size, dpi, shared_scale):
+    """
+    Draws a heatmap of each of the node values FILES (e.g. flip frequencies) on
+    the shapefile and saves it as `<name>.png` in OUT_DIR.
+    """
+    matplotlib = _import("figures", "matplotlib")
+    matplotlib.use("Agg")
+    plt = _import("figures", "matplotlib.pyplot")
+    choropleth, node_values = _import(
+        "figures", "helper_files.choropleth", "helper_files.node_values"
+    )
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = choropleth.load_geometry_paths(shapefile, figsize=(size, size), dpi=dpi)
+    vmin, vmax = node_values.global_value_range(files) if shared_scale else (None,) * 2
+
+    for file in files:
+        fig, ax = plt.subplots(figsize=(size, size), dpi=dpi)
+        choropleth.plot_choropleth(
+            ax,
+            paths,
+            node_values.read_node_values(file),
+            cmap=cmap,
+            vmin=vmin,
+            vmax=vmax,
+        )
+        ax.set_axis_off()
+        out_file = out_dir.joinpath(f"{Path(file).name.split('.')[0]}.png")
+        plt.savefig(out_file, bbox_inches="tight")
+        plt.close(fig)
+        click.echo(out_file)
+
+
+@rrc.command("tree-count")
+@click.argument("file_name", type=click.Path(exists=True, dir_okay=False))
+@click.argument("grid_size", type=int, nargs=2)
+@click.argument("n_parts", type=int)
+@click.option("-o", "--out-file", type=click.Path(dir_okay=False), required=True)
+@click.option("--n-processes", type=int, default=None)
+def tree_count(file_name, grid_size, n_parts, out_file, n_processes):
+    """
+    Counts the spanning trees of each plan in a JSONL enumeration of the
+    partitions of a GRID_SIZE grid into N_PARTS districts and writes the true
+    cut edge distribution as a CSV.
+    """
+    tree_counter = _import("processing", "tree_counter")
+    prob_df = tree_counter.count_trees(file_name, grid_size, n_parts, n_processes)
+    click.echo(prob_df.to_string(index=False))
+    prob_df.to_csv(out_file, index=False)
+
+
+@rrc.command("smc-sweep")
+@click.option(
+    "-s",
+    "--shapefile",
+    type=click.Path(exists=True),
+    required=True,
+    help="The shapefile of the grid the SMC runs were made on.",
+)
+@click.option(
+    "-p",
+    "--trace-prefix",
+    type=str,
+    required=True,
+    help="The prefix of the `.rds .wgt` and `.rds .plans` files of the runs.",
+)
+@click.option("-o", "--out-file", type=click.Path(dir_okay=False), required=True)
+def smc_sweep(shapefile, trace_prefix, out_file):
+    """
+    Computes the Wasserstein distance to the true 7x7 cut edge distribution of
+    every SMC run of a batch size sweep, as plotted in the SMC scatter plots.
+    """
+    smc_wasserstein = _import("other", "smc_wasserstein")
+    Path(out_file).parent.mkdir(parents=True, exist_ok=True)
+    smc_wasserstein.collect_wasserstein_data(
+        smc_shapefile=shapefile,
+        smc_trace_prefix=trace_prefix,
+        output_csv_file=out_file,
+    )
+
+
+@rrc.command("pa-report")
+@click.option(
+    "-d",
+    "--data-root",
+    type=click.Path(exists=True, file_okay=False),
+    default=str(top_dir.joinpath("hpc_files/hpc_processed_data")),
+    show_default=True,
+)
+@click.option("-o", "--out-file", type=click.Path(dir_okay=False), required=True)
+@click.option(
+    "--store-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="The PA summary store. Defaults to pa_summary_store.parquet next to the report.",
+)
+@click.option("--n-processes", type=int, default=None)
+def pa_report(data_root, out_file, store_file, n_processes):
+    """
+    Writes the report of the average number of Democratic districts in PA for
+    each of the catalogued PA ensembles.
+    """
+    pa_averages_report = _import("tables", "pa_averages_report")
+    pa_averages_report.write_pa_report(data_root, out_file, store_file, n_processes)
+
+
+if __name__ == "__main__":
+    rrc()
@@ -0,0 +1,270 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains functions for building and reading persistent assignment
+stores. A store is created once from a `.jsonl.ben` file (or the `.rds` plans file
+output by SMC) and is a directory containing
+
+    assignments.npy : a (unique plans x nodes) uint8/uint16 matrix in C order
+    plans.parquet   : the `step`, `n_reps` and `accepted_count` of each row
+    meta.json       : the shape, dtype and source of the store
+
+The assignment matrix is opened as a read-only memory map, so blocks of plans can
+be sliced or iterated over without loading the whole ensemble, and each plan is a
+contiguous row so that NumPy reductions over blocks stream through memory.
+"""
+
+import json
+from pathlib import Path
+
+import click
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from ben_reader import _open_ben, _walk_frames, iter_ben_batches
+
+ASSIGNMENTS_FILE = "assignments.npy"
+PLANS_FILE = "plans.parquet"
+META_FILE = "meta.json"
+
+
+def default_store_path(source_file):
+    """
+    Returns the default store directory for a BEN or RDS file, which sits next
+    to the source file with the suffix "_store".
+
+    Parameters
+    ----------
+    source_file : str or Path
+        The path to the `.jsonl.ben` or `.rds` file.
+
+    Returns
+    -------
+    Path
+        The store directory.
+    """
+    source_file = Path(source_file)
+    name = source_file.name
+    if name.endswith(".jsonl.ben"):
+        name = name[: -len(".jsonl.ben")]
+    elif ".rds" in name:
+        name = name[: name.index(".rds")].rstrip()
+    return source_file.with_name(f"{name}_store")
+
+
+def _write_store(store_dir, assignments, n_reps, source_file, weights=None):
+    """
+    Writes the plan metadata and meta.json of a store whose assignment matrix
+    has already been written.
+    """
+    n_reps = np.asarray(n_reps, dtype=np.int64)
+    step = np.concatenate([[1], np.cumsum(n_reps)[:-1] + 1]).astype(np.int64)
+    plans = pd.DataFrame(
+        {
+            "step": step,
+            "n_reps": n_reps.astype(np.int32),
+            "accepted_count": np.arange(1, len(n_reps) + 1, dtype=np.int32),
+        }
+    )
+    if weights is not None:
+        plans["weight"] = np.asarray(weights, dtype=np.float64)
+    plans.to_parquet(store_dir.joinpath(PLANS_FILE), compression="zstd")
+
+    meta = {
+        "n_plans": int(assignments.shape[0]),
+        "n_nodes": int(assignments.shape[1]),
+        "dtype": assignments.dtype.name,
+        "source": str(Path(source_file).resolve()),
+    }
+    with open(store_dir.joinpath(META_FILE), "w") as f:
+        json.dump(meta, f, indent=4)
+
+
+def build_store_from_ben(ben_file, store_dir=None, batch_size=10_000):
+    """
+    Builds an assignment store from a BEN file.
+
+    Parameters
+    ----------
+    ben_file : str or Path
+        The path to the `.jsonl.ben` file.
+    store_dir : str or Path, optional
+        The directory to write the store to. Defaults to `default_store_path`.
+    batch_size : int
+        The number of plans to decode at once.
+
+    Returns
+    -------
+    Path
+        The store directory.
+    """
+    store_dir = (
+        Path(store_dir) if store_dir is not None else default_store_path(ben_file)
+    )
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    # Walk the frame headers once to size the matrix and pick the narrowest dtype.
+    data, is_mkv = _open_ben(ben_file)
+    n_plans = 0
+    max_val_bits = 0
+    n_reps = []
+    for _, _, val_bits, _, reps in _walk_frames(data, is_mkv):
+        n_plans += 1
+        max_val_bits = max(max_val_bits, val_bits)
+        n_reps.append(reps)
+    dtype = np.uint8 if max_val_bits <= 8 else np.uint16
+
+    assignments = None
+    row = 0
+    for batch, _ in tqdm(
+        iter_ben_batches(ben_file, batch_size=batch_size, dtype=dtype),
+        total=-(-n_plans // batch_size),
+    ):
+        if assignments is None:
+            assignments = np.lib.format.open_memmap(
+                store_dir.joinpath(ASSIGNMENTS_FILE),
+                mode="w+",
+                dtype=dtype,
+                shape=(n_plans, batch.shape[1]),
+            )
+        assignments[row : row + len(batch)] = batch
+        row += len(batch)
+
+    if assignments is None:
+        raise ValueError(f"No plans found in {ben_file}")
+    assignments.flush()
+
+    _write_store(store_dir, assignments, n_reps, ben_file)
+    return store_dir
+
+
+def build_store_from_rds(rds_file, store_dir=None, weights_file=None):
+    """
+    Builds an assignment store from the `.rds` plans file output by SMC. Every
+    SMC plan has `n_reps` equal to 1; if a weights file is given, the importance
+    weights are stored in the `weight` column of plans.parquet.
+
+    Parameters
+    ----------
+    rds_file : str or Path
+        The path to the SMC plans `.rds` file.
+    store_dir : str or Path, optional
+        The directory to write the store to. Defaults to `default_store_path`.
+    weights_file : str or Path, optional
+        The path to the matching SMC weights file.
+
+    Returns
+    -------
+    Path
+        The store directory.
+    """
+    import pyreadr
+
+    store_dir = (
+        Path(store_dir) if store_dir is not None else default_store_path(rds_file)
+    )
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    plans = pyreadr.read_r(str(rds_file))[None].values.T
+    dtype = np.uint8 if plans.max() < 256 else np.uint16
+    assignments = np.lib.format.open_memmap(
+        store_dir.joinpath(ASSIGNMENTS_FILE),
+        mode="w+",
+        dtype=dtype,
+        shape=plans.shape,
+    )
+    assignments[:] = plans.astype(dtype)
+    assignments.flush()
+
+    weights = None
+    if weights_file is not None:
+        weights = pyreadr.read_r(str(weights_file))[None].values.ravel()
+
+    _write_store(
+        store_dir, assignments, np.ones(len(plans), dtype=np.int64), rds_file, weights
+    )
+    return store_dir
+
+
+def open_store(store_dir, columns=None):
+    """
+    Opens an assignment store.
+
+    Parameters
+    ----------
+    store_dir : str or Path
+        The store directory.
+    columns : list[str], optional
+        The columns of plans.parquet to load. If None, all columns are loaded.
+
+    Returns
+    -------
+    (numpy.memmap, pandas.DataFrame):
+        The read-only (plans x nodes) assignment matrix and the per-plan data.
+    """
+    store_dir = Path(store_dir)
+    assignments = np.load(store_dir.joinpath(ASSIGNMENTS_FILE), mmap_mode="r")
+    plans = pd.read_parquet(store_dir.joinpath(PLANS_FILE), columns=columns)
+    return assignments, plans
+
+
+def iter_store_blocks(store_dir, block_size=100_000, start=0, stop=None, columns=None):
+    """
+    Iterates over blocks of consecutive plans in an assignment store. The
+    assignment blocks are views into the memory map, so no data is read until it
+    is used.
+
+    Parameters
+    ----------
+    store_dir : str or Path
+        The store directory.
+    block_size : int
+        The number of plans in each block.
+    start : int
+        The (0-indexed) row to start from.
+    stop : int, optional
+        The row to stop before. If None, iterate to the end of the store.
+    columns : list[str], optional
+        The columns of plans.parquet to include with each block.
+
+    Yields
+    ------
+    (numpy.ndarray, pandas.DataFrame):
+        The (block x nodes) assignments and the matching rows of plans.parquet.
+    """
+    assignments, plans = open_store(store_dir, columns=columns)
+    stop = len(assignments) if stop is None else min(stop, len(assignments))
+    for block_start in range(start, stop, block_size):
+        block_stop = min(block_start + block_size, stop)
+        yield (
+            assignments[block_start:block_stop],
+            plans.iloc[block_start:block_stop],
+        )
+
+
+@click.command()
+@click.argument("source_file", type=click.Path(exists=True))
+@click.option(
+    "--store-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory to write the store to. Defaults to <source>_store.",
+)
+@click.option(
+    "--weights-file",
+    type=click.Path(exists=True),
+    default=None,
+    help="SMC weights file to store alongside an .rds plans file.",
+)
+@click.option("--batch-size", type=int, default=10_000, show_default=True)
+def main(source_file, store_dir, weights_file, batch_size):
+    if ".rds" in Path(source_file).name:
+        out = build_store_from_rds(source_file, store_dir, weights_file)
+    else:
+        out = build_store_from_ben(source_file, store_dir, batch_size)
+    print(f"Wrote assignment store to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains a streaming reader for BEN (`.jsonl.ben`) ensemble files so that
+per-plan statistics can be computed in NumPy directly from the raw chains rather
+than through another `ben-tally` pass.
+
+A BEN file starts with a 17 byte banner ("STANDARD BEN FILE" or "MKVCHAIN BEN
+FILE") followed by one frame per unique plan:
+
+    max_val_bits : u8
+    max_len_bits : u8
+    n_bytes      : u32 (big endian)
+    data         : n_bytes of bit-packed (value, run length) pairs, MSB first
+    n_reps       : u16 (big endian, MKVCHAIN files only)
+
+The file is memory mapped, so the frame payloads are read in place and only the
+decoded assignment batch is allocated. All of the frames in a batch are decoded
+together with vectorized bit gathers.
+"""
+
+import mmap
+import struct
+from pathlib import Path
+
+import click
+import numpy as np
+
+STANDARD_BANNER = b"STANDARD BEN FILE"
+MKVCHAIN_BANNER = b"MKVCHAIN BEN FILE"
+XZ_MAGIC = b"\xfd\x37\x7a\x58\x5a\x00"
+
+_frame_header = struct.Struct(">BBI")
+_count = struct.Struct(">H")
+
+
+def _open_ben(file):
+    """
+    Memory maps a BEN file and checks its banner.
+
+    Returns
+    -------
+    (numpy.ndarray, bool):
+        A read-only uint8 view of the file and whether the file is a MKVCHAIN
+        file (i.e. whether each frame carries a repetition count).
+    """
+    with open(file, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be memory mapped.
+            mm = b""
+    banner = bytes(mm[:17])
+    if banner == MKVCHAIN_BANNER:
+        is_mkv = True
+    elif banner == STANDARD_BANNER:
+        is_mkv = False
+    elif banner[:6] == XZ_MAGIC:
+        raise ValueError(
+            f"{file} is a compressed XBEN file. Decompress it with "
+            "`ben -m decode <file_name>.xben` before reading it."
+        )
+    else:
+        raise ValueError(f"{file} is not a BEN file (found banner {banner!r})")
+    return np.frombuffer(mm, dtype=np.uint8), is_mkv
+
+
+def iter_ben_frames(file):
+    """
+    Walks the frames of a BEN file without decoding them.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the BEN file.
+
+    Yields
+    ------
+    (int, int, int, int, int):
+        The byte offset of the frame payload, the number of payload bytes, the
+        number of bits per value, the number of bits per run length, and the number
+        of repetitions of the plan.
+    """
+    data, is_mkv = _open_ben(file)
+    yield from _walk_frames(data, is_mkv)
+
+
+def _walk_frames(data, is_mkv):
+    """
+    Walks the frames of an opened BEN file. See `iter_ben_frames`.
+    """
+    buffer = data.data
+    pos = 17
+    end = len(data)
+    while pos < end:
+        val_bits, len_bits, n_bytes = _frame_header.unpack_from(buffer, pos)
+        pos += _frame_header.size
+        payload = pos
+        pos += n_bytes
+        if is_mkv:
+            (n_reps,) = _count.unpack_from(buffer, pos)
+            pos += _count.size
+        else:
+            n_reps = 1
+        yield payload, n_bytes, val_bits, len_bits, n_reps
+
+
+def _gather_fields(data, bit_starts, widths):
+    """
+    Reads unsigned integers of varying widths (at most 16 bits) out of a big
+    endian bit stream, where each integer starts at the matching entry of
+    `bit_starts`. Every field fits in the 24 bit window starting at the byte that
+    holds its first bit, so only three byte gathers are needed.
+    """
+    byte = bit_starts >> 3
+    shift = bit_starts & 7
+    last = len(data) - 1
+    window = (
+        (data[byte].astype(np.int64) << 16)
+        | (data[np.minimum(byte + 1, last)].astype(np.int64) << 8)
+        | data[np.minimum(byte + 2, last)].astype(np.int64)
+    )
+    return (window >> (24 - shift - widths)) & ((1 << widths) - 1)
+
+
+def decode_frames(data, frames, dtype=np.int16):
+    """
+    Decodes a list of BEN frames into a matrix of assignments.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The uint8 contents of the BEN file.
+    frames : list[tuple]
+        The frames to decode as yielded by `iter_ben_frames`.
+    dtype : numpy.dtype
+        The dtype of the output assignments.
+
+    Returns
+    -------
+    numpy.ndarray
+        A (plans x nodes) matrix of district assignments.
+    """
+    offsets, n_bytes, val_bits, len_bits, _ = (
+        np.asarray(x, dtype=np.int64) for x in zip(*frames)
+    )
+    widths = val_bits + len_bits
+    n_runs = (n_bytes * 8) // widths
+
+    # The runs are read in place from the memory mapped file.
+    frame_of_run = np.repeat(np.arange(len(frames)), n_runs)
+    run_in_frame = np.arange(n_runs.sum()) - np.repeat(
+        np.cumsum(n_runs) - n_runs, n_runs
+    )
+    run_starts = offsets[frame_of_run] * 8 + run_in_frame * widths[frame_of_run]
+
+    run_val_bits = val_bits[frame_of_run]
+    values = _gather_fields(data, run_starts, run_val_bits)
+    lengths = _gather_fields(data, run_starts + run_val_bits, len_bits[frame_of_run])
+
+    # Trailing padding may decode to (0, 0) runs, which np.repeat drops.
+    assignments = np.repeat(values.astype(dtype), lengths)
+    n_nodes, remainder = divmod(len(assignments), len(frames))
+    if remainder != 0:
+        raise ValueError("Plans in the BEN file do not all have the same length")
+    return assignments.reshape(len(frames), n_nodes)
+
+
+def iter_ben_batches(file, batch_size=10_000, dtype=np.int16, max_plans=None):
+    """
+    Streams the unique plans of a BEN file in batches.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the BEN file.
+    batch_size : int
+        The number of unique plans in each batch.
+    dtype : numpy.dtype
+        The dtype of the output assignments.
+    max_plans : int, optional
+        Stop after this many unique plans (i.e. accepted plans for MCMC chains).
+
+    Yields
+    ------
+    (numpy.ndarray, numpy.ndarray):
+        A (batch x nodes) matrix of assignments and the number of repetitions of
+        each plan in the batch.
+    """
+    data, is_mkv = _open_ben(file)
+    batch = []
+    n_seen = 0
+    for frame in _walk_frames(data, is_mkv):
+        batch.append(frame)
+        n_seen += 1
+        if len(batch) == batch_size:
+            yield decode_frames(data, batch, dtype), np.array(
+                [f[4] for f in batch], dtype=np.int64
+            )
+            batch = []
+        if max_plans is not None and n_seen >= max_plans:
+            break
+
+    if batch:
+        yield decode_frames(data, batch, dtype), np.array(
+            [f[4] for f in batch], dtype=np.int64
+        )
+
+
+def count_ben_plans(file):
+    """
+    Counts the plans in a BEN file without decoding them.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the BEN file.
+
+    Returns
+    -------
+    (int, int):
+        The number of unique plans and the total number of plans (i.e. the sum
+        of the repetition counts).
+    """
+    n_unique = 0
+    n_total = 0
+    for frame in iter_ben_frames(file):
+        n_unique += 1
+        n_total += frame[4]
+    return n_unique, n_total
+
+
+@click.command()
+@click.argument("ben_file", type=click.Path(exists=True))
+def main(ben_file):
+    n_unique, n_total = count_ben_plans(ben_file)
+    print(
+        f"Found {n_unique} unique plans and {n_total} total plans "
+        f"in {Path(ben_file).name}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Last Updated: 19-10-2026
+
+This script rewrites the long-format `_tallies.parquet` files produced by
+`ben-tally -m tally-keys` into a wide, sorted layout. The long format has one row
+per (plan, key) pair with the district columns in HashMap order, so every read
+has to decode the full file and filter on `sum_columns`. The wide format has one
+row per plan with the columns
+
+    step, n_reps, accepted_count, {key}_d01, {key}_d02, ..., {key}_d{NN}
+
+where the keys are sorted alphabetically and the districts numerically. Rows are
+written in `accepted_count` order in fixed-size zstd row groups, and a small
+index of the first `accepted_count` and `step` in each row group is stored in the
+parquet footer under the `rrc_accepted_index` key so that readers can fetch a
+prefix of the chain by touching only the row groups they need.
+"""
+
+import json
+import re
+from pathlib import Path
+
+import click
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+ACCEPTED_INDEX_KEY = b"rrc_accepted_index"
+DEFAULT_ROW_GROUP_SIZE = 65_536
+
+_district_pattern = re.compile(r"^district_(\d+)$")
+
+
+def wide_column_name(key, district):
+    """
+    Returns the name of the wide column holding the tally of `key` in `district`.
+
+    Parameters
+    ----------
+    key : str
+        The tallied node attribute (e.g. "G16DPRS").
+    district : int
+        The (1-indexed) district number.
+
+    Returns
+    -------
+    str
+        The wide column name, e.g. "G16DPRS_d01".
+    """
+    return f"{key}_d{district:02d}"
+
+
+def _district_columns(schema):
+    """
+    Finds the `district_{k}` columns in a long-format schema.
+
+    Returns
+    -------
+    (list[str], list[int]):
+        The district column names and the district numbers, both sorted by
+        district number.
+    """
+    found = []
+    for name in schema.names:
+        match = _district_pattern.match(name)
+        if match is not None:
+            found.append((int(match.group(1)), name))
+    found.sort()
+    return [name for _, name in found], [num for num, _ in found]
+
+
+def _read_keys(parquet_file):
+    """
+    Collects the sorted list of tallied keys from the `sum_columns` column.
+    """
+    keys = set()
+    for batch in parquet_file.iter_batches(columns=["sum_columns"]):
+        keys.update(batch.column(0).unique().to_pylist())
+    return sorted(keys)
+
+
+def _pivot_chunk(acc, step, n_reps, key_codes, values, n_keys):
+    """
+    Pivots a block of long-format rows (which must contain complete plans) into
+    one row per plan.
+
+    Parameters
+    ----------
+    acc : np.ndarray
+        The accepted count of each row.
+    step : np.ndarray
+        The step of each row.
+    n_reps : np.ndarray
+        The number of repetitions of each row.
+    key_codes : np.ndarray
+        The index of each row's key in the sorted key list.
+    values : np.ndarray
+        A (rows x districts) array of district tallies.
+    n_keys : int
+        The number of tallied keys.
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+        The accepted counts, steps, and repetition counts of each plan and a
+        (plans x keys x districts) array of tallies.
+    """
+    plan_acc, first_row, plan_idx = np.unique(
+        acc, return_index=True, return_inverse=True
+    )
+    wide = np.full((len(plan_acc), n_keys, values.shape[1]), np.nan, dtype=np.float32)
+    wide[plan_idx, key_codes, :] = values
+    return plan_acc, step[first_row], n_reps[first_row], wide
+
+
+def compact_tallies(
+    in_file, out_file, row_group_size=DEFAULT_ROW_GROUP_SIZE, compression_level=6
+):
+    """
+    Rewrites a long-format tallies parquet file into the wide, sorted layout
+    described at the top of this file.
+
+    Parameters
+    ----------
+    in_file : str or Path
+        The path to the long-format `_tallies.parquet` file.
+    out_file : str or Path
+        The path to write the wide-format parquet file to.
+    row_group_size : int
+        The number of plans to store in each row group.
+    compression_level : int
+        The zstd compression level.
+
+    Returns
+    -------
+    dict
+        The accepted-count index that was written to the parquet footer.
+    """
+    parquet_file = pq.ParquetFile(in_file)
+    district_cols, district_nums = _district_columns(parquet_file.schema_arrow)
+    keys = _read_keys(parquet_file)
+    key_lookup = {key: i for i, key in enumerate(keys)}
+
+    fields = [
+        pa.field("step", pa.int64()),
+        pa.field("n_reps", pa.int32()),
+        pa.field("accepted_count", pa.int32()),
+    ]
+    fields += [
+        pa.field(wide_column_name(key, num), pa.float32())
+        for key in keys
+        for num in district_nums
+    ]
+    schema = pa.schema(fields)
+
+    index = {"row_group_size": row_group_size, "accepted_count": [], "step": []}
+    pending = []
+    n_pending = 0
+
+    def flush(writer, final=False):
+        nonlocal pending, n_pending
+        if n_pending == 0:
+            return
+        acc = np.concatenate([p[0] for p in pending])
+        step = np.concatenate([p[1] for p in pending])
+        n_reps = np.concatenate([p[2] for p in pending])
+        wide = np.concatenate([p[3] for p in pending])
+
+        n_write = len(acc) if final else (len(acc) // row_group_size) * row_group_size
+        for start in range(0, n_write, row_group_size):
+            stop = min(start + row_group_size, n_write)
+            block = wide[start:stop].reshape(stop - start, -1)
+            columns = [
+                pa.array(step[start:stop], type=pa.int64()),
+                pa.array(n_reps[start:stop], type=pa.int32()),
+                pa.array(acc[start:stop], type=pa.int32()),
+            ]
+            columns += [pa.array(block[:, j]) for j in range(block.shape[1])]
+            writer.write_table(
+                pa.Table.from_arrays(columns, schema=schema),
+                row_group_size=row_group_size,
+            )
+            index["accepted_count"].append(int(acc[start]))
+            index["step"].append(int(step[start]))
+
+        pending = [(acc[n_write:], step[n_write:], n_reps[n_write:], wide[n_write:])]
+        n_pending = len(acc) - n_write
+
+    read_cols = ["step", "n_reps", "accepted_count", "sum_columns"] + district_cols
+    carry = None
+    with pq.ParquetWriter(
+        out_file,
+        schema,
+        compression="zstd",
+        compression_level=compression_level,
+    ) as writer:
+        for batch in tqdm(
+            parquet_file.iter_batches(columns=read_cols, batch_size=row_group_size),
+            total=-(-parquet_file.metadata.num_rows // row_group_size),
+        ):
+            acc = batch.column("accepted_count").to_numpy()
+            step = batch.column("step").to_numpy()
+            n_reps = batch.column("n_reps").to_numpy()
+            key_codes = np.fromiter(
+                (key_lookup[k] for k in batch.column("sum_columns").to_pylist()),
+                dtype=np.int64,
+                count=len(batch),
+            )
+            values = np.column_stack(
+                [batch.column(c).to_numpy(zero_copy_only=False) for c in district_cols]
+            )
+
+            if carry is not None:
+                acc, step, n_reps, key_codes, values = (
+                    np.concatenate([c, x])
+                    for c, x in zip(carry, (acc, step, n_reps, key_codes, values))
+                )
+
+            # The rows of the last plan in the batch may continue into the next one.
+            keep = acc == acc[-1]
+            carry = tuple(x[keep] for x in (acc, step, n_reps, key_codes, values))
+            done = ~keep
+            if done.any():
+                plans = _pivot_chunk(
+                    acc[done],
+                    step[done],
+                    n_reps[done],
+                    key_codes[done],
+                    values[done],
+                    len(keys),
+                )
+                pending.append(plans)
+                n_pending += len(plans[0])
+                if n_pending >= row_group_size:
+                    flush(writer)
+
+        if carry is not None and len(carry[0]) > 0:
+            plans = _pivot_chunk(*carry, len(keys))
+            pending.append(plans)
+            n_pending += len(plans[0])
+        flush(writer, final=True)
+
+        writer.add_key_value_metadata({ACCEPTED_INDEX_KEY: json.dumps(index)})
+
+    return index
+
+
+@click.command()
+@click.argument("in_files", type=click.Path(exists=True), nargs=-1)
+@click.option(
+    "--out-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory to write to. Defaults to the directory of each input file.",
+)
+@click.option(
+    "--row-group-size",
+    type=int,
+    default=DEFAULT_ROW_GROUP_SIZE,
+    show_default=True,
+    help="Number of plans per row group.",
+)
+@click.option("--compression-level", type=int, default=6, show_default=True)
+def main(in_files, out_dir, row_group_size, compression_level):
+    for in_file in in_files:
+        in_path = Path(in_file).resolve()
+        out_path = Path(out_dir).resolve() if out_dir is not None else in_path.parent
+        out_path.mkdir(parents=True, exist_ok=True)
+        if in_path.name.endswith("_tallies.parquet"):
+            out_name = in_path.name.replace("_tallies.parquet", "_wide_tallies.parquet")
+        else:
+            out_name = f"{in_path.stem}_wide.parquet"
+        out_file = out_path.joinpath(out_name)
+        print(f"Compacting {in_path.name} -> {out_file.name}")
+        compact_tallies(
+            in_path,
+            out_file,
+            row_group_size=row_group_size,
+            compression_level=compression_level,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+"""
+Last Updated: 19-10-2026
+
+This script computes the split-R-hat convergence diagnostic (Gelman et al., Bayesian
+Data Analysis, 3rd ed., section 11.4) of weighted scalar statistics across a set of
+seed ensembles, e.g. the 10 PA Forest seeds of `submit_forest.sh` or the VA RevReCom
+runs started from different plans. The statistics are
+
+    cut_edges                   : the number of cut edges of each plan
+    seats:DEM_KEY,REP_KEY       : the number of districts won by the Democrats
+    dem_share:DEM_KEY,REP_KEY   : the statewide Democratic share of the two-party vote
+    ranked_shares:DEM_KEY,REP_KEY : the Democratic shares of the districts ranked
+                                  from lowest to highest, one statistic per rank
+    column:NAME                 : any numeric column, e.g. "cut_edges" or the wide
+                                  tallies column "G16DPRS_d03" (which is read from
+                                  the `district_3` rows of "G16DPRS" in long-format
+                                  tallies)
+
+Every plan is weighted by its `n_reps`, so each chain is treated as the sequence of
+steps it ran and is split in half at its middle step (a plan that spans the middle
+step counts towards both halves). The files are streamed a batch of rows at a time
+into running moments (the total weight, the mean and the sum of squared deviations)
+of each half, which are merged across batches and, for the pooled mean, across
+chains, so no file is ever held in memory. Each (file, statistic) pair is a separate
+task, so the statistics are computed in parallel as well as the files.
+
+With M split chains of n steps, mean theta_m and variance s_m^2 each,
+
+    W = mean(s_m^2),    B / n = var(theta_m),    var+ = (n - 1) / n * W + B / n,
+
+    R-hat = sqrt(var+ / W),
+
+where n is the mean length of the split chains. Values close to 1 (below 1.01 is a
+common threshold) indicate that the chains agree; larger values indicate that they
+have not mixed yet, or that the halves of a chain still differ.
+
+The cut edge statistics are read from `_cut_edges.parquet` files and the partisan
+statistics from long-format or wide tallies files (see `partisan_metrics.py`).
+"""
+
+import re
+from multiprocessing import Pool
+
+import click
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+from partisan_metrics import _district_columns, _parse_election, dem_share, seats
+
+STATISTICS = ["cut_edges", "seats", "dem_share", "ranked_shares", "column"]
+_district_pattern = re.compile(r"^district_(\d+)$")
+_wide_column_pattern = re.compile(r"^(?P<key>.+)_d(?P<district>\d+)$")
+
+
+class RunningMoments:
+    """
+    The total weight, weighted mean and weighted sum of squared deviations of a
+    stream of values. Moments of disjoint streams can be merged, so the moments of
+    a file can be computed a batch at a time, or in parallel, and combined.
+    """
+
+    def __init__(self, weight=0.0, mean=0.0, m2=0.0):
+        self.weight = weight
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, values, weights):
+        """
+        Adds a batch of values with their (frequency) weights.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        weight = weights.sum()
+        if weight <= 0:
+            return self
+        mean = np.dot(weights, values) / weight
+        m2 = np.dot(weights, (values - mean) ** 2)
+        return self.merge(RunningMoments(weight, mean, m2))
+
+    def merge(self, other):
+        """
+        Adds the moments of another, disjoint, stream (Chan et al.).
+        """
+        if other.weight <= 0:
+            return self
+        if self.weight <= 0:
+            self.weight, self.mean, self.m2 = other.weight, other.mean, other.m2
+            return self
+        weight = self.weight + other.weight
+        delta = other.mean - self.mean
+        self.mean += delta * other.weight / weight
+        self.m2 += other.m2 + delta**2 * self.weight * other.weight / weight
+        self.weight = weight
+        return self
+
+    def variance(self, ddof=1):
+        """
+        Returns the variance of the values, counting each unit of weight as one
+        draw.
+        """
+        if self.weight <= ddof:
+            return np.nan
+        return self.m2 / (self.weight - ddof)
+
+
+def parse_statistic(value):
+    """
+    Parses a statistic, e.g. "cut_edges", "seats:PRES16D,PRES16R" or
+    "column:G16DPRS_d03".
+
+    Returns
+    -------
+    (str, (str, str) or str or None):
+        The kind of statistic (see `STATISTICS`) and its election, or the column
+        of a "column" statistic.
+    """
+    kind, _, election = value.partition(":")
+    if kind not in STATISTICS:
+        raise click.BadParameter(
+            f"Unknown statistic {kind!r}, expected one of {STATISTICS}"
+        )
+    if kind == "cut_edges":
+        if election:
+            raise click.BadParameter("cut_edges does not take an election")
+        return kind, None
+    if kind == "column":
+        if not election:
+            raise click.BadParameter(
+                "column needs a column name, e.g. column:cut_edges"
+            )
+        return kind, election
+    if not election:
+        raise click.BadParameter(
+            f"{kind} needs an election, e.g. {kind}:PRES16D,PRES16R"
+        )
+    return kind, _parse_election(election)
+
+
+def statistic_name(kind, election, rank=None):
+    """
+    Returns the name of a statistic in the output, e.g. "seats:PRES16D,PRES16R" or
+    "ranked_shares:PRES16D,PRES16R:03" for the third lowest district share.
+    """
+    if election is None:
+        name = kind
+    elif kind == "column":
+        name = f"{kind}:{election}"
+    else:
+        name = f"{kind}:{election[0]},{election[1]}"
+    return name if rank is None else f"{name}:{rank:02d}"
+
+
+def _statistic_values(kind, election, dem, rep=None):
+    if kind == "column":
+        # The single district column of the key of a long-format tallies file.
+        return {statistic_name(kind, election): dem[:, 0]}
+    if kind == "seats":
+        return {statistic_name(kind, election): seats(dem, rep)}
+    if kind == "dem_share":
+        return {statistic_name(kind, election): dem_share(dem, rep)}
+    ranked = np.sort(dem / (dem + rep), axis=1)
+    return {
+        statistic_name(kind, election, rank + 1): ranked[:, rank]
+        for rank in range(ranked.shape[1])
+    }
+
+
+def _pivot_long(table, keys, district_cols):
+    """
+    Turns the rows of the given keys in a batch of a long-format tallies file into
+    (plans x districts) arrays.
+    """
+    acc = table.column("accepted_count").to_numpy()
+    _, first_row, plan_idx = np.unique(acc, return_index=True, return_inverse=True)
+    values = np.column_stack(
+        [table.column(c).to_numpy().astype(np.float64) for c in district_cols]
+    )
+    row_keys = table.column("sum_columns")
+    tallies = []
+    for key in keys:
+        mask = pc.equal(row_keys, key).to_numpy(zero_copy_only=False)
+        key_values = np.full((len(first_row), len(district_cols)), np.nan)
+        key_values[plan_idx[mask]] = values[mask]
+        tallies.append(key_values)
+    n_reps = table.column("n_reps").to_numpy()[first_row]
+    return n_reps, tallies
+
+
+def iter_statistics(file, kind, election=None, batch_size=1_000_000):
+    """
+    Streams the values of a statistic over the plans of a file.
+
+    Parameters
+    ----------
+    file : str or Path
+        A `_cut_edges.parquet` file for "cut_edges", or else a long-format or wide
+        tallies file.
+    kind : str
+        The kind of statistic (see `STATISTICS`).
+    election : (str, str) or str, optional
+        The (Democratic key, Republican key) pair of a partisan statistic, or the
+        column of a "column" statistic.
+    batch_size : int
+        The number of rows read at a time.
+
+    Yields
+    ------
+    (numpy.ndarray, dict[str, numpy.ndarray]):
+        The `n_reps` of a batch of plans (in accepted order) and the values of each
+        statistic for those plans.
+    """
+    parquet_file = pq.ParquetFile(file)
+    names = parquet_file.schema_arrow.names
+
+    if kind == "cut_edges" or (kind == "column" and election in names):
+        column = "cut_edges" if kind == "cut_edges" else election
+        name = statistic_name(kind, election)
+        for batch in parquet_file.iter_batches(
+            batch_size=batch_size, columns=[column, "n_reps"]
+        ):
+            yield batch.column("n_reps").to_numpy(), {
+                name: batch.column(column).to_numpy()
+            }
+        return
+
+    if kind == "column":
+        match = _wide_column_pattern.match(election)
+        if "sum_columns" not in names or match is None:
+            raise ValueError(f"{file} has no column {election}")
+        keys = [match["key"]]
+        district_cols = [f"district_{int(match['district'])}"]
+    else:
+        keys = list(election)
+        district_cols = None
+
+    if "sum_columns" not in names:
+        key_columns = [
+            _district_columns(names, f"{key}_", re.compile(r"^d(\d+)$"))
+            for key in election
+        ]
+        for key, cols in zip(election, key_columns):
+            if not cols:
+                raise ValueError(f"{file} has no columns for the key {key}")
+        for batch in parquet_file.iter_batches(
+            batch_size=batch_size, columns=["n_reps"] + key_columns[0] + key_columns[1]
+        ):
+            dem, rep = (
+                np.column_stack(
+                    [batch.column(c).to_numpy().astype(np.float64) for c in cols]
+                )
+                for cols in key_columns
+            )
+            yield batch.column("n_reps").to_numpy(), _statistic_values(
+                kind, election, dem, rep
+            )
+        return
+
+    # Long-format tallies have one row per (plan, key), and the rows of a plan may
+    # be split between two batches, so the rows of the last plan of each batch are
+    # held back until the next one.
+    if district_cols is None:
+        district_cols = _district_columns(names, "", _district_pattern)
+    key_set = pa.array(keys)
+    pending = None
+    for batch in parquet_file.iter_batches(
+        batch_size=batch_size,
+        columns=["accepted_count", "n_reps", "sum_columns"] + district_cols,
+    ):
+        table = pa.Table.from_batches([batch])
+        table = table.filter(pc.is_in(table.column("sum_columns"), value_set=key_set))
+        if pending is not None:
+            table = pa.concat_tables([pending, table])
+        if table.num_rows == 0:
+            continue
+        acc = table.column("accepted_count")
+        last = pc.equal(acc, acc[-1])
+        pending = table.filter(last)
+        table = table.filter(pc.invert(last))
+        if table.num_rows > 0:
+            n_reps, tallies = _pivot_long(table, keys, district_cols)
+            yield n_reps, _statistic_values(kind, election, *tallies)
+    if pending is not None and pending.num_rows > 0:
+        n_reps, tallies = _pivot_long(pending, keys, district_cols)
+        yield n_reps, _statistic_values(kind, election, *tallies)
+
+
+def _iter_n_reps(file, batch_size):
+    """
+    Streams the `n_reps` of the plans of a file.
+    """
+    parquet_file = pq.ParquetFile(file)
+    names = parquet_file.schema_arrow.names
+    if "sum_columns" not in names:
+        for batch in parquet_file.iter_batches(
+            batch_size=batch_size, columns=["n_reps"]
+        ):
+            yield batch.column("n_reps").to_numpy()
+        return
+    # Only the rows of one key are counted, as every plan has one row per key.
+    first_key = None
+    for batch in parquet_file.iter_batches(
+        batch_size=batch_size, columns=["n_reps", "sum_columns"]
+    ):
+        if first_key is None:
+            first_key = batch.column("sum_columns")[0]
+        mask = pc.equal(batch.column("sum_columns"), first_key)
+        yield batch.column("n_reps").filter(mask).to_numpy()
+
+
+def total_steps(file, batch_size=1_000_000):
+    """
+    Returns the number of steps of a chain, i.e. the sum of the `n_reps` of its
+    plans.
+    """
+    return sum(int(n_reps.sum()) for n_reps in _iter_n_reps(file, batch_size))
+
+
+def chain_moments(file, kind, election=None, batch_size=1_000_000):
+    """
+    Computes the running moments of each half of a chain for a statistic.
+
+    Parameters
+    ----------
+    file : str or Path
+        The processed file of the chain (see `iter_statistics`).
+    kind : str
+        The kind of statistic (see `STATISTICS`).
+    election : (str, str) or str, optional
+        The election or column of the statistic (see `iter_statistics`).
+    batch_size : int
+        The number of rows read at a time.
+
+    Returns
+    -------
+    dict[str, (RunningMoments, RunningMoments)]
+        The moments of the first and second half of the chain for every statistic.
+    """
+    middle = total_steps(file, batch_size) / 2
+    moments = {}
+    offset = 0
+    for n_reps, values in iter_statistics(file, kind, election, batch_size):
+        n_reps = n_reps.astype(np.float64)
+        start = offset + np.cumsum(n_reps) - n_reps
+        offset += n_reps.sum()
+        first = np.clip(middle - start, 0, n_reps)
+        second = n_reps - first
+        for name, stat in values.items():
+            halves = moments.setdefault(name, (RunningMoments(), RunningMoments()))
+            halves[0].update(stat, first)
+            halves[1].update(stat, second)
+    return moments
+
+
+def split_rhat(halves):
+    """
+    Computes the split-R-hat of a statistic from the moments of the halves of each
+    chain.
+
+    Parameters
+    ----------
+    halves : list[RunningMoments]
+        The moments of every split chain.
+
+    Returns
+    -------
+    dict
+        The number of split chains `n_split_chains`, their mean length `n_steps`, the
+        pooled `mean`, the mean within-chain variance `within_var`, the variance of
+        the chain means `between_var` (B / n), and `rhat`.
+    """
+    halves = [half for half in halves if half.weight > 0]
+    n_steps = np.mean([half.weight for half in halves]) if halves else 0.0
+    pooled = RunningMoments()
+    for half in halves:
+        pooled.merge(RunningMoments(half.weight, half.mean, half.m2))
+
+    within = np.mean([half.variance() for half in halves]) if halves else np.nan
+    between = (
+        np.var([half.mean for half in halves], ddof=1) if len(halves) > 1 else np.nan
+    )
+    if len(halves) < 2:
+        rhat = np.nan
+    elif within > 0:
+        rhat = np.sqrt(((n_steps - 1) / n_steps * within + between) / within)
+    else:
+        # A statistic that is constant within every half has converged only if it
+        # is the same constant everywhere.
+        rhat = 1.0 if between == 0 else np.inf
+    return {
+        "n_split_chains": len(halves),
+        "n_steps": n_steps,
+        "mean": pooled.mean,
+        "within_var": within,
+        "between_var": between,
+        "rhat": rhat,
+    }
+
+
+def _moments_task(task):
+    index, file, kind, election, batch_size = task
+    return index, chain_moments(file, kind, election, batch_size)
+
+
+def convergence_diagnostics(files, statistics, batch_size=1_000_000, n_processes=None):
+    """
+    Computes the split-R-hat of statistics across a set of chains.
+
+    Parameters
+    ----------
+    files : list[str or Path]
+        The processed files of the chains, one per seed.
+    statistics : list[(str, (str, str) or None)]
+        The statistics (see `parse_statistic`).
+    batch_size : int
+        The number of rows read at a time.
+    n_processes : int, optional
+        The number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per statistic with the columns `statistic`, `n_chains` and the
+        fields of `split_rhat`.
+    """
+    tasks = [
+        (index, str(file), kind, election, batch_size)
+        for index, (kind, election) in enumerate(statistics)
+        for file in files
+    ]
+    # The halves of every chain for each (statistic index, name), so that the
+    # output is in the requested order with the ranks in order.
+    halves = {}
+    with Pool(processes=n_processes) as pool:
+        for index, moments in tqdm(
+            pool.imap_unordered(_moments_task, tasks),
+            total=len(tasks),
+            desc="Reading chains",
+        ):
+            for name, (first, second) in moments.items():
+                halves.setdefault((index, name), []).extend([first, second])
+
+    rows = []
+    for (_, name), chain_halves in sorted(halves.items()):
+        row = {"statistic": name, "n_chains": len(chain_halves) // 2}
+        row.update(split_rhat(chain_halves))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+@click.command()
+@click.argument("in_files", type=click.Path(exists=True), nargs=-1, required=True)
+@click.option(
+    "-s",
+    "--statistic",
+    "statistics",
+    type=str,
+    multiple=True,
+    default=["cut_edges"],
+    show_default=True,
+    help="A statistic, e.g. cut_edges, seats:PRES16D,PRES16R, "
+    "ranked_shares:PRES16D,PRES16R or column:G16DPRS_d03.",
+)
+@click.option(
+    "-o",
+    "--out-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="A parquet file to save the diagnostics to.",
+)
+@click.option(
+    "--threshold",
+    type=float,
+    default=1.01,
+    show_default=True,
+    help="The R-hat above which a statistic is flagged as not converged.",
+)
+@click.option("--batch-size", type=int, default=1_000_000, show_default=True)
+@click.option("--n-processes", type=int, default=None)
+def main(in_files, statistics, out_file, threshold, batch_size, n_processes):
+    if len(in_files) < 2:
+        raise click.UsageError("R-hat needs at least two chains.")
+    statistics = [parse_statistic(value) for value in statistics]
+    diagnostics = convergence_diagnostics(
+        in_files, statistics, batch_size=batch_size, n_processes=n_processes
+    )
+    diagnostics["converged"] = diagnostics["rhat"] < threshold
+
+    if out_file is not None:
+        diagnostics.to_parquet(out_file, index=False)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(diagnostics.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Last Updated: 19-10-2026
+
+This script computes per-plan metrics (cut edges, district tallies of node
+attributes, and district sizes) for a chain of plans incrementally. Consecutive
+accepted plans of ReCom, RevReCom and Forest ReCom only differ in the districts that
+were merged and re-split, so rather than recomputing every metric over all of the
+nodes and edges of the graph, each plan is compared to the previous one and only the
+nodes whose assignment changed and the edges touching those nodes are revisited.
+The cost of each plan therefore scales with the size of the move rather than the
+size of the graph.
+
+The input may either be a `.jsonl.ben` file or an assignment store built by
+`assignment_store.py`, and the output is a single parquet file with one row per
+plan:
+
+    step, n_reps, accepted_count, cut_edges, {key}_d{NN}, ...
+"""
+
+from pathlib import Path
+
+import click
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+from assignment_store import open_store
+from ben_reader import count_ben_plans, iter_ben_batches
+from compact_tallies import wide_column_name
+from graph_cache import load_graph
+from tally_engine import load_node_attributes
+
+
+def load_incidence(graph_file):
+    """
+    Reads the edges of a JSON dual graph along with the edges incident to each node.
+
+    Parameters
+    ----------
+    graph_file : str or Path
+        The path to the JSON dual graph (in networkx adjacency format).
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray, numpy.ndarray):
+        An (edges x 2) array of edge endpoints (by node position), and the CSR
+        `indptr` and `edge_ids` arrays so that the edges incident to node `i` are
+        `edge_ids[indptr[i]:indptr[i + 1]]`.
+    """
+    graph = load_graph(graph_file)
+    edges = np.asarray(graph.edges)
+    indptr = np.asarray(graph.indptr)
+    edge_ids = np.asarray(graph.edge_ids)
+    return edges, indptr, edge_ids
+
+
+class DeltaMetricEngine:
+    """
+    Keeps the metrics of the current plan of a chain and updates them from the set
+    of nodes that changed district.
+
+    Parameters
+    ----------
+    edges : numpy.ndarray
+        An (edges x 2) array of edge endpoints.
+    indptr : numpy.ndarray
+        The CSR row pointers of the node-to-edge incidence.
+    edge_ids : numpy.ndarray
+        The CSR column indices of the node-to-edge incidence.
+    attributes : numpy.ndarray
+        A (nodes x keys) matrix of node attributes to tally.
+    n_bins : int
+        One more than the largest district label.
+    """
+
+    def __init__(self, edges, indptr, edge_ids, attributes, n_bins):
+        self.edges = edges
+        self.indptr = indptr
+        self.edge_ids = edge_ids
+        self.attributes = attributes
+        self.n_bins = n_bins
+        self.assignment = None
+
+    def reset(self, assignment):
+        """
+        Computes the metrics of a plan from scratch.
+
+        Parameters
+        ----------
+        assignment : numpy.ndarray
+            The district of each node.
+        """
+        self.assignment = np.array(assignment, dtype=np.int64)
+        self._check_labels(self.assignment)
+        self.is_cut = (
+            self.assignment[self.edges[:, 0]] != self.assignment[self.edges[:, 1]]
+        )
+        self.cut_edges = int(self.is_cut.sum())
+        self.node_counts = np.bincount(self.assignment, minlength=self.n_bins)
+        self.tallies = np.zeros((self.n_bins, self.attributes.shape[1]))
+        for k, column in enumerate(self.attributes.T):
+            self.tallies[:, k] = np.bincount(
+                self.assignment, weights=column, minlength=self.n_bins
+            )
+
+    def update(self, assignment, changed=None):
+        """
+        Moves the engine to a new plan, only revisiting the nodes that changed
+        district and the edges incident to them.
+
+        Parameters
+        ----------
+        assignment : numpy.ndarray
+            The district of each node in the new plan.
+        changed : numpy.ndarray, optional
+            The positions of the nodes whose district changed. Computed from the
+            previous plan if not given.
+        """
+        if self.assignment is None:
+            self.reset(assignment)
+            return
+
+        if changed is None:
+            changed = np.flatnonzero(assignment != self.assignment)
+        if len(changed) == 0:
+            return
+
+        old_labels = self.assignment[changed]
+        new_labels = np.asarray(assignment[changed], dtype=np.int64)
+        self._check_labels(new_labels)
+        self.assignment[changed] = new_labels
+
+        # Gather the edges incident to the changed nodes from the CSR incidence.
+        starts = self.indptr[changed]
+        counts = self.indptr[changed + 1] - starts
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        touched = np.unique(self.edge_ids[np.repeat(starts, counts) + offsets])
+
+        ends = self.edges[touched]
+        now_cut = self.assignment[ends[:, 0]] != self.assignment[ends[:, 1]]
+        self.cut_edges += int(now_cut.sum()) - int(self.is_cut[touched].sum())
+        self.is_cut[touched] = now_cut
+
+        np.subtract.at(self.node_counts, old_labels, 1)
+        np.add.at(self.node_counts, new_labels, 1)
+        moved = self.attributes[changed]
+        np.subtract.at(self.tallies, old_labels, moved)
+        np.add.at(self.tallies, new_labels, moved)
+
+    def _check_labels(self, labels):
+        if len(labels) > 0 and labels.max() >= self.n_bins:
+            raise ValueError(
+                f"Found district label {labels.max()} but expected labels below "
+                f"{self.n_bins}"
+            )
+
+
+def _iter_blocks(source, block_size):
+    """
+    Iterates over (assignments, n_reps) blocks of a BEN file or assignment store.
+    """
+    source = Path(source)
+    if source.is_dir():
+        assignments, plans = open_store(source, columns=["n_reps"])
+        n_reps = plans["n_reps"].to_numpy()
+        for start in range(0, len(assignments), block_size):
+            yield (
+                np.asarray(assignments[start : start + block_size]),
+                n_reps[start : start + block_size],
+            )
+    else:
+        yield from iter_ben_batches(source, batch_size=block_size)
+
+
+def delta_metrics(source, graph_file, keys, out_file, block_size=10_000):
+    """
+    Computes the cut edges and district tallies of every plan in a chain using
+    incremental updates and writes them to a parquet file.
+
+    Parameters
+    ----------
+    source : str or Path
+        A `.jsonl.ben` file or an assignment store directory.
+    graph_file : str or Path
+        The JSON dual graph holding the edges and node attributes.
+    keys : list[str]
+        The node attributes to tally (e.g. the population and vote columns).
+    out_file : str or Path
+        The path of the parquet file to write.
+    block_size : int
+        The number of plans decoded at once.
+
+    Returns
+    -------
+    None
+    """
+    source = Path(source)
+    keys = sorted(keys)
+    attributes = load_node_attributes(graph_file, keys)
+    edges, indptr, edge_ids = load_incidence(graph_file)
+
+    if source.is_dir():
+        n_plans = len(open_store(source, columns=["n_reps"])[0])
+    else:
+        n_plans, _ = count_ben_plans(source)
+
+    engine = None
+    districts = None
+    writer = None
+    step = 1
+    accepted = 1
+    for block, n_reps in tqdm(
+        _iter_blocks(source, block_size), total=-(-n_plans // block_size)
+    ):
+        if engine is None:
+            n_bins = int(block.max()) + 1
+            engine = DeltaMetricEngine(edges, indptr, edge_ids, attributes, n_bins)
+            engine.reset(block[0])
+            districts = np.flatnonzero(engine.node_counts).tolist()
+
+        # The changed nodes of the whole block (relative to the previous plan) are
+        # found in one comparison, and the engine only walks those.
+        previous = np.vstack([engine.assignment[None, :], block[:-1]])
+        plan_idx, node_idx = np.nonzero(block != previous)
+        bounds = np.searchsorted(plan_idx, np.arange(len(block) + 1))
+
+        cut_edges = np.empty(len(block), dtype=np.int64)
+        tallies = np.empty((len(block), len(districts), len(keys)), dtype=np.float64)
+        for i in range(len(block)):
+            engine.update(block[i], node_idx[bounds[i] : bounds[i + 1]])
+            cut_edges[i] = engine.cut_edges
+            tallies[i] = engine.tallies[districts]
+
+        n_reps = np.asarray(n_reps, dtype=np.int64)
+        columns = {
+            "step": step + np.concatenate([[0], np.cumsum(n_reps)[:-1]]),
+            "n_reps": n_reps.astype(np.int32),
+            "accepted_count": np.arange(
+                accepted, accepted + len(block), dtype=np.int32
+            ),
+            "cut_edges": cut_edges,
+        }
+        for k, key in enumerate(keys):
+            for j, d in enumerate(districts):
+                columns[wide_column_name(key, d)] = tallies[:, j, k]
+        table = pa.table(columns)
+
+        if writer is None:
+            writer = pq.ParquetWriter(out_file, table.schema, compression="zstd")
+        writer.write_table(table)
+        step += int(n_reps.sum())
+        accepted += len(block)
+
+    if writer is not None:
+        writer.close()
+
+
+@click.command()
+@click.option(
+    "-b",
+    "--source",
+    type=click.Path(exists=True),
+    required=True,
+    help="The BEN file or assignment store to process.",
+)
+@click.option(
+    "-g",
+    "--graph-file",
+    type=click.Path(exists=True),
+    required=True,
+    help="The JSON dual graph holding the edges and node attributes.",
+)
+@click.option(
+    "-k", "--keys", type=str, multiple=True, help="A node attribute to tally."
+)
+@click.option(
+    "-o",
+    "--out-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Output file. Defaults to <source>_metrics.parquet.",
+)
+@click.option("--block-size", type=int, default=10_000, show_default=True)
+def main(source, graph_file, keys, out_file, block_size):
+    if out_file is None:
+        source_path = Path(source).resolve()
+        name = source_path.name
+        if name.endswith(".jsonl.ben"):
+            name = name[: -len(".jsonl.ben")]
+        elif name.endswith("_store"):
+            name = name[: -len("_store")]
+        out_file = source_path.with_name(f"{name}_metrics.parquet")
+
+    delta_metrics(source, graph_file, list(keys), out_file, block_size=block_size)
+
+
+if __name__ == "__main__":
+    main()
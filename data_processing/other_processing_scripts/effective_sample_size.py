@@ -0,0 +1,347 @@
+"""
+Last Updated: 19-10-2026
+
+This script computes the autocorrelation, the effective sample size (ESS) and the
+standard error of the mean of weighted scalar statistics of a chain, for the same
+statistics as `convergence_diagnostics.py` (cut edges, seats, Democratic shares and
+any tallies column).
+
+The processed files store a chain as run lengths: every accepted plan is one row
+and its `n_reps` is the number of proposed steps the chain stayed on it. The
+autocorrelation of the rows is therefore not the autocorrelation of the chain, and
+expanding the rows into the billions of steps of a RevReCom chain is not possible.
+Instead, the chain is streamed into the means of consecutive blocks of `block_size`
+steps: with the running integral S(t) of the statistic over the steps, the mean of
+block j is (S((j + 1) b) - S(j b)) / b, and S at the block boundaries is found by
+a binary search of the run ends of each batch of rows. The block size is chosen so
+that there are at most `max_blocks` blocks, and the steps after the last whole
+block are left out.
+
+The autocorrelation of the block means is computed with an FFT, and its lags are
+reported in proposed steps (a multiple of the block size). The integrated
+autocorrelation time of the block means, tau, is estimated with Geyer's initial
+monotone sequence, and since the variance of the mean of the chain is
+var(block means) * tau / n_blocks,
+
+    ESS = var(steps) / (var(block means) * tau / n_blocks),
+
+where var(steps) is the step-weighted variance of the statistic. This counts the
+steps within a block correctly even when the blocks are longer than the
+autocorrelation time of the chain. The batch means standard error, which does not
+rely on the autocorrelation estimate, is the standard error of the mean of
+`n_batches` equal batches of blocks.
+"""
+
+from multiprocessing import Pool
+
+import click
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from convergence_diagnostics import (
+    RunningMoments,
+    iter_statistics,
+    parse_statistic,
+    total_steps,
+)
+
+
+def block_means(file, kind, election=None, max_blocks=2**20, batch_size=1_000_000):
+    """
+    Streams a chain into the means of consecutive blocks of steps.
+
+    Parameters
+    ----------
+    file : str or Path
+        The processed file of the chain (see `convergence_diagnostics.iter_statistics`).
+    kind : str
+        The kind of statistic (see `convergence_diagnostics.STATISTICS`).
+    election : (str, str) or str, optional
+        The election or column of the statistic.
+    max_blocks : int
+        The largest number of blocks.
+    batch_size : int
+        The number of rows read at a time.
+
+    Returns
+    -------
+    (int, dict[str, (numpy.ndarray, RunningMoments)]):
+        The block size in steps, and the block means and the step-weighted moments
+        of every statistic.
+    """
+    n_steps = total_steps(file, batch_size)
+    block_size = max(1, -(-n_steps // max_blocks))
+    n_blocks = n_steps // block_size
+    boundaries = np.arange(n_blocks + 1, dtype=np.int64) * block_size
+
+    integrals = {}
+    moments = {}
+    offset = 0
+    for n_reps, values in iter_statistics(file, kind, election, batch_size):
+        if len(n_reps) == 0:
+            continue
+        n_reps = n_reps.astype(np.int64)
+        ends = offset + np.cumsum(n_reps)
+        # The boundaries that fall in the runs of this batch.
+        first, last = np.searchsorted(boundaries, [offset, ends[-1]], side="right")
+        inside = boundaries[first:last]
+        runs = np.searchsorted(ends, inside, side="left")
+        for name, stat in values.items():
+            stat = np.asarray(stat, dtype=np.float64)
+            if name not in integrals:
+                integrals[name] = (np.zeros(n_blocks + 1), [0.0])
+                moments[name] = RunningMoments()
+            integral, carry = integrals[name]
+            run_integrals = carry[0] + np.cumsum(n_reps * stat)
+            integral[first:last] = (
+                run_integrals[runs] - (ends[runs] - inside) * stat[runs]
+            )
+            carry[0] = run_integrals[-1]
+            moments[name].update(stat, n_reps)
+        offset = ends[-1]
+
+    return block_size, {
+        name: (np.diff(integral) / block_size, moments[name])
+        for name, (integral, _) in integrals.items()
+    }
+
+
+def autocorrelation(series, max_lag=None):
+    """
+    Computes the autocorrelation of a series with an FFT.
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The series.
+    max_lag : int, optional
+        The largest lag. Defaults to the length of the series minus one.
+
+    Returns
+    -------
+    numpy.ndarray
+        The autocorrelation at lags 0, 1, ..., `max_lag`.
+    """
+    n = len(series)
+    max_lag = n - 1 if max_lag is None else min(max_lag, n - 1)
+    centered = np.asarray(series, dtype=np.float64) - np.mean(series)
+    # Zero padding to at least 2n makes the circular correlation a linear one.
+    size = 1 << int(2 * n - 1).bit_length()
+    spectrum = np.fft.rfft(centered, size)
+    acov = np.fft.irfft(spectrum * np.conj(spectrum), size)[: max_lag + 1]
+    if acov[0] <= 0:
+        return np.full(max_lag + 1, np.nan)
+    return acov / acov[0]
+
+
+def integrated_time(acf):
+    """
+    Estimates the integrated autocorrelation time 1 + 2 * sum(acf[1:]) with Geyer's
+    initial monotone sequence estimator, which truncates the sum at the first pair
+    of lags whose sum is not positive and makes the pair sums non-increasing.
+
+    Parameters
+    ----------
+    acf : numpy.ndarray
+        The autocorrelation at lags 0, 1, ....
+
+    Returns
+    -------
+    float
+        The integrated autocorrelation time, in lags.
+    """
+    if len(acf) < 2 or np.isnan(acf[0]):
+        return np.nan
+    n_pairs = len(acf) // 2
+    pairs = acf[: 2 * n_pairs : 2] + acf[1 : 2 * n_pairs : 2]
+    negative = np.flatnonzero(pairs <= 0)
+    if len(negative):
+        pairs = pairs[: negative[0]]
+    pairs = np.minimum.accumulate(pairs)
+    return max(2 * pairs.sum() - 1, 1 / len(acf))
+
+
+def batch_means_se(series, n_batches=30):
+    """
+    Computes the standard error of the mean of a series of block means from the
+    means of `n_batches` equal batches of consecutive blocks.
+
+    Parameters
+    ----------
+    series : numpy.ndarray
+        The block means.
+    n_batches : int
+        The number of batches. The blocks after the last whole batch are left out.
+
+    Returns
+    -------
+    float
+        The batch means standard error.
+    """
+    batch_size = len(series) // n_batches
+    if n_batches < 2 or batch_size == 0:
+        return np.nan
+    batches = series[: batch_size * n_batches].reshape(n_batches, batch_size)
+    return np.std(batches.mean(axis=1), ddof=1) / np.sqrt(n_batches)
+
+
+def chain_ess(
+    file,
+    kind,
+    election=None,
+    max_blocks=2**20,
+    max_lag=1000,
+    n_batches=30,
+    batch_size=1_000_000,
+):
+    """
+    Computes the autocorrelation, ESS and standard errors of a statistic of a chain.
+
+    Parameters
+    ----------
+    file : str or Path
+        The processed file of the chain.
+    kind : str
+        The kind of statistic (see `convergence_diagnostics.STATISTICS`).
+    election : (str, str) or str, optional
+        The election or column of the statistic.
+    max_blocks : int
+        The largest number of blocks the chain is aggregated into.
+    max_lag : int
+        The largest lag of the autocorrelation that is reported, in blocks.
+    n_batches : int
+        The number of batches of the batch means standard error.
+    batch_size : int
+        The number of rows read at a time.
+
+    Returns
+    -------
+    (pandas.DataFrame, pandas.DataFrame):
+        The summary, with one row per statistic and the columns `file`,
+        `statistic`, `n_steps`, `block_size`, `n_blocks`, `mean`, `std`, `tau_steps`
+        (the integrated autocorrelation time in steps), `ess`, `se` (std /
+        sqrt(ess)) and `se_batch_means`, and the autocorrelation, with one row per
+        (statistic, lag) and the columns `file`, `statistic`, `lag_steps` and `acf`.
+    """
+    block_size, blocks = block_means(file, kind, election, max_blocks, batch_size)
+    rows = []
+    acfs = []
+    for name, (means, moments) in blocks.items():
+        n_blocks = len(means)
+        acf = autocorrelation(means)
+        tau = integrated_time(acf)
+        variance = moments.variance(ddof=0)
+        mean_variance = np.var(means) * tau / n_blocks if n_blocks > 1 else np.nan
+        ess = variance / mean_variance if mean_variance > 0 else np.nan
+        rows.append(
+            {
+                "file": str(file),
+                "statistic": name,
+                "n_steps": int(moments.weight),
+                "block_size": block_size,
+                "n_blocks": n_blocks,
+                "mean": moments.mean,
+                "std": np.sqrt(variance),
+                "tau_steps": moments.weight / ess if ess > 0 else np.nan,
+                "ess": ess,
+                "se": np.sqrt(mean_variance),
+                "se_batch_means": batch_means_se(means, n_batches),
+            }
+        )
+        n_lags = min(max_lag, len(acf) - 1) + 1
+        acfs.append(
+            pd.DataFrame(
+                {
+                    "file": str(file),
+                    "statistic": name,
+                    "lag_steps": np.arange(n_lags, dtype=np.int64) * block_size,
+                    "acf": acf[:n_lags],
+                }
+            )
+        )
+    return pd.DataFrame(rows), pd.concat(acfs, ignore_index=True)
+
+
+def _ess_task(task):
+    file, kind, election, kwargs = task
+    return chain_ess(file, kind, election, **kwargs)
+
+
+@click.command()
+@click.argument("in_files", type=click.Path(exists=True), nargs=-1, required=True)
+@click.option(
+    "-s",
+    "--statistic",
+    "statistics",
+    type=str,
+    multiple=True,
+    default=["cut_edges"],
+    show_default=True,
+    help="A statistic, e.g. cut_edges, seats:PRES16D,PRES16R, "
+    "ranked_shares:PRES16D,PRES16R or column:G16DPRS_d03.",
+)
+@click.option(
+    "-o",
+    "--out-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="A parquet file to save the summary to.",
+)
+@click.option(
+    "--acf-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="A parquet file to save the autocorrelations to.",
+)
+@click.option("--max-blocks", type=int, default=2**20, show_default=True)
+@click.option(
+    "--max-lag",
+    type=int,
+    default=1000,
+    show_default=True,
+    help="The largest lag saved to the autocorrelation file, in blocks.",
+)
+@click.option("--n-batches", type=int, default=30, show_default=True)
+@click.option("--batch-size", type=int, default=1_000_000, show_default=True)
+@click.option("--n-processes", type=int, default=None)
+def main(
+    in_files,
+    statistics,
+    out_file,
+    acf_file,
+    max_blocks,
+    max_lag,
+    n_batches,
+    batch_size,
+    n_processes,
+):
+    statistics = [parse_statistic(value) for value in statistics]
+    kwargs = {
+        "max_blocks": max_blocks,
+        "max_lag": max_lag,
+        "n_batches": n_batches,
+        "batch_size": batch_size,
+    }
+    tasks = [
+        (str(file), kind, election, kwargs)
+        for file in in_files
+        for kind, election in statistics
+    ]
+    with Pool(processes=n_processes) as pool:
+        results = list(
+            tqdm(pool.imap(_ess_task, tasks), total=len(tasks), desc="Reading chains")
+        )
+    summary = pd.concat([result[0] for result in results], ignore_index=True)
+    acf = pd.concat([result[1] for result in results], ignore_index=True)
+
+    if out_file is not None:
+        summary.to_parquet(out_file, index=False)
+    if acf_file is not None:
+        acf.to_parquet(acf_file, index=False)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(summary.drop(columns="file").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
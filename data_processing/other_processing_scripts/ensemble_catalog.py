@@ -0,0 +1,396 @@
+"""
+Last Updated: 19-10-2026
+
+This script builds a catalog of the processed ensembles in `hpc_files/hpc_processed_data`
+so that scripts can look up their inputs by state, method, seed, etc. instead of
+globbing and splitting file names.
+
+The processed files are named after the raw chains by the slurm scripts, e.g.
+
+    PA_Forest_steps_10000000_rng_seed_278986_gamma_0.0_alpha_1.0_ndists_17_20241112_124346_tallies.parquet
+    50x50_RevReCom_steps_10000000000_plan_50x5_strip_20240618_174413_cut_edges.parquet
+    50x50_SMC_batch_size_100000_rng_seed_278986_dists_10_20250129_150813_cut_edges.parquet
+
+that is, the state and the method, a list of `<parameter>_<value>` pairs, the date
+and time the chain was started and the kind of processed file. The catalog has one
+row per file with these fields, the size and mtime of the file, and what can be
+read from the parquet footer and the `n_reps` column: the number of rows and row
+groups, the columns, the number of plans and the total number of steps. It is
+saved as `ensemble_catalog.parquet` at the top of the data folder and only the files
+that are new or have changed since the last scan are read again.
+
+`ensemble_dataset` turns a selection of the catalog into a pyarrow `Dataset` where
+every file is a fragment partitioned by `state`, `method`, `seed` and `n_dists`, so
+a query such as "the cut edges of every 7x7 ReCom chain" is a single scan that
+skips the fragments that do not match.
+
+The figure and table scripts import this module from here by adding this folder
+to `sys.path`.
+"""
+
+import fnmatch
+import json
+import re
+import tempfile
+from multiprocessing import Pool
+from pathlib import Path
+
+import click
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+CATALOG_NAME = "ensemble_catalog.parquet"
+PARTITION_FIELDS = pa.schema(
+    [
+        ("state", pa.string()),
+        ("method", pa.string()),
+        ("seed", pa.int64()),
+        ("n_dists", pa.int64()),
+    ]
+)
+
+# The parameters that appear in the file names, and the catalog column each one
+# is stored in.
+_PARAMETERS = {
+    "steps": "steps",
+    "rng_seed": "seed",
+    "batch_size": "batch_size",
+    "gamma": "gamma",
+    "alpha": "alpha",
+    "ndists": "n_dists",
+    "dists": "n_dists",
+    "plan": "plan",
+}
+_INT_COLUMNS = ["steps", "seed", "batch_size", "n_dists"]
+_FLOAT_COLUMNS = ["gamma", "alpha"]
+_name_pattern = re.compile(
+    r"^(?P<state>[^_]+)_(?P<method>[^_]+)_(?P<params>.*?)_?"
+    r"(?P<date>\d{8})_(?P<time>\d{6})_(?P<kind>[A-Za-z_]+)$"
+)
+
+
+def parse_ensemble_name(name):
+    """
+    Parses the name of a processed ensemble file.
+
+    Parameters
+    ----------
+    name : str
+        The file name, e.g.
+        "7x7_ReComA_steps_1000000000_rng_seed_278986_plan_rand_dist_20241031_122133_cut_edges.parquet".
+
+    Returns
+    -------
+    dict or None
+        The `state`, `method`, `kind` and `started` (the date and time in the name)
+        of the file along with every parameter found in the name (`steps`, `seed`,
+        `batch_size`, `gamma`, `alpha`, `n_dists` and `plan`), or None if the name
+        does not follow the convention.
+    """
+    stem = name[: -len(".parquet")] if name.endswith(".parquet") else name
+    match = _name_pattern.match(stem)
+    if match is None:
+        return None
+
+    info = {
+        "state": match["state"],
+        "method": match["method"],
+        "kind": match["kind"],
+        "started": f"{match['date']}_{match['time']}",
+    }
+    tokens = match["params"].split("_") if match["params"] else []
+    key = None
+    i = 0
+    while i < len(tokens):
+        # Parameter names are one or two tokens long (e.g. "rng_seed").
+        two = "_".join(tokens[i : i + 2])
+        if two in _PARAMETERS and i + 1 < len(tokens):
+            key, i = _PARAMETERS[two], i + 2
+            info[key] = []
+        elif tokens[i] in _PARAMETERS:
+            key, i = _PARAMETERS[tokens[i]], i + 1
+            info[key] = []
+        elif key is not None:
+            info[key].append(tokens[i])
+            i += 1
+        else:
+            return None
+
+    for key in list(info):
+        if key in _PARAMETERS.values():
+            info[key] = "_".join(info[key])
+            if key in _INT_COLUMNS:
+                info[key] = int(info[key])
+            elif key in _FLOAT_COLUMNS:
+                info[key] = float(info[key])
+    return info
+
+
+def _scan_file(path):
+    """
+    Reads the footer and the `n_reps` column of a processed file.
+    """
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.metadata
+    names = parquet_file.schema_arrow.names
+    info = {
+        "num_rows": metadata.num_rows,
+        "num_row_groups": metadata.num_row_groups,
+        "columns": json.dumps(names),
+        "n_plans": None,
+        "total_n_reps": None,
+    }
+    if "n_reps" not in names:
+        return info
+
+    if "sum_columns" in names:
+        # Long-format tallies have one row per (plan, key), so only the rows of one
+        # key are counted.
+        table = parquet_file.read(columns=["n_reps", "sum_columns"])
+        first_key = table.column("sum_columns")[0]
+        table = table.filter(pc.equal(table.column("sum_columns"), first_key))
+    else:
+        table = parquet_file.read(columns=["n_reps"])
+    info["n_plans"] = table.num_rows
+    info["total_n_reps"] = int(pc.sum(table.column("n_reps")).as_py() or 0)
+    return info
+
+
+def _catalog_row(args):
+    root, path = args
+    stat = path.stat()
+    row = {
+        "path": str(path.relative_to(root)),
+        "name": path.name,
+        "folder": path.parent.name,
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime,
+    }
+    row.update(parse_ensemble_name(path.name))
+    row.update(_scan_file(path))
+    return row
+
+
+def build_catalog(root, n_processes=None, write=True):
+    """
+    Scans the processed data folder and updates its catalog. Files whose size and
+    mtime match the existing catalog are not read again.
+
+    Parameters
+    ----------
+    root : str or Path
+        The processed data folder (e.g. `hpc_files/hpc_processed_data`).
+    n_processes : int, optional
+        The number of worker processes. Defaults to the number of CPUs.
+    write : bool
+        Whether to save the catalog as `<root>/ensemble_catalog.parquet`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The catalog, with one row per processed file that follows the naming
+        convention.
+    """
+    root = Path(root).resolve()
+    catalog_file = root.joinpath(CATALOG_NAME)
+    old = pd.read_parquet(catalog_file) if catalog_file.exists() else None
+    old_rows = (
+        {} if old is None else {row["path"]: row for row in old.to_dict("records")}
+    )
+
+    kept = []
+    todo = []
+    for path in sorted(root.glob("**/*.parquet")):
+        if path == catalog_file or parse_ensemble_name(path.name) is None:
+            continue
+        stat = path.stat()
+        row = old_rows.get(str(path.relative_to(root)))
+        if (
+            row is not None
+            and row["source_size"] == stat.st_size
+            and row["source_mtime"] == stat.st_mtime
+        ):
+            kept.append(row)
+        else:
+            todo.append((root, path))
+
+    scanned = []
+    if todo:
+        with Pool(processes=n_processes) as pool:
+            scanned = list(
+                tqdm(
+                    pool.imap(_catalog_row, todo),
+                    total=len(todo),
+                    desc="Scanning ensembles",
+                )
+            )
+
+    catalog = pd.DataFrame(kept + scanned)
+    if catalog.empty:
+        catalog = pd.DataFrame(columns=["path", "name", "state", "method", "kind"])
+    for column in _INT_COLUMNS + ["n_plans", "total_n_reps"]:
+        if column in catalog.columns:
+            catalog[column] = catalog[column].astype("Int64")
+    catalog = catalog.sort_values("path").reset_index(drop=True)
+
+    if write and (todo or old is None or len(catalog) != len(old)):
+        # A unique temporary name, so that concurrent builds do not write to the
+        # same file; the last one to finish wins.
+        with tempfile.NamedTemporaryFile(
+            dir=catalog_file.parent,
+            prefix=catalog_file.name,
+            suffix=".tmp",
+            delete=False,
+        ) as tmp:
+            tmp_file = Path(tmp.name)
+        try:
+            catalog.to_parquet(tmp_file, index=False)
+            tmp_file.replace(catalog_file)
+        except BaseException:
+            tmp_file.unlink(missing_ok=True)
+            raise
+    return catalog
+
+
+def load_catalog(root, refresh=True, n_processes=None):
+    """
+    Loads the catalog of a processed data folder.
+
+    Parameters
+    ----------
+    root : str or Path
+        The processed data folder.
+    refresh : bool
+        Whether to rescan the folder for new or changed files first. If False,
+        the saved catalog is returned as is (and built if it does not exist).
+    n_processes : int, optional
+        The number of worker processes used for rescanning.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The catalog.
+    """
+    catalog_file = Path(root).joinpath(CATALOG_NAME)
+    if refresh or not catalog_file.exists():
+        return build_catalog(root, n_processes=n_processes)
+    return pd.read_parquet(catalog_file)
+
+
+def find_ensembles(catalog, name_pattern=None, **criteria):
+    """
+    Selects rows of the catalog.
+
+    Parameters
+    ----------
+    catalog : pandas.DataFrame
+        The catalog.
+    name_pattern : str, optional
+        A glob pattern the file name must match.
+    **criteria
+        Column values to match, e.g. `state="PA", kind="tallies"`. A list matches
+        any of its values.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The matching rows, sorted by path.
+    """
+    mask = np.ones(len(catalog), dtype=bool)
+    for column, value in criteria.items():
+        if column not in catalog.columns:
+            mask[:] = False
+        elif isinstance(value, (list, tuple, set)):
+            mask &= catalog[column].isin(list(value)).to_numpy(dtype=bool)
+        else:
+            mask &= (catalog[column] == value).fillna(False).to_numpy(dtype=bool)
+    if name_pattern is not None:
+        mask &= np.array(
+            [fnmatch.fnmatch(name, name_pattern) for name in catalog["name"]],
+            dtype=bool,
+        )
+    return catalog[mask].sort_values("path").reset_index(drop=True)
+
+
+def catalog_paths(root, catalog):
+    """
+    Returns the absolute paths of the files in a selection of the catalog.
+    """
+    root = Path(root).resolve()
+    return [root.joinpath(path) for path in catalog["path"]]
+
+
+def _partition_expression(row):
+    expression = None
+    for field in PARTITION_FIELDS:
+        value = row.get(field.name)
+        if pd.isna(value):
+            term = ds.field(field.name).is_null()
+        else:
+            term = ds.field(field.name) == pa.scalar(value, type=field.type)
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def ensemble_dataset(root, catalog=None, **criteria):
+    """
+    Builds a pyarrow dataset over the catalogued files that match the criteria.
+    Each file is a fragment with the partition fields `state`, `method`, `seed`
+    and `n_dists`, so filters on these fields skip whole files without reading
+    them.
+
+    Parameters
+    ----------
+    root : str or Path
+        The processed data folder.
+    catalog : pandas.DataFrame, optional
+        The catalog. Loaded with `load_catalog` if not given.
+    **criteria
+        Passed on to `find_ensembles`. Since files of different kinds have
+        different columns, a `kind` is usually given.
+
+    Returns
+    -------
+    pyarrow.dataset.FileSystemDataset
+        The dataset, with the union of the file schemas and the partition fields.
+    """
+    if catalog is None:
+        catalog = load_catalog(root)
+    selected = find_ensembles(catalog, **criteria)
+    paths = [str(path) for path in catalog_paths(root, selected)]
+    if not paths:
+        raise ValueError(f"No catalogued files match {criteria}")
+
+    file_schemas = [pq.read_schema(path).remove_metadata() for path in paths]
+    schema = pa.unify_schemas(file_schemas + [PARTITION_FIELDS])
+    partitions = [_partition_expression(row) for row in selected.to_dict("records")]
+    return ds.FileSystemDataset.from_paths(
+        paths,
+        schema=schema,
+        format=ds.ParquetFileFormat(),
+        filesystem=pa.fs.LocalFileSystem(),
+        partitions=partitions,
+    )
+
+
+@click.command()
+@click.argument(
+    "root",
+    type=click.Path(exists=True, file_okay=False),
+    default="hpc_files/hpc_processed_data",
+)
+@click.option("--n-processes", type=int, default=None)
+def main(root, n_processes):
+    catalog = build_catalog(root, n_processes=n_processes)
+    summary = catalog.groupby(["state", "method", "kind"], dropna=False).size()
+    print(summary.to_string())
+
+
+if __name__ == "__main__":
+    main()
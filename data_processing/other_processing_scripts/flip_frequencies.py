@@ -0,0 +1,371 @@
+"""
+Last Updated: 19-10-2026
+
+This script is a vectorized replacement for `ben-tally -m changed-assignments`. It
+counts how many times each node changes district over the start of a chain, for
+several windows at once, in a single pass over a BEN file or an assignment store.
+Windows can either be given in accepted plans (as `--max-accepted` is in
+`ben-tally`) or in proposed steps.
+
+As in `ben-tally`, the labels of the two districts that were merged and re-split in
+each move are swapped with probability 1/2 (and the swap is carried forward to all
+later plans), since the MCMC codes have a preferred way of labelling the new
+districts which would otherwise bias the counts. Only this permutation is tracked
+plan by plan; applying it and comparing consecutive plans is done for whole blocks.
+
+The output is a parquet file with one row per node and one column of raw change
+counts per window. The number of possible changes for each window is stored in the
+file metadata under the key `rrc_flip_windows`, and `read_flip_frequencies` uses it
+to return normalized frequencies that match the `--normalize` output of
+`ben-tally`. With `--heatmap-dir`, the normalized frequencies of each window are
+also written as the binary node values files read by the heatmap scripts.
+"""
+
+import json
+from pathlib import Path
+
+import click
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+from assignment_store import open_store
+from ben_reader import iter_ben_batches
+
+WINDOWS_KEY = b"rrc_flip_windows"
+NODE_VALUES_KEY = b"rrc_node_values"
+
+
+def window_name(kind, size):
+    """
+    Returns the column name used for a window, e.g. "accept_50000" or
+    "step_1000000".
+    """
+    return f"{kind}_{size}"
+
+
+def _iter_blocks(source, block_size):
+    """
+    Iterates over (assignments, n_reps) blocks of a BEN file or assignment store.
+    """
+    source = Path(source)
+    if source.is_dir():
+        assignments, plans = open_store(source, columns=["n_reps"])
+        n_reps = plans["n_reps"].to_numpy()
+        for start in range(0, len(assignments), block_size):
+            yield (
+                np.asarray(assignments[start : start + block_size]),
+                n_reps[start : start + block_size],
+            )
+    else:
+        yield from iter_ben_batches(source, batch_size=block_size)
+
+
+def _block_permutations(block, prev_raw, perm, flips):
+    """
+    Computes the label permutation applied to each plan of a block. For every move
+    whose coin flip came up, the labels of the first node that changed district
+    are swapped in the running permutation.
+    """
+    diff = block != np.vstack([prev_raw[None, :], block[:-1]])
+    moved = diff.any(axis=1)
+    first = diff.argmax(axis=1)
+
+    perms = np.empty((len(block), len(perm)), dtype=perm.dtype)
+    for i in range(len(block)):
+        if moved[i] and flips[i]:
+            node = first[i]
+            prev = prev_raw if i == 0 else block[i - 1]
+            a = perm[prev[node]]
+            b = perm[block[i, node]]
+            perm = np.where(perm == a, b, np.where(perm == b, a, perm))
+        perms[i] = perm
+    return perms
+
+
+def flip_frequencies(
+    source,
+    out_file,
+    accepted_windows=(),
+    step_windows=(),
+    block_size=10_000,
+    random_relabel=True,
+    seed=None,
+):
+    """
+    Counts the number of times each node changes district within several windows
+    at the start of a chain and writes the counts to a parquet file.
+
+    Parameters
+    ----------
+    source : str or Path
+        A `.jsonl.ben` file or an assignment store directory.
+    out_file : str or Path
+        The path of the parquet file to write.
+    accepted_windows : list[int]
+        Windows given as a number of accepted plans.
+    step_windows : list[int]
+        Windows given as a number of proposed steps.
+    block_size : int
+        The number of plans decoded at once.
+    random_relabel : bool
+        Whether to randomly swap the labels of the merged and re-split districts
+        (the default behavior of `ben-tally`). Turn this off for methods that do
+        not use merge-split moves.
+    seed : int, optional
+        The seed for the relabelling coin flips.
+
+    Returns
+    -------
+    None
+    """
+    windows = [("accept", int(w)) for w in sorted(set(accepted_windows))]
+    windows += [("step", int(w)) for w in sorted(set(step_windows))]
+    if not windows:
+        raise ValueError("At least one window must be given")
+    max_accepted = max((w for kind, w in windows if kind == "accept"), default=0)
+    max_step = max((w for kind, w in windows if kind == "step"), default=0)
+
+    rng = np.random.default_rng(seed)
+    counts = None
+    n_plans = {window: 0 for window in windows}
+    last_step = {window: 0 for window in windows}
+
+    prev_raw = None
+    prev_permuted = None
+    perm = None
+    accepted = 1
+    step = 1
+    pbar = tqdm(desc="Plans")
+    for block, n_reps in _iter_blocks(source, block_size):
+        block = block.astype(np.int64)
+        n_reps = np.asarray(n_reps, dtype=np.int64)
+        if counts is None:
+            counts = {window: np.zeros(block.shape[1], np.int64) for window in windows}
+            perm = np.arange(block.max() + 1)
+            prev_raw = block[0]
+            prev_permuted = block[0]
+        if block.max() >= len(perm):
+            raise ValueError(
+                f"Found district label {block.max()} but expected labels below "
+                f"{len(perm)}"
+            )
+
+        flips = rng.random(len(block)) < 0.5 if random_relabel else np.zeros(len(block))
+        perms = _block_permutations(block, prev_raw, perm, flips)
+        permuted = np.take_along_axis(perms, block, axis=1)
+        changed = permuted != np.vstack([prev_permuted[None, :], permuted[:-1]])
+
+        acc = np.arange(accepted, accepted + len(block))
+        steps = step + np.concatenate([[0], np.cumsum(n_reps)[:-1]])
+
+        # Every window includes a prefix of the block, so the windows are visited
+        # in order of that prefix and the segment sums are accumulated.
+        ends = {
+            window: int(
+                np.searchsorted(
+                    acc if window[0] == "accept" else steps, window[1], "right"
+                )
+            )
+            for window in windows
+        }
+        running = np.zeros(block.shape[1], np.int64)
+        start = 0
+        for window in sorted(windows, key=ends.get):
+            end = ends[window]
+            running += changed[start:end].sum(axis=0)
+            start = end
+            counts[window] += running
+            if end > 0:
+                n_plans[window] += end
+                last_step[window] = int(steps[end - 1] + n_reps[end - 1] - 1)
+
+        prev_raw = block[-1]
+        prev_permuted = permuted[-1]
+        perm = perms[-1]
+        accepted += len(block)
+        step += int(n_reps.sum())
+        pbar.update(len(block))
+        if accepted > max_accepted and step > max_step:
+            break
+    pbar.close()
+
+    if counts is None:
+        raise ValueError(f"No plans found in {source}")
+
+    metadata = []
+    for kind, size in windows:
+        if kind == "accept":
+            n_transitions = n_plans[(kind, size)] - 1
+        else:
+            n_transitions = min(size, last_step[(kind, size)]) - 1
+        metadata.append(
+            {
+                "name": window_name(kind, size),
+                "kind": kind,
+                "size": size,
+                "n_plans": n_plans[(kind, size)],
+                "n_transitions": n_transitions,
+            }
+        )
+
+    columns = {"node": np.arange(len(prev_raw), dtype=np.int32)}
+    for kind, size in windows:
+        columns[window_name(kind, size)] = counts[(kind, size)]
+    table = pa.table(columns)
+    table = table.replace_schema_metadata({WINDOWS_KEY: json.dumps(metadata)})
+    pq.write_table(table, out_file, compression="zstd")
+
+
+def read_flip_frequencies(file, normalize=True):
+    """
+    Reads a file written by `flip_frequencies`.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the flip frequency parquet file.
+    normalize : bool
+        Whether to divide each count by the number of possible changes in its
+        window (i.e. one less than the number of accepted plans or proposed steps).
+
+    Returns
+    -------
+    (pandas.DataFrame, dict):
+        The per-node counts or frequencies (one column per window, indexed by
+        node) and the window metadata keyed by column name.
+    """
+    table = pq.read_table(file)
+    windows = {w["name"]: w for w in json.loads(table.schema.metadata[WINDOWS_KEY])}
+    df = table.to_pandas().set_index("node")
+    if normalize:
+        df = df.astype(np.float64)
+        for name, window in windows.items():
+            df[name] /= max(window["n_transitions"], 1)
+    return df, windows
+
+
+def write_heatmap_files(flip_file, out_dir, name):
+    """
+    Writes the normalized frequencies of each window of a flip frequency file as
+    a separate node values file in the format read by
+    `figure_scripts/helper_files/node_values.py`. The files are named like the
+    text files written by `ben-tally`, e.g.
+    `<name>_accept_50000_changed_assignments.parquet`.
+
+    Parameters
+    ----------
+    flip_file : str or Path
+        The path to the flip frequency parquet file.
+    out_dir : str or Path
+        The directory to write the node values files to.
+    name : str
+        The base name of the ensemble.
+
+    Returns
+    -------
+    list[Path]
+        The files that were written.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    df, windows = read_flip_frequencies(flip_file)
+
+    out_files = []
+    for column, window in windows.items():
+        values = df[column].to_numpy()
+        metadata = {
+            "source": Path(flip_file).name,
+            "window": window,
+            "n_nodes": len(values),
+            "min": float(values.min()),
+            "max": float(values.max()),
+        }
+        if window["kind"] == "accept":
+            metadata["total_accepted"] = window["n_plans"]
+        table = pa.table({"value": values})
+        table = table.replace_schema_metadata({NODE_VALUES_KEY: json.dumps(metadata)})
+
+        out_file = out_dir.joinpath(f"{name}_{column}_changed_assignments.parquet")
+        pq.write_table(table, out_file)
+        out_files.append(out_file)
+    return out_files
+
+
+@click.command()
+@click.option(
+    "-b",
+    "--source",
+    type=click.Path(exists=True),
+    required=True,
+    help="The BEN file or assignment store to process.",
+)
+@click.option(
+    "-a",
+    "--accepted",
+    type=int,
+    multiple=True,
+    help="A window size in accepted plans (may be repeated).",
+)
+@click.option(
+    "-s",
+    "--steps",
+    type=int,
+    multiple=True,
+    help="A window size in proposed steps (may be repeated).",
+)
+@click.option(
+    "-o",
+    "--out-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Output file. Defaults to <source>_flip_frequencies.parquet.",
+)
+@click.option("--block-size", type=int, default=10_000, show_default=True)
+@click.option(
+    "--random-relabel/--no-random-relabel",
+    default=True,
+    show_default=True,
+    help="Randomly swap the labels of merged and re-split districts.",
+)
+@click.option("--seed", type=int, default=None)
+@click.option(
+    "--heatmap-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Also write one heatmap node values file per window to this directory.",
+)
+def main(
+    source, accepted, steps, out_file, block_size, random_relabel, seed, heatmap_dir
+):
+    if not accepted and not steps:
+        accepted = (10_000, 50_000, 1_000_000)
+
+    source_path = Path(source).resolve()
+    name = source_path.name
+    if name.endswith(".jsonl.ben"):
+        name = name[: -len(".jsonl.ben")]
+    elif name.endswith("_store"):
+        name = name[: -len("_store")]
+    if out_file is None:
+        out_file = source_path.with_name(f"{name}_flip_frequencies.parquet")
+
+    flip_frequencies(
+        source,
+        out_file,
+        accepted_windows=accepted,
+        step_windows=steps,
+        block_size=block_size,
+        random_relabel=random_relabel,
+        seed=seed,
+    )
+    print(f"Wrote flip frequencies to {out_file}")
+
+    if heatmap_dir is not None:
+        for file in write_heatmap_files(out_file, heatmap_dir, name):
+            print(f"Wrote heatmap values to {file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains a compiled, memory-mappable cache for dual graphs so that large
+graphs (e.g. the PA and VA precinct graphs) do not have to be re-parsed from JSON
+or rebuilt from a shapefile on every run.
+
+The first time a graph is loaded, it is compiled into a single file next to the
+source, `<source>.rrcgraph`, laid out as
+
+    magic       : b"RRCGRAPH"
+    header_len  : u64 (little endian)
+    header      : JSON describing every array (dtype, shape and byte offset) along
+                  with the size, mtime and SHA-256 hash of the source file
+    arrays      : the raw arrays, each aligned to 64 bytes
+
+The arrays are the edge endpoints, the CSR adjacency (`indptr`, `indices` and the
+matching `edge_ids`), and one typed column per node and edge attribute. Loading
+the cache memory maps every array, so only the columns that are used are read. The
+cache is rebuilt whenever the hash of the source changes; the hash is only
+recomputed when the size or mtime of the source differ from the cached values.
+
+The figure helpers and `other_data_files/script_files/smc_wasserstein.py` import
+this module from here by adding this folder to `sys.path`.
+"""
+
+import hashlib
+import json
+import struct
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"RRCGRAPH"
+CACHE_SUFFIX = ".rrcgraph"
+FORMAT_VERSION = 1
+_ALIGNMENT = 64
+_header_len = struct.Struct("<Q")
+
+
+class CompiledGraph:
+    """
+    A dual graph stored as arrays.
+
+    Attributes
+    ----------
+    n_nodes : int
+        The number of nodes.
+    edges : numpy.ndarray
+        The (edges x 2) edge endpoints (by node position) with `u < v`.
+    indptr, indices, edge_ids : numpy.ndarray
+        The CSR adjacency. The neighbors of node `i` are
+        `indices[indptr[i]:indptr[i + 1]]` and the matching edges are
+        `edge_ids[indptr[i]:indptr[i + 1]]`.
+    node_columns : dict[str, numpy.ndarray]
+        The node attributes, one array per key.
+    edge_columns : dict[str, numpy.ndarray]
+        The edge attributes, one array per key (in the order of `edges`).
+    """
+
+    def __init__(self, arrays, header):
+        self.header = header
+        self.n_nodes = header["n_nodes"]
+        self.edges = arrays["edges"]
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.edge_ids = arrays["edge_ids"]
+        self.node_columns = {
+            key[len("node/") :]: value
+            for key, value in arrays.items()
+            if key.startswith("node/")
+        }
+        self.edge_columns = {
+            key[len("edge/") :]: value
+            for key, value in arrays.items()
+            if key.startswith("edge/")
+        }
+
+    def node_attribute(self, key, dtype=None):
+        """
+        Returns a node attribute as an array, optionally converted to `dtype`.
+        """
+        values = self.node_columns[key]
+        return values if dtype is None else values.astype(dtype)
+
+    def to_networkx(self):
+        """
+        Builds a networkx graph with the same nodes, edges and attributes.
+        """
+        import networkx as nx
+
+        graph = nx.Graph()
+        node_ids = self.node_columns.get("id", np.arange(self.n_nodes))
+        for i in range(self.n_nodes):
+            graph.add_node(
+                _to_python(node_ids[i]),
+                **{k: _to_python(v[i]) for k, v in self.node_columns.items()},
+            )
+        for e, (u, v) in enumerate(self.edges):
+            graph.add_edge(
+                _to_python(node_ids[u]),
+                _to_python(node_ids[v]),
+                **{k: _to_python(col[e]) for k, col in self.edge_columns.items()},
+            )
+        return graph
+
+
+def _to_python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def cache_path(source):
+    """
+    Returns the path of the compiled cache for a JSON dual graph or shapefile.
+
+    Parameters
+    ----------
+    source : str or Path
+        The path to the JSON dual graph, `.shp` file, or directory holding a
+        single `.shp` file.
+
+    Returns
+    -------
+    Path
+        The path to `<source>.rrcgraph`.
+    """
+    source = _resolve_source(source)
+    return source.with_name(source.name + CACHE_SUFFIX)
+
+
+def _resolve_source(source):
+    source = Path(source)
+    if source.is_dir():
+        shp_files = sorted(source.glob("*.shp"))
+        if len(shp_files) != 1:
+            raise ValueError(f"Expected a single .shp file in {source}")
+        source = shp_files[0]
+    return source
+
+
+def _file_hash(file):
+    sha = hashlib.sha256()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _typed_column(values):
+    """
+    Converts a list of attribute values into the narrowest fitting typed array.
+    Numbers become int64 or float64 (with NaN for missing values), booleans become
+    bool, and everything else becomes a fixed-width unicode array.
+    """
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present):
+        if len(present) == len(values):
+            return np.array(values, dtype=bool)
+    elif present and all(
+        isinstance(v, (int, float)) and not isinstance(v, bool) for v in present
+    ):
+        if len(present) == len(values) and all(isinstance(v, int) for v in present):
+            if all(-(2**63) <= v < 2**63 for v in present):
+                return np.array(values, dtype=np.int64)
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return np.array(
+        [
+            "" if v is None else v if isinstance(v, str) else json.dumps(v)
+            for v in values
+        ],
+        dtype=str,
+    )
+
+
+def _attribute_columns(records, prefix):
+    keys = {}
+    for record in records:
+        keys.update(dict.fromkeys(record))
+    return {
+        f"{prefix}/{key}": _typed_column([record.get(key) for record in records])
+        for key in keys
+    }
+
+
+def _csr(n_nodes, edges):
+    """
+    Builds the CSR adjacency of an undirected graph from its edge list.
+    """
+    ends = np.concatenate([edges[:, 0], edges[:, 1]])
+    others = np.concatenate([edges[:, 1], edges[:, 0]])
+    edge_ids = np.concatenate([np.arange(len(edges))] * 2)
+    order = np.lexsort((others, ends))
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(ends, minlength=n_nodes))])
+    return (
+        indptr.astype(np.int64),
+        others[order].astype(np.int64),
+        edge_ids[order].astype(np.int64),
+    )
+
+
+def _arrays_from_json(json_file):
+    with open(json_file, "r") as f:
+        graph = json.load(f)
+
+    nodes = graph["nodes"]
+    position = {node["id"]: i for i, node in enumerate(nodes)}
+    edge_attrs = {}
+    for u, neighbors in enumerate(graph["adjacency"]):
+        for neighbor in neighbors:
+            v = position[neighbor["id"]]
+            if u == v:
+                continue
+            edge = (min(u, v), max(u, v))
+            if edge not in edge_attrs:
+                edge_attrs[edge] = {k: x for k, x in neighbor.items() if k != "id"}
+
+    edge_list = sorted(edge_attrs)
+    edges = np.array(edge_list, dtype=np.int64).reshape(-1, 2)
+    arrays = {"edges": edges}
+    arrays.update(_attribute_columns(nodes, "node"))
+    arrays.update(_attribute_columns([edge_attrs[e] for e in edge_list], "edge"))
+    return len(nodes), arrays
+
+
+def _arrays_from_shapefile(shapefile):
+    """
+    Builds the rook adjacency of a shapefile (two units are adjacent when their
+    boundaries share a segment of positive length), as in
+    `gerrychain.Graph.from_geodataframe`.
+    """
+    import geopandas as gpd
+    import shapely
+
+    gdf = gpd.read_file(shapefile)
+    geometries = gdf.geometry.values
+    left, right = gdf.sindex.query(geometries, predicate="intersects")
+    keep = left < right
+    left, right = left[keep], right[keep]
+    shared = shapely.length(
+        shapely.intersection(
+            shapely.boundary(geometries[left]), shapely.boundary(geometries[right])
+        )
+    )
+    adjacent = shared > 0
+
+    edges = np.column_stack([left[adjacent], right[adjacent]]).astype(np.int64)
+    order = np.lexsort((edges[:, 1], edges[:, 0]))
+    edges = edges[order]
+
+    records = gdf.drop(columns=gdf.geometry.name).to_dict("records")
+    records = [
+        {k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in r.items()}
+        for r in records
+    ]
+    arrays = {"edges": edges}
+    arrays.update(_attribute_columns(records, "node"))
+    arrays["edge/shared_perim"] = shared[adjacent][order].astype(np.float64)
+    return len(gdf), arrays
+
+
+def build_graph_cache(source):
+    """
+    Compiles a JSON dual graph or shapefile and writes the cache next to it.
+
+    Parameters
+    ----------
+    source : str or Path
+        The path to the JSON dual graph, `.shp` file, or directory holding a
+        single `.shp` file.
+
+    Returns
+    -------
+    Path
+        The path to the cache file.
+    """
+    source = _resolve_source(source)
+    if source.suffix == ".shp":
+        n_nodes, arrays = _arrays_from_shapefile(source)
+    else:
+        n_nodes, arrays = _arrays_from_json(source)
+    arrays["indptr"], arrays["indices"], arrays["edge_ids"] = _csr(
+        n_nodes, arrays["edges"]
+    )
+
+    stat = source.stat()
+    header = {
+        "version": FORMAT_VERSION,
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime,
+        "source_sha256": _file_hash(source),
+        "n_nodes": n_nodes,
+        "arrays": {},
+    }
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        header["arrays"][name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(len(MAGIC) + _header_len.size + len(header_bytes)) // _ALIGNMENT)
+    data_start *= _ALIGNMENT
+    header_bytes = header_bytes.ljust(data_start - len(MAGIC) - _header_len.size, b" ")
+
+    out_file = cache_path(source)
+    # A unique temporary name, so that processes building the same cache at once
+    # do not write into the same file; the last one to finish wins.
+    with tempfile.NamedTemporaryFile(
+        dir=out_file.parent, prefix=out_file.name, suffix=".tmp", delete=False
+    ) as tmp:
+        tmp_file = Path(tmp.name)
+    try:
+        with open(tmp_file, "wb") as f:
+            f.write(MAGIC)
+            f.write(_header_len.pack(len(header_bytes)))
+            f.write(header_bytes)
+            for name, array in arrays.items():
+                f.seek(data_start + header["arrays"][name]["offset"])
+                f.write(array.tobytes())
+        tmp_file.replace(out_file)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+    return out_file
+
+
+def _read_header(cache_file):
+    with open(cache_file, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{cache_file} is not a compiled graph cache")
+        (length,) = _header_len.unpack(f.read(_header_len.size))
+        header = json.loads(f.read(length))
+    return header, len(MAGIC) + _header_len.size + length
+
+
+def _cache_is_current(source, header):
+    if header.get("version") != FORMAT_VERSION:
+        return False
+    stat = source.stat()
+    if (
+        header["source_size"] == stat.st_size
+        and header["source_mtime"] == stat.st_mtime
+    ):
+        return True
+    return header["source_sha256"] == _file_hash(source)
+
+
+def _refresh_source_stat(cache_file, header, source):
+    """
+    Records the current size and mtime of an unchanged source in the cache header,
+    so that its hash is not recomputed on every load after e.g. a fresh checkout.
+    The header is rewritten in place within its padding, or the cache is rebuilt
+    if it no longer fits.
+    """
+    stat = source.stat()
+    header = dict(header, source_size=stat.st_size, source_mtime=stat.st_mtime)
+    header_bytes = json.dumps(header).encode()
+    with open(cache_file, "r+b") as f:
+        f.seek(len(MAGIC))
+        (length,) = _header_len.unpack(f.read(_header_len.size))
+        if len(header_bytes) <= length:
+            f.write(header_bytes.ljust(length, b" "))
+            return
+    build_graph_cache(source)
+
+
+def load_graph(source):
+    """
+    Loads a dual graph from its compiled cache, compiling it first if the cache
+    is missing or out of date.
+
+    Parameters
+    ----------
+    source : str or Path
+        The path to the JSON dual graph, `.shp` file, or directory holding a
+        single `.shp` file.
+
+    Returns
+    -------
+    CompiledGraph
+        The graph with every array memory mapped from the cache.
+    """
+    source = _resolve_source(source)
+    cache_file = cache_path(source)
+    header = None
+    if cache_file.exists():
+        header, data_start = _read_header(cache_file)
+        if not _cache_is_current(source, header):
+            header = None
+        elif (header["source_size"], header["source_mtime"]) != (
+            source.stat().st_size,
+            source.stat().st_mtime,
+        ):
+            _refresh_source_stat(cache_file, header, source)
+            header, data_start = _read_header(cache_file)
+    if header is None:
+        build_graph_cache(source)
+        header, data_start = _read_header(cache_file)
+
+    arrays = {}
+    for name, info in header["arrays"].items():
+        shape = tuple(info["shape"])
+        if np.prod(shape) == 0:
+            arrays[name] = np.empty(shape, dtype=np.dtype(info["dtype"]))
+            continue
+        arrays[name] = np.memmap(
+            cache_file,
+            dtype=np.dtype(info["dtype"]),
+            mode="r",
+            offset=data_start + info["offset"],
+            shape=shape,
+        )
+    return CompiledGraph(arrays, header)
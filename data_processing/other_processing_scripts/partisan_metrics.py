@@ -0,0 +1,498 @@
+"""
+Last Updated: 19-10-2026
+
+This script computes partisan metrics for every plan of a set of tallies files in a
+single pass over each file. For every (Democratic key, Republican key) election
+pair it computes, per plan,
+
+    seats           : the number of districts with more Democratic than Republican
+                      votes
+    dem_share       : the statewide Democratic share of the two-party vote
+    efficiency_gap  : (Republican wasted votes - Democratic wasted votes) / total
+                      votes, so positive values favor the Democrats
+    mean_median     : the median minus the mean of the Democratic district shares
+    partisan_bias   : the fraction of districts where the Democratic share is
+                      above the mean district share, minus 1/2
+
+following the conventions of `gerrychain.metrics.partisan` with the Democrats as
+the first party. Both the long-format files written by `ben-tally -m tally-keys`
+and the wide files written by `compact_tallies.py` can be read, and only the
+columns of the requested keys are decoded.
+
+The files are processed in parallel and the output is a tidy parquet file with one
+row per (file, plan, election) along with the `n_reps` weight of each plan, and a
+summary parquet file with the `n_reps`-weighted mean and standard deviation of every
+metric and the weighted seat distribution of every (file, election) pair. Reports
+that only need the weighted summaries can use `load_summaries`, which keeps them in
+a summary store keyed by the path, size and mtime of each file.
+
+The PA report scripts and `cli_files/rrc.py` import this module from here by
+adding this folder to `sys.path`.
+"""
+
+import re
+import tempfile
+from functools import partial
+from multiprocessing import Pool
+from pathlib import Path
+
+import click
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+_district_pattern = re.compile(r"^district_(\d+)$")
+
+
+def seats(dem, rep):
+    """
+    Returns the number of districts won by the Democrats in each plan.
+    """
+    return (dem > rep).sum(axis=1)
+
+
+def dem_share(dem, rep):
+    """
+    Returns the statewide Democratic share of the two-party vote in each plan.
+    """
+    dem_total = dem.sum(axis=1)
+    return dem_total / (dem_total + rep.sum(axis=1))
+
+
+def efficiency_gap(dem, rep):
+    """
+    Returns the efficiency gap of each plan. A vote is wasted if it is cast for the
+    losing party or for the winning party beyond half of the votes in the district.
+    """
+    total = dem + rep
+    dem_wins = dem > rep
+    dem_wasted = np.where(dem_wins, dem - total / 2, dem)
+    rep_wasted = np.where(dem_wins, rep, rep - total / 2)
+    return (rep_wasted - dem_wasted).sum(axis=1) / total.sum(axis=1)
+
+
+def mean_median(dem, rep):
+    """
+    Returns the median minus the mean of the Democratic district shares of each
+    plan.
+    """
+    shares = dem / (dem + rep)
+    return np.median(shares, axis=1) - shares.mean(axis=1)
+
+
+def partisan_bias(dem, rep):
+    """
+    Returns the fraction of districts of each plan with a Democratic share above
+    the mean district share, minus 1/2.
+    """
+    shares = dem / (dem + rep)
+    above_mean = shares > shares.mean(axis=1, keepdims=True)
+    return above_mean.mean(axis=1) - 0.5
+
+
+METRICS = {
+    "seats": seats,
+    "dem_share": dem_share,
+    "efficiency_gap": efficiency_gap,
+    "mean_median": mean_median,
+    "partisan_bias": partisan_bias,
+}
+
+
+def _district_columns(names, prefix, pattern):
+    found = []
+    for name in names:
+        if name.startswith(prefix):
+            match = pattern.match(name[len(prefix) :])
+            if match is not None:
+                found.append((int(match.group(1)), name))
+    return [name for _, name in sorted(found)]
+
+
+def read_election_tallies(file, elections):
+    """
+    Reads the district tallies of the given keys from a long or wide tallies file.
+
+    Parameters
+    ----------
+    file : str or Path
+        The tallies file.
+    elections : list[(str, str)]
+        The (Democratic key, Republican key) pairs.
+
+    Returns
+    -------
+    (pandas.DataFrame, dict[str, numpy.ndarray]):
+        The `step`, `accepted_count` and `n_reps` of each plan (in accepted order)
+        and a (plans x districts) array of tallies for every key.
+    """
+    keys = sorted({key for pair in elections for key in pair})
+    names = pq.read_schema(file).names
+
+    if "sum_columns" not in names:
+        columns = ["step", "accepted_count", "n_reps"]
+        key_columns = {
+            key: _district_columns(names, f"{key}_", re.compile(r"^d(\d+)$"))
+            for key in keys
+        }
+        for key, cols in key_columns.items():
+            if not cols:
+                raise ValueError(f"{file} has no columns for the key {key}")
+        table = pq.read_table(
+            file, columns=columns + [c for cols in key_columns.values() for c in cols]
+        )
+        plans = table.select(columns).to_pandas()
+        tallies = {
+            key: np.column_stack(
+                [table.column(c).to_numpy().astype(np.float64) for c in cols]
+            )
+            for key, cols in key_columns.items()
+        }
+        return plans, tallies
+
+    district_cols = _district_columns(names, "", _district_pattern)
+    table = pq.read_table(
+        file,
+        columns=["step", "accepted_count", "n_reps", "sum_columns"] + district_cols,
+        filters=[("sum_columns", "in", keys)],
+    )
+    acc = table.column("accepted_count").to_numpy()
+    plan_acc, first_row, plan_idx = np.unique(
+        acc, return_index=True, return_inverse=True
+    )
+    values = np.column_stack(
+        [table.column(c).to_numpy().astype(np.float64) for c in district_cols]
+    )
+    row_keys = table.column("sum_columns")
+    tallies = {}
+    for key in keys:
+        mask = pc.equal(row_keys, key).to_numpy(zero_copy_only=False)
+        if mask.sum() != len(plan_acc):
+            raise ValueError(f"{file} does not have one row of {key} for every plan")
+        key_values = np.empty((len(plan_acc), len(district_cols)))
+        key_values[plan_idx[mask]] = values[mask]
+        tallies[key] = key_values
+
+    plans = pd.DataFrame(
+        {
+            "step": table.column("step").to_numpy()[first_row],
+            "accepted_count": plan_acc,
+            "n_reps": table.column("n_reps").to_numpy()[first_row],
+        }
+    )
+    return plans, tallies
+
+
+def plan_metrics(file, elections, metrics=tuple(METRICS)):
+    """
+    Computes the requested metrics for every plan and election of a tallies file.
+
+    Parameters
+    ----------
+    file : str or Path
+        The tallies file.
+    elections : list[(str, str)]
+        The (Democratic key, Republican key) pairs.
+    metrics : list[str]
+        The metrics to compute (see `METRICS`).
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per (plan, election) with the columns `file`, `step`,
+        `accepted_count`, `n_reps`, `dem_key`, `rep_key` and one column per metric.
+    """
+    plans, tallies = read_election_tallies(file, elections)
+    frames = []
+    for dem_key, rep_key in elections:
+        dem, rep = tallies[dem_key], tallies[rep_key]
+        frame = plans.copy()
+        frame.insert(0, "file", Path(file).name)
+        frame["dem_key"] = dem_key
+        frame["rep_key"] = rep_key
+        for metric in metrics:
+            frame[metric] = METRICS[metric](dem, rep)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def weighted_summary(plans, metrics=tuple(METRICS)):
+    """
+    Summarizes the per-plan metrics of each (file, election) pair, weighting every
+    plan by its `n_reps`.
+
+    Parameters
+    ----------
+    plans : pandas.DataFrame
+        The output of `plan_metrics`.
+    metrics : list[str]
+        The metric columns to summarize.
+
+    Returns
+    -------
+    (pandas.DataFrame, pandas.DataFrame):
+        The summary, with one row per (file, election, metric) and the columns
+        `n_plans`, `n_steps`, `mean` and `std`, and the seat distribution, with one
+        row per (file, election, seats) and the fraction of steps in `weight`.
+    """
+    metrics = [metric for metric in metrics if metric in plans.columns]
+    group_keys = ["file", "dem_key", "rep_key"]
+    rows = []
+    distributions = []
+    for group, frame in plans.groupby(group_keys, sort=False, observed=True):
+        weights = frame["n_reps"].to_numpy(dtype=np.float64)
+        total = weights.sum()
+        for metric in metrics:
+            values = frame[metric].to_numpy(dtype=np.float64)
+            mean = np.dot(weights, values) / total
+            variance = np.dot(weights, (values - mean) ** 2) / total
+            rows.append(
+                (*group, metric, len(frame), int(total), mean, np.sqrt(variance))
+            )
+        if "seats" in metrics:
+            counts = frame["seats"].to_numpy()
+            seat_weights = np.bincount(counts, weights=weights) / total
+            for n_seats in np.flatnonzero(seat_weights):
+                distributions.append((*group, int(n_seats), seat_weights[n_seats]))
+
+    summary = pd.DataFrame(
+        rows, columns=group_keys + ["metric", "n_plans", "n_steps", "mean", "std"]
+    )
+    seat_distribution = pd.DataFrame(
+        distributions, columns=group_keys + ["seats", "weight"]
+    )
+    return summary, seat_distribution
+
+
+def ensemble_metrics(files, elections, metrics=tuple(METRICS), n_processes=None):
+    """
+    Computes the per-plan metrics of several tallies files in parallel.
+
+    Parameters
+    ----------
+    files : list[str or Path]
+        The tallies files.
+    elections : list[(str, str)]
+        The (Democratic key, Republican key) pairs.
+    metrics : list[str]
+        The metrics to compute (see `METRICS`).
+    n_processes : int, optional
+        The number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The per-plan metrics of every file (see `plan_metrics`).
+    """
+    process_fn = partial(plan_metrics, elections=elections, metrics=list(metrics))
+    with Pool(processes=n_processes) as pool:
+        frames = list(
+            tqdm(
+                pool.imap(process_fn, [str(file) for file in files]),
+                total=len(files),
+                desc="Computing metrics",
+            )
+        )
+    plans = pd.concat(frames, ignore_index=True)
+    plans["file"] = plans["file"].astype("category")
+    return plans
+
+
+# The columns of the summary store and of `load_summaries`.
+SUMMARY_COLUMNS = [
+    "path",
+    "source_size",
+    "source_mtime",
+    "file",
+    "dem_key",
+    "rep_key",
+    "metric",
+    "n_plans",
+    "n_steps",
+    "mean",
+    "std",
+]
+
+
+def _file_summary(file, elections, metrics):
+    """
+    Computes the weighted summary of a single file for the summary store.
+    """
+    file = Path(file)
+    stat = file.stat()
+    summary, _ = weighted_summary(plan_metrics(file, elections, metrics), metrics)
+    summary.insert(0, "path", str(file))
+    summary.insert(1, "source_size", stat.st_size)
+    summary.insert(2, "source_mtime", stat.st_mtime)
+    return summary
+
+
+def load_summaries(
+    files, elections, metrics=tuple(METRICS), store_file=None, n_processes=None
+):
+    """
+    Returns the weighted summaries (see `weighted_summary`) of several tallies
+    files, reading them from a summary store when possible.
+
+    The store is a small parquet file with one row per (path, election, metric)
+    that also records the size and mtime of each tallies file. Summaries that are
+    missing from the store, or whose file has changed since they were computed,
+    are computed in parallel and written back to the store, so once the store is
+    filled the cost of a report is a single read of the store.
+
+    Parameters
+    ----------
+    files : list[str or Path]
+        The tallies files.
+    elections : list[(str, str)]
+        The (Democratic key, Republican key) pairs.
+    metrics : list[str]
+        The metrics to summarize (see `METRICS`).
+    store_file : str or Path, optional
+        The summary store. If None, nothing is stored and every summary is
+        computed.
+    n_processes : int, optional
+        The number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The summary of every requested (file, election, metric) with the columns
+        `path`, `source_size`, `source_mtime`, `file`, `dem_key`, `rep_key`,
+        `metric`, `n_plans`, `n_steps`, `mean` and `std`.
+    """
+    files = [Path(file).resolve() for file in files]
+    elections = [tuple(pair) for pair in elections]
+    metrics = list(metrics)
+    key_columns = ["path", "dem_key", "rep_key", "metric"]
+
+    store = None
+    if store_file is not None and Path(store_file).exists():
+        store = pd.read_parquet(store_file)
+        stats = {str(file): file.stat() for file in files}
+        stale = [
+            path in stats
+            and (size != stats[path].st_size or mtime != stats[path].st_mtime)
+            for path, size, mtime in zip(
+                store["path"], store["source_size"], store["source_mtime"]
+            )
+        ]
+        store = store[~np.array(stale, dtype=bool)]
+
+    wanted = {
+        (str(file), dem_key, rep_key, metric)
+        for file in files
+        for dem_key, rep_key in elections
+        for metric in metrics
+    }
+    stored = (
+        set()
+        if store is None
+        else set(store[key_columns].itertuples(index=False, name=None))
+    )
+    todo = sorted({key[0] for key in wanted - stored})
+
+    if todo:
+        process_fn = partial(_file_summary, elections=elections, metrics=metrics)
+        with Pool(processes=n_processes) as pool:
+            computed = list(
+                tqdm(
+                    pool.imap(process_fn, todo),
+                    total=len(todo),
+                    desc="Summarizing files",
+                )
+            )
+        store = pd.concat(
+            ([] if store is None else [store]) + computed, ignore_index=True
+        ).drop_duplicates(subset=key_columns, keep="last")
+        if store_file is not None:
+            # A unique temporary name, so that reports running at the same time
+            # do not write to the same file; the last one to finish wins.
+            store_file = Path(store_file)
+            with tempfile.NamedTemporaryFile(
+                dir=store_file.parent,
+                prefix=store_file.name,
+                suffix=".tmp",
+                delete=False,
+            ) as tmp:
+                tmp_file = Path(tmp.name)
+            try:
+                store.to_parquet(tmp_file, index=False)
+                tmp_file.replace(store_file)
+            except BaseException:
+                tmp_file.unlink(missing_ok=True)
+                raise
+
+    if store is None:
+        # Nothing was requested and there is no store to read.
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    in_request = [
+        key in wanted for key in store[key_columns].itertuples(index=False, name=None)
+    ]
+    return store[np.array(in_request, dtype=bool)].reset_index(drop=True)
+
+
+def _parse_election(value):
+    dem_key, sep, rep_key = value.partition(",")
+    if not sep or not dem_key or not rep_key:
+        raise click.BadParameter(f"Expected DEM_KEY,REP_KEY but got {value!r}")
+    return dem_key, rep_key
+
+
+@click.command()
+@click.argument("in_files", type=click.Path(exists=True), nargs=-1, required=True)
+@click.option(
+    "-e",
+    "--election",
+    "elections",
+    type=str,
+    multiple=True,
+    required=True,
+    help="A DEM_KEY,REP_KEY pair, e.g. PRES16D,PRES16R.",
+)
+@click.option(
+    "-m",
+    "--metric",
+    "metrics",
+    type=click.Choice(list(METRICS)),
+    multiple=True,
+    help="A metric to compute. Defaults to all of them.",
+)
+@click.option(
+    "-o",
+    "--out-file",
+    type=click.Path(dir_okay=False),
+    required=True,
+    help="The per-plan metrics parquet file.",
+)
+@click.option(
+    "--summary-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="The summary parquet file. Defaults to <out-file>_summary.parquet.",
+)
+@click.option("--n-processes", type=int, default=None)
+def main(in_files, elections, metrics, out_file, summary_file, n_processes):
+    elections = [_parse_election(value) for value in elections]
+    metrics = list(metrics) or list(METRICS)
+    out_file = Path(out_file)
+    if summary_file is None:
+        summary_file = out_file.with_name(f"{out_file.stem}_summary.parquet")
+    summary_file = Path(summary_file)
+
+    plans = ensemble_metrics(in_files, elections, metrics, n_processes=n_processes)
+    plans.to_parquet(out_file, index=False, compression="zstd")
+
+    summary, seat_distribution = weighted_summary(plans, metrics)
+    summary.to_parquet(summary_file, index=False)
+    if not seat_distribution.empty:
+        seat_distribution.to_parquet(
+            summary_file.with_name(f"{summary_file.stem}_seats.parquet"), index=False
+        )
+
+
+if __name__ == "__main__":
+    main()
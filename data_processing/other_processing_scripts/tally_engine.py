@@ -0,0 +1,317 @@
+"""
+Last Updated: 19-10-2026
+
+This script is a vectorized replacement for `ben-tally -m tally-keys`. The node
+attributes to tally are read once from the JSON dual graph into a (nodes x keys)
+matrix, and the district sums of every key for a whole block of plans are then
+computed with a single offset `np.bincount` per key. Blocks are tallied in
+parallel with a process pool, so any number of keys can be added in one pass over
+an ensemble.
+
+The input may either be a `.jsonl.ben` file or an assignment store built by
+`assignment_store.py`, and the output has the same schema as the
+`_tallies.parquet` files written by `ben-tally`:
+
+    step, n_reps, accepted_count, sum_columns, district_1, ..., district_{NN}
+"""
+
+import os
+from multiprocessing import Pool
+from pathlib import Path
+
+import click
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+from assignment_store import open_store
+from ben_reader import count_ben_plans, iter_ben_batches
+from graph_cache import load_graph
+
+# The number of (plan, node) entries tallied by a task when no block size is
+# given, which keeps the per-task arrays at about 100 MB each whatever the size
+# of the graph.
+BLOCK_ENTRIES = 10_000_000
+
+
+def load_node_attributes(graph_file, keys):
+    """
+    Reads the values of the given keys for every node of a JSON dual graph.
+
+    Parameters
+    ----------
+    graph_file : str or Path
+        The path to the JSON dual graph.
+    keys : list[str]
+        The node attributes to read.
+
+    Returns
+    -------
+    numpy.ndarray
+        A (nodes x keys) float64 matrix of node attributes.
+    """
+    graph = load_graph(graph_file)
+    attributes = np.empty((graph.n_nodes, len(keys)), dtype=np.float64)
+    for j, key in enumerate(keys):
+        values = graph.node_columns[key]
+        if values.dtype == bool:
+            raise ValueError(
+                f"Invalid value type in JSON file. Failed to parse boolean values "
+                f"as floats for key {key!r}"
+            )
+        try:
+            attributes[:, j] = values.astype(np.float64)
+        except ValueError:
+            raise ValueError(
+                f"Invalid value type in JSON file. Failed to parse the values of "
+                f"key {key!r} as floats"
+            )
+    return attributes
+
+
+def tally_block(assignments, attributes, n_bins):
+    """
+    Computes the district sums of each attribute for a block of plans.
+
+    Parameters
+    ----------
+    assignments : numpy.ndarray
+        A (plans x nodes) matrix of district assignments.
+    attributes : numpy.ndarray
+        A (nodes x keys) matrix of node attributes.
+    n_bins : int
+        One more than the largest district label.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray):
+        A (plans x keys x n_bins) array of district sums and a (plans x n_bins)
+        array of the number of nodes in each district.
+    """
+    n_plans, n_nodes = assignments.shape
+    # Offsetting each plan's labels by a multiple of n_bins lets a single bincount
+    # tally every plan in the block at once.
+    bins = (assignments.astype(np.int64) + np.arange(n_plans)[:, None] * n_bins).ravel()
+    size = n_plans * n_bins
+
+    node_counts = np.bincount(bins, minlength=size).reshape(n_plans, n_bins)
+    sums = np.empty((n_plans, attributes.shape[1], n_bins), dtype=np.float64)
+    # A single weights buffer is refilled for every key.
+    weights = np.empty((n_plans, n_nodes), dtype=np.float64)
+    for k in range(attributes.shape[1]):
+        weights[:] = attributes[:, k]
+        sums[:, k, :] = np.bincount(
+            bins, weights=weights.ravel(), minlength=size
+        ).reshape(n_plans, n_bins)
+    return sums, node_counts
+
+
+_worker_state = {}
+
+
+def _init_worker(attributes, n_bins, store_dir):
+    _worker_state["attributes"] = attributes
+    _worker_state["n_bins"] = n_bins
+    if store_dir is not None:
+        _worker_state["assignments"], _ = open_store(store_dir, columns=["n_reps"])
+
+
+def _tally_task(task):
+    """
+    Tallies either a (start, stop) range of rows of the worker's assignment store
+    or a block of assignments that was sent to the worker directly.
+    """
+    if isinstance(task, tuple):
+        start, stop = task
+        task = np.asarray(_worker_state["assignments"][start:stop])
+    n_bins = _worker_state["n_bins"]
+    if task.max() >= n_bins:
+        raise ValueError(
+            f"Found district label {task.max()} but expected labels below {n_bins}"
+        )
+    return tally_block(task, _worker_state["attributes"], n_bins)
+
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _long_table(sums, node_counts, n_reps, first_step, first_accepted, keys, districts):
+    """
+    Lays out the tallies of a block of plans in the `ben-tally` long format.
+    """
+    n_plans = len(n_reps)
+    n_keys = len(keys)
+    n_reps = np.asarray(n_reps, dtype=np.int64)
+    step = first_step + np.concatenate([[0], np.cumsum(n_reps)[:-1]])
+
+    columns = {
+        "step": pa.array(np.repeat(step, n_keys).astype(np.uint64)),
+        "n_reps": pa.array(np.repeat(n_reps, n_keys).astype(np.uint32)),
+        "accepted_count": pa.array(
+            np.repeat(
+                np.arange(first_accepted, first_accepted + n_plans), n_keys
+            ).astype(np.uint32)
+        ),
+        "sum_columns": pa.array(np.tile(np.array(keys, dtype=object), n_plans)),
+    }
+    for d in districts:
+        values = sums[:, :, d].reshape(-1)
+        missing = np.repeat(node_counts[:, d] == 0, n_keys)
+        columns[f"district_{d}"] = pa.array(values, mask=missing)
+    return pa.table(columns)
+
+
+def tally_keys(source, graph_file, keys, out_file, block_size=None, n_processes=None):
+    """
+    Tallies the given keys for every plan in an ensemble and writes the result in
+    the `ben-tally` `_tallies.parquet` format.
+
+    Parameters
+    ----------
+    source : str or Path
+        A `.jsonl.ben` file or an assignment store directory.
+    graph_file : str or Path
+        The JSON dual graph holding the node attributes.
+    keys : list[str]
+        The node attributes to tally.
+    out_file : str or Path
+        The path of the parquet file to write.
+    block_size : int, optional
+        The number of plans tallied by each task. Defaults to `BLOCK_ENTRIES`
+        divided by the number of nodes.
+    n_processes : int, optional
+        The number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    None
+    """
+    source = Path(source)
+    keys = sorted(keys)
+    attributes = load_node_attributes(graph_file, keys)
+    n_processes = n_processes or os.cpu_count() or 1
+    if block_size is None:
+        block_size = max(1, BLOCK_ENTRIES // len(attributes))
+
+    if source.is_dir():
+        assignments, plans = open_store(source, columns=["n_reps"])
+        n_plans = len(assignments)
+        n_bins = int(assignments[: min(n_plans, block_size)].max()) + 1
+        store_dir = source
+        all_n_reps = plans["n_reps"].to_numpy()
+        tasks = (
+            ((start, min(start + block_size, n_plans)), all_n_reps[start:][:block_size])
+            for start in range(0, n_plans, block_size)
+        )
+    else:
+        n_plans, _ = count_ben_plans(source)
+        first_batch, _ = next(iter_ben_batches(source, batch_size=block_size))
+        n_bins = int(first_batch.max()) + 1
+        store_dir = None
+        tasks = iter_ben_batches(source, batch_size=block_size)
+
+    print(f"Tallying {len(keys)} keys over {n_plans} unique plans")
+
+    writer = None
+    districts = None
+    step = 1
+    accepted = 1
+    with Pool(
+        processes=n_processes,
+        initializer=_init_worker,
+        initargs=(attributes, n_bins, store_dir),
+    ) as pool, tqdm(total=-(-n_plans // block_size)) as pbar:
+        # Only a few blocks per worker are in flight at once so that decoded BEN
+        # batches do not pile up in memory.
+        for chunk in _chunked(tasks, 2 * n_processes):
+            results = pool.map(_tally_task, [task for task, _ in chunk])
+            for (sums, node_counts), (_, n_reps) in zip(results, chunk):
+                if districts is None:
+                    districts = np.flatnonzero(node_counts.any(axis=0)).tolist()
+                elif np.delete(node_counts, districts, axis=1).any():
+                    raise ValueError(
+                        "Found a district label that does not appear in the first block"
+                    )
+
+                table = _long_table(
+                    sums, node_counts, n_reps, step, accepted, keys, districts
+                )
+                if writer is None:
+                    writer = pq.ParquetWriter(
+                        out_file,
+                        table.schema,
+                        compression="brotli",
+                        compression_level=6,
+                    )
+                writer.write_table(table)
+                step += int(np.sum(n_reps))
+                accepted += len(n_reps)
+                pbar.update(1)
+
+    if writer is not None:
+        writer.close()
+
+
+@click.command()
+@click.option(
+    "-b",
+    "--source",
+    type=click.Path(exists=True),
+    required=True,
+    help="The BEN file or assignment store to tally.",
+)
+@click.option(
+    "-g",
+    "--graph-file",
+    type=click.Path(exists=True),
+    required=True,
+    help="The JSON dual graph holding the node attributes.",
+)
+@click.option(
+    "-k", "--keys", type=str, multiple=True, required=True, help="A key to tally."
+)
+@click.option(
+    "-o",
+    "--out-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Output file. Defaults to the ben-tally naming convention.",
+)
+@click.option(
+    "--block-size",
+    type=int,
+    default=None,
+    help="The number of plans per task. Defaults to 10 million / the number of nodes.",
+)
+@click.option("--n-processes", type=int, default=None)
+def main(source, graph_file, keys, out_file, block_size, n_processes):
+    if out_file is None:
+        source_path = Path(source).resolve()
+        name = source_path.name
+        if name.endswith(".jsonl.ben"):
+            name = name[: -len(".jsonl.ben")]
+        elif name.endswith("_store"):
+            name = name[: -len("_store")]
+        out_file = source_path.with_name(f"{name}_tallies.parquet")
+
+    tally_keys(
+        source,
+        graph_file,
+        list(keys),
+        out_file,
+        block_size=block_size,
+        n_processes=n_processes,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,752 @@
+"""
+Last Updated: 19-10-2026
+
+This script finds, for every ensemble in the catalog of a processed data folder
+(see `ensemble_catalog.py`), the number of accepted plans and of proposed steps
+after which the Wasserstein distance between the ensemble so far and its target
+stays below each of a set of thresholds (0.1, 0.05 and 0.01 by default). The
+targets are
+
+    the ground truth    : the cut edge distribution of `true_counts_7x7_7.csv` (7x7)
+                          and `true_counts_5x5_5.csv` (5x5), weighted by
+                          `tree_count`, for the cut edge files of those states
+    a reference chain   : for every other state, the ensemble of the same state
+                          and statistic with the most steps (and, if both are known,
+                          the same number of districts), unless one is given
+                          with `--reference`
+
+As in the figure scripts, cut edge files are compared by their cut edge
+distributions and tallies files by the sum over ranks of the distances between
+the distributions of the ranked Democratic district shares. Every plan is
+weighted by its `n_reps`.
+
+The chain is streamed in batches and the trace is vectorized within a batch: the
+plans are binned (by cut edge count, or by share into `n_bins` bins of [0, 1]), the
+weighted counts of every bin between the checkpoints (`n_points` in all) that fall
+in the batch are a single `bincount` added to the running counts, and the
+distances at those checkpoints follow from the cumulative distribution functions
+at once. The crossing of each threshold is the checkpoint after the last one at or
+above the threshold, and it is refined to the exact accepted count by a binary
+search between the two checkpoints, in a second pass that keeps only the plans in
+between and stops after the last crossing. Memory therefore scales with the batch
+size and the distance between checkpoints rather than with the length of the
+chain. The distance is below the threshold at every checkpoint after a crossing,
+although it may rise above it again for a while between two checkpoints (more
+`n_points` narrows these gaps). The thresholds are in the units of the traces, i.e.
+cut edges or summed vote shares.
+
+A chain with both a long-format and a wide tallies file (see `compact_tallies.py`)
+is only traced once, from its wide file, and the two layouts are interchangeable
+as references.
+
+The ensembles are processed in parallel and the output is a single summary table
+with one row per (ensemble, threshold). An ensemble that has not dropped below a
+threshold by its last checkpoint has no crossing for it.
+
+Usage:
+
+    python time_to_epsilon.py hpc_files/hpc_processed_data -o time_to_epsilon.csv
+"""
+
+import fnmatch
+import re
+from functools import partial
+from multiprocessing import Pool
+from pathlib import Path
+
+import click
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from convergence_diagnostics import _iter_n_reps, iter_statistics
+from ensemble_catalog import _INT_COLUMNS, catalog_paths, find_ensembles, load_catalog
+
+script_dir = Path(__file__).resolve().parent
+top_dir = script_dir.parents[1]
+
+TRUTH_FILES = {
+    "7x7": top_dir.joinpath(
+        "other_data_files/processed_data_files/true_counts_7x7_7.csv"
+    ),
+    "5x5": top_dir.joinpath("example_files/true_counts_5x5_5.csv"),
+}
+ELECTIONS = {
+    "PA": ("PRES16D", "PRES16R"),
+    "VA": ("G16DPRS", "G16RPRS"),
+}
+# The kinds of files that are traced, with the preferred layout of a chain last.
+KINDS = ["cut_edges", "tallies", "wide_tallies"]
+
+
+def _statistic(kind, election):
+    if kind == "cut_edges":
+        return "cut_edges", None
+    return "ranked_shares", election
+
+
+def _bin(value, statistic, n_bins):
+    value = np.asarray(value, dtype=np.float64)
+    if statistic == "cut_edges":
+        return np.rint(value).astype(np.int32)
+    return np.clip((value * n_bins).astype(np.int32), 0, n_bins - 1)
+
+
+def iter_binned(file, kind, election=None, n_bins=10_000, batch_size=1_000_000):
+    """
+    Streams the statistics of a chain as bin indices.
+
+    Parameters
+    ----------
+    file : str or Path
+        A cut edges file, or a long-format or wide tallies file.
+    kind : str
+        The kind of file (see `KINDS`).
+    election : (str, str), optional
+        The (Democratic key, Republican key) pair of a tallies file.
+    n_bins : int
+        The number of bins of the vote shares. Cut edges are binned by their
+        count.
+    batch_size : int
+        The number of rows read at a time.
+
+    Yields
+    ------
+    (numpy.ndarray, dict[str, numpy.ndarray]):
+        The `n_reps` of a batch of plans (in accepted order) and the bin of every
+        plan of the batch for each statistic.
+    """
+    statistic, election = _statistic(kind, election)
+    for n_reps, values in iter_statistics(file, statistic, election, batch_size):
+        if len(n_reps) == 0:
+            continue
+        yield np.asarray(n_reps, dtype=np.int64), {
+            name: _bin(value, statistic, n_bins) for name, value in values.items()
+        }
+
+
+def reference_distribution(
+    file, kind, election=None, n_bins=10_000, batch_size=1_000_000
+):
+    """
+    Returns the binned distribution of every statistic of a reference chain. The
+    chain is streamed into running bin counts, so only one batch of rows is held
+    in memory at a time.
+
+    Returns
+    -------
+    dict[str, numpy.ndarray]
+        The `n_reps`-weighted count of every bin for each statistic.
+    """
+    # Cut edges are binned by their count, so only their range is needed.
+    minlength = 0 if kind == "cut_edges" else n_bins
+    counts = {}
+    for n_reps, bins in iter_binned(file, kind, election, n_bins, batch_size):
+        for name, index in bins.items():
+            batch = np.bincount(index, weights=n_reps, minlength=minlength)
+            if name in counts:
+                size = max(len(counts[name]), len(batch))
+                batch = _pad(counts[name], size) + _pad(batch, size)
+            counts[name] = batch
+    return counts
+
+
+def truth_distribution(truth_csv):
+    """
+    Returns the cut edge distribution of a ground truth file, e.g.
+    `true_counts_7x7_7.csv`, as the `tree_count` of every cut edge count.
+    """
+    df = pd.read_csv(truth_csv)
+    cuts = df["cuts"].to_numpy(dtype=np.int64)
+    weights = df["tree_count"].to_numpy(dtype=np.float64)
+    return {"cut_edges": np.bincount(cuts, weights=weights)}
+
+
+def _pad(counts, size):
+    return np.pad(counts, (0, size - counts.shape[-1]))
+
+
+def _w1(cumulative, reference_cdf, spacing):
+    """
+    The Wasserstein distance between each row of weighted bin counts and a
+    reference CDF over the same bins.
+    """
+    totals = cumulative.sum(axis=-1, keepdims=True)
+    cdf = np.cumsum(cumulative, axis=-1) / np.where(totals > 0, totals, 1)
+    return np.abs(cdf[..., :-1] - reference_cdf[:-1]) @ spacing
+
+
+class _Comparison:
+    """
+    The running `n_reps`-weighted bin counts of the statistics of a chain and the
+    CDFs of its target over the same bins.
+    """
+
+    def __init__(self, reference, spacing):
+        self.reference = reference
+        self.spacing = spacing
+        self.counts = {}
+        self.targets = {}
+
+    def _fit(self, bins):
+        """
+        Grows the bins of every statistic to hold the given bin indices. Bins past
+        the supports of both the chain and the target add nothing to a distance,
+        so the distances do not depend on how far the bins extend.
+        """
+        for name, index in bins.items():
+            if name not in self.reference:
+                raise ValueError(f"The target has no distribution of {name}")
+            size = max(
+                len(self.reference[name]),
+                len(self.counts.get(name, ())),
+                int(index.max()) + 1 if len(index) else 0,
+            )
+            if name in self.counts and size == len(self.counts[name]):
+                continue
+            target = _pad(self.reference[name], size)
+            self.counts[name] = _pad(self.counts.get(name, np.zeros(0)), size)
+            self.targets[name] = np.cumsum(target) / target.sum()
+
+    def _distance(self, counts):
+        return sum(
+            _w1(
+                _pad(counts[name], len(target)),
+                target,
+                self.spacing * np.ones(len(target) - 1),
+            )
+            for name, target in self.targets.items()
+        )
+
+    def update(self, n_reps, bins, stops=()):
+        """
+        Adds a batch of plans to the counts, and returns the distance after the
+        first `stops[j]` plans of the batch for every j.
+        """
+        self._fit(bins)
+        stops = np.asarray(stops, dtype=np.int64)
+        # The segment of every plan between two stops, with the plans after the
+        # last stop in one more segment, so a single bincount per statistic gives
+        # the counts at every stop.
+        segment = np.searchsorted(stops, np.arange(1, len(n_reps) + 1), side="left")
+        distances = np.zeros(len(stops))
+        for name, index in bins.items():
+            size = len(self.counts[name])
+            segments = np.bincount(
+                segment * size + index,
+                weights=n_reps,
+                minlength=(len(stops) + 1) * size,
+            ).reshape(len(stops) + 1, size)
+            cumulative = self.counts[name] + np.cumsum(segments, axis=0)
+            distances += _w1(
+                cumulative[:-1],
+                self.targets[name],
+                self.spacing * np.ones(size - 1),
+            )
+            self.counts[name] = cumulative[-1]
+        return distances
+
+    def first_below(self, base, n_reps, bins, epsilon):
+        """
+        Finds the smallest number of plans of a window with a distance below
+        epsilon by binary search, given the counts `base` before the window and
+        that the distance is below epsilon after the whole window but not before
+        it.
+        """
+        self._fit(bins)
+        low, high = 0, len(n_reps)
+        while high - low > 1:
+            middle = (low + high) // 2
+            step = {
+                name: _pad(base.get(name, np.zeros(0)), len(self.counts[name]))
+                + np.bincount(
+                    index[low:middle],
+                    weights=n_reps[low:middle],
+                    minlength=len(self.counts[name]),
+                )
+                for name, index in bins.items()
+            }
+            if self._distance(step) < epsilon:
+                high = middle
+            else:
+                low, base = middle, step
+        return high
+
+
+def _crossings(chain, comparison, windows):
+    """
+    Streams a chain a second time to refine the crossings of the thresholds. Only
+    the plans of the windows between two checkpoints that hold a crossing are kept
+    in memory, and the chain is read only up to the last of them.
+
+    Parameters
+    ----------
+    chain : iterable
+        The batches of the chain (see `iter_binned`).
+    comparison : _Comparison
+        An empty comparison with the target.
+    windows : dict[(int, int), list[float]]
+        The thresholds that are crossed in each window (low, high] of accepted
+        counts.
+
+    Returns
+    -------
+    dict[float, (int, int)]
+        The accepted count and proposed steps of the crossing of every threshold.
+    """
+    todo = sorted(windows)
+    crossings = {}
+    offset = 0
+    steps = 0
+    window = None
+    for n_reps, bins in chain:
+        start = 0
+        while todo and start < len(n_reps):
+            low, high = todo[0]
+            if offset + start < low:
+                stop = min(len(n_reps), low - offset)
+            else:
+                if window is None:
+                    base = {
+                        name: counts.copy()
+                        for name, counts in comparison.counts.items()
+                    }
+                    window = (base, steps, [], {name: [] for name in bins})
+                stop = min(len(n_reps), high - offset)
+                window[2].append(n_reps[start:stop])
+                for name, index in bins.items():
+                    window[3][name].append(index[start:stop])
+            part = {name: index[start:stop] for name, index in bins.items()}
+            comparison.update(n_reps[start:stop], part)
+            steps += int(n_reps[start:stop].sum())
+            start = stop
+
+            if window is not None and offset + start == high:
+                base, base_steps, window_reps, window_bins = window
+                window_reps = np.concatenate(window_reps)
+                window_bins = {
+                    name: np.concatenate(index) for name, index in window_bins.items()
+                }
+                window_steps = base_steps + np.cumsum(window_reps)
+                for epsilon in windows[todo.pop(0)]:
+                    k = comparison.first_below(base, window_reps, window_bins, epsilon)
+                    crossings[epsilon] = (low + k, int(window_steps[k - 1]))
+                window = None
+        offset += len(n_reps)
+        if not todo:
+            break
+    return crossings
+
+
+def time_to_epsilon(
+    file,
+    kind,
+    reference,
+    epsilons=(0.1, 0.05, 0.01),
+    election=None,
+    n_bins=10_000,
+    n_points=500,
+    batch_size=1_000_000,
+):
+    """
+    Finds the number of accepted plans and proposed steps after which the distance
+    of a chain to its target stays below each threshold.
+
+    Parameters
+    ----------
+    file : str or Path
+        The processed file of the chain.
+    kind : str
+        The kind of file (see `KINDS`).
+    reference : dict[str, numpy.ndarray]
+        The target distribution (see `reference_distribution` and
+        `truth_distribution`).
+    epsilons : list[float]
+        The thresholds.
+    election : (str, str), optional
+        The (Democratic key, Republican key) pair of a tallies file.
+    n_bins : int
+        The number of bins of the vote shares.
+    n_points : int
+        The number of checkpoints of the coarse trace.
+    batch_size : int
+        The number of rows read at a time.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per threshold with the columns `n_plans`, `n_steps`,
+        `final_distance`, `epsilon`, `accepted_count` and `proposed_steps`.
+    """
+    n_plans = 0
+    n_steps = 0
+    for n_reps in _iter_n_reps(file, batch_size):
+        n_plans += len(n_reps)
+        n_steps += int(n_reps.sum())
+    spacing = 1.0 if kind == "cut_edges" else 1.0 / n_bins
+
+    checkpoints = np.unique(
+        np.linspace(0, n_plans, n_points + 1)[1:].round().astype(np.int64)
+    )
+    checkpoints = checkpoints[checkpoints > 0]
+    trace = np.zeros(len(checkpoints))
+    comparison = _Comparison(reference, spacing)
+    offset = 0
+    for n_reps, bins in iter_binned(file, kind, election, n_bins, batch_size):
+        # The checkpoints that fall in this batch.
+        first, last = np.searchsorted(
+            checkpoints, [offset, offset + len(n_reps)], side="right"
+        )
+        trace[first:last] = comparison.update(
+            n_reps, bins, checkpoints[first:last] - offset
+        )
+        offset += len(n_reps)
+
+    # The window of checkpoints in which each threshold is crossed for good.
+    windows = {}
+    for epsilon in epsilons:
+        above = np.flatnonzero(trace >= epsilon)
+        if len(trace) and not len(above):
+            window = (0, int(checkpoints[0]))
+        elif len(above) and above[-1] < len(trace) - 1:
+            window = (int(checkpoints[above[-1]]), int(checkpoints[above[-1] + 1]))
+        else:
+            continue
+        windows.setdefault(window, []).append(epsilon)
+    crossings = {}
+    if windows:
+        crossings = _crossings(
+            iter_binned(file, kind, election, n_bins, batch_size),
+            _Comparison(reference, spacing),
+            windows,
+        )
+
+    rows = []
+    for epsilon in epsilons:
+        accepted, proposed = crossings.get(epsilon, (None, None))
+        rows.append(
+            {
+                "n_plans": n_plans,
+                "n_steps": n_steps,
+                "final_distance": trace[-1] if len(trace) else np.nan,
+                "epsilon": epsilon,
+                "accepted_count": accepted,
+                "proposed_steps": proposed,
+            }
+        )
+    table = pd.DataFrame(rows)
+    for column in ["accepted_count", "proposed_steps"]:
+        table[column] = table[column].astype("Int64")
+    return table
+
+
+def _reference_task(task, n_bins, batch_size):
+    file, kind, election = task
+    return reference_distribution(file, kind, election, n_bins, batch_size)
+
+
+def _ensemble_task(task, epsilons, n_bins, n_points, batch_size):
+    info, file, kind, election, reference = task
+    table = time_to_epsilon(
+        file, kind, reference, epsilons, election, n_bins, n_points, batch_size
+    )
+    for i, (column, value) in enumerate(info.items()):
+        table.insert(i, column, value)
+    return table
+
+
+def _family(kind):
+    return "cut_edges" if kind == "cut_edges" else "tallies"
+
+
+def _one_layout_per_chain(catalog):
+    """
+    Keeps a single file of every chain, the wide tallies file if a chain has both
+    a long-format and a wide one.
+    """
+    chains = [
+        (re.sub(rf"_{kind}(\.parquet)?$", "", path), _family(kind))
+        for path, kind in zip(catalog["path"], catalog["kind"])
+    ]
+    # Visit the files in the order of `KINDS`, so the preferred layout comes last.
+    preferred = {}
+    for i in np.argsort(catalog["kind"].map(KINDS.index).to_numpy(), kind="stable"):
+        preferred[chains[i]] = i
+    return catalog.iloc[sorted(preferred.values())]
+
+
+def _default_reference(candidates, row):
+    """
+    The ensemble of the same state and statistic with the most steps, skipping those
+    with a different (known) number of districts.
+    """
+    same = candidates[
+        candidates["n_dists"].isna()
+        | pd.isna(row["n_dists"])
+        | (candidates["n_dists"] == row["n_dists"])
+    ]
+    if same.empty:
+        return None
+    return same.sort_values(["total_n_reps", "path"], ascending=[False, True]).iloc[0]
+
+
+def convergence_table(
+    root,
+    epsilons=(0.1, 0.05, 0.01),
+    truth_files=None,
+    references=None,
+    elections=None,
+    states=None,
+    n_bins=10_000,
+    n_points=500,
+    batch_size=1_000_000,
+    n_processes=None,
+):
+    """
+    Computes the time-to-epsilon of every catalogued ensemble of a processed data
+    folder.
+
+    Parameters
+    ----------
+    root : str or Path
+        The processed data folder.
+    epsilons : list[float]
+        The thresholds.
+    truth_files : dict[str, str or Path], optional
+        The ground truth CSV of each state. Defaults to `TRUTH_FILES`.
+    references : dict[str, str], optional
+        A glob pattern of the file name of the reference ensemble of a state.
+    elections : dict[str, (str, str)], optional
+        The (Democratic key, Republican key) pair of each state. Defaults to
+        `ELECTIONS`.
+    states : list[str], optional
+        The states to include. Defaults to all of them.
+    n_bins : int
+        The number of bins of the vote shares.
+    n_points : int
+        The number of checkpoints of the coarse traces.
+    batch_size : int
+        The number of rows read at a time.
+    n_processes : int, optional
+        The number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per (ensemble, threshold) with the columns `name`, `state`,
+        `method`, `seed`, `n_dists`, `kind`, `compared_to` and those of
+        `time_to_epsilon`.
+    """
+    root = Path(root)
+    truth_files = TRUTH_FILES if truth_files is None else truth_files
+    references = references or {}
+    elections = ELECTIONS if elections is None else elections
+
+    catalog = load_catalog(root, n_processes=n_processes)
+    criteria = {"kind": KINDS}
+    if states:
+        criteria["state"] = list(states)
+    catalog = _one_layout_per_chain(find_ensembles(catalog, **criteria))
+    # The parameters that none of the file names set are not catalog columns.
+    catalog = catalog.reindex(
+        columns=list(catalog.columns) + sorted(set(_INT_COLUMNS) - set(catalog))
+    )
+    catalog["file"] = [str(path) for path in catalog_paths(root, catalog)]
+
+    # Pair every ensemble with its target.
+    pairs = []
+    for _, row in catalog.iterrows():
+        state, kind = row["state"], row["kind"]
+        election = None
+        if kind != "cut_edges":
+            if state not in elections:
+                continue
+            election = tuple(elections[state])
+        if kind == "cut_edges" and state in truth_files:
+            pairs.append((row, election, ("truth", str(truth_files[state]))))
+            continue
+        candidates = catalog[
+            (catalog["state"] == state)
+            & (catalog["kind"].map(_family) == _family(kind))
+        ]
+        if state in references:
+            matches = [
+                i
+                for i, name in zip(candidates.index, candidates["name"])
+                if fnmatch.fnmatch(name, references[state])
+            ]
+            reference = candidates.loc[matches[0]] if matches else None
+        else:
+            reference = _default_reference(candidates, row)
+        if reference is None or reference["path"] == row["path"]:
+            continue
+        pairs.append((row, election, ("reference", reference["file"])))
+
+    wanted = sorted(
+        {
+            (target[1], _family(row["kind"]), election)
+            for row, election, target in pairs
+            if target[0] == "reference"
+        }
+    )
+    with Pool(processes=n_processes) as pool:
+        computed = list(
+            tqdm(
+                pool.imap(
+                    partial(_reference_task, n_bins=n_bins, batch_size=batch_size),
+                    wanted,
+                ),
+                total=len(wanted),
+                desc="Reading references",
+            )
+        )
+        distributions = {
+            ("reference", file): distribution
+            for (file, _, _), distribution in zip(wanted, computed)
+        }
+        for _, _, target in pairs:
+            if target[0] == "truth" and target not in distributions:
+                distributions[target] = truth_distribution(target[1])
+
+        tasks = [
+            (
+                {
+                    "name": row["name"],
+                    "state": row["state"],
+                    "method": row["method"],
+                    "seed": row["seed"],
+                    "n_dists": row["n_dists"],
+                    "kind": row["kind"],
+                    "compared_to": f"{target[0]}:{Path(target[1]).name}",
+                },
+                row["file"],
+                row["kind"],
+                election,
+                distributions[target],
+            )
+            for row, election, target in pairs
+        ]
+        process_fn = partial(
+            _ensemble_task,
+            epsilons=list(epsilons),
+            n_bins=n_bins,
+            n_points=n_points,
+            batch_size=batch_size,
+        )
+        tables = list(
+            tqdm(
+                pool.imap(process_fn, tasks),
+                total=len(tasks),
+                desc="Tracing ensembles",
+            )
+        )
+
+    if not tables:
+        return pd.DataFrame()
+    return pd.concat(tables, ignore_index=True)
+
+
+def _parse_mapping(ctx, param, values):
+    mapping = {}
+    for value in values:
+        state, sep, target = value.partition("=")
+        if not sep or not state or not target:
+            raise click.BadParameter(f"Expected STATE=VALUE but got {value!r}")
+        mapping[state] = target
+    return mapping
+
+
+def _parse_epsilons(ctx, param, value):
+    try:
+        return [float(epsilon) for epsilon in value.split(",")]
+    except ValueError:
+        raise click.BadParameter(f"Expected comma separated thresholds, got {value!r}")
+
+
+@click.command()
+@click.argument(
+    "root",
+    type=click.Path(exists=True, file_okay=False),
+    default="hpc_files/hpc_processed_data",
+)
+@click.option(
+    "-o",
+    "--out-file",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="The summary table, as a .csv or .parquet file.",
+)
+@click.option(
+    "--epsilons",
+    default="0.1,0.05,0.01",
+    show_default=True,
+    callback=_parse_epsilons,
+    help="Comma separated thresholds.",
+)
+@click.option(
+    "--truth",
+    multiple=True,
+    callback=_parse_mapping,
+    help="STATE=CSV, a ground truth cut edge distribution (default 7x7 and 5x5).",
+)
+@click.option(
+    "--reference",
+    multiple=True,
+    callback=_parse_mapping,
+    help="STATE=GLOB, the file name of the reference ensemble of a state.",
+)
+@click.option(
+    "-e",
+    "--election",
+    multiple=True,
+    callback=_parse_mapping,
+    help="STATE=DEM_KEY,REP_KEY (default PA=PRES16D,PRES16R and VA=G16DPRS,G16RPRS).",
+)
+@click.option("-s", "--state", "states", multiple=True, help="A state to include.")
+@click.option("--n-bins", type=int, default=10_000, show_default=True)
+@click.option("--n-points", type=int, default=500, show_default=True)
+@click.option("--batch-size", type=int, default=1_000_000, show_default=True)
+@click.option("--n-processes", type=int, default=None)
+def main(
+    root,
+    out_file,
+    epsilons,
+    truth,
+    reference,
+    election,
+    states,
+    n_bins,
+    n_points,
+    batch_size,
+    n_processes,
+):
+    truth_files = dict(TRUTH_FILES)
+    truth_files.update(truth)
+    elections = dict(ELECTIONS)
+    elections.update(
+        {state: tuple(keys.split(",")) for state, keys in election.items()}
+    )
+
+    table = convergence_table(
+        root,
+        epsilons=epsilons,
+        truth_files=truth_files,
+        references=reference,
+        elections=elections,
+        states=states,
+        n_bins=n_bins,
+        n_points=n_points,
+        batch_size=batch_size,
+        n_processes=n_processes,
+    )
+    if out_file is not None:
+        if Path(out_file).suffix == ".csv":
+            table.to_csv(out_file, index=False)
+        else:
+            table.to_parquet(out_file, index=False)
+    with pd.option_context("display.max_rows", None, "display.width", 250):
+        print(table.drop(columns="name").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
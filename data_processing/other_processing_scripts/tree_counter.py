@@ -60,11 +60,28 @@ def process_line(graph, n_parts, line):
     return tot_cuts, tot_subs
 
 
-@click.command()
-@click.argument("file_name", type=str)
-@click.argument("grid_size", type=int, nargs=2)
-@click.argument("n_parts", type=int, nargs=1)
-def main(file_name, grid_size, n_parts):
+def count_trees(file_name, grid_size, n_parts, n_processes=None):
+    """
+    Counts the spanning trees of the plans in a JSONL enumeration of grid partitions
+    and totals them by number of cut edges.
+
+    Parameters
+    ----------
+    file_name : str
+        The JSONL file with one partition of the grid per line.
+    grid_size : (int, int)
+        The dimensions of the grid.
+    n_parts : int
+        The number of districts in each partition.
+    n_processes : int, optional
+        The number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The `tree_count`, `n_plans` and `probability` (in percent) of each number
+        of `cuts`.
+    """
     total_lines = 0
     with jl.open(file_name) as f:
         total_lines = sum(1 for _ in f)
@@ -79,7 +96,7 @@ def main(file_name, grid_size, n_parts):
     line_process_fn = partial(process_line, grid_graph, n_parts)
 
     # Number of processes to use
-    num_processes = os.cpu_count() or 1
+    num_processes = n_processes or os.cpu_count() or 1
     print(f"Counting trees using {num_processes} processes")
 
     with Pool(processes=num_processes) as pool:
@@ -96,6 +113,15 @@ def main(file_name, grid_size, n_parts):
     prob_df = cuts_df.groupby("cuts")["tree_count"].sum().reset_index()
     prob_df["n_plans"] = list(cuts_df["cuts"].value_counts().sort_index())
     prob_df["probability"] = 100 * prob_df["tree_count"] / prob_df["tree_count"].sum()
+    return prob_df
+
+
+@click.command()
+@click.argument("file_name", type=str)
+@click.argument("grid_size", type=int, nargs=2)
+@click.argument("n_parts", type=int, nargs=1)
+def main(file_name, grid_size, n_parts):
+    prob_df = count_trees(file_name, grid_size, n_parts)
     print(prob_df.to_string(index=False))
 
     script_dir = Path(__file__).resolve().parent
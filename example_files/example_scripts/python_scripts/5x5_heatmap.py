@@ -2,23 +2,27 @@ import matplotlib.pyplot as plt
 from matplotlib import colormaps as cm
 import matplotlib.colors as colors
 import matplotlib
-import ast
-from glob import glob
-import geopandas as gpd
 from pathlib import Path
 from gerrychain import Graph
 import networkx as nx
 from matplotlib import font_manager
+from helper_files.choropleth import load_geometry_paths, plot_choropleth
+from helper_files.node_values import (
+    global_value_range,
+    glob_node_value_files,
+    read_node_values,
+)
 
 
-def make_heatmap(gdf, file_list, file_to_title_dict, output_folder):
+def make_heatmap(paths, file_list, file_to_title_dict, output_folder):
     """
     Generates a heatmap for the square multigrid.
 
     Parameters
     ----------
-    gdf : geopandas.GeoDataFrame
-        The geodataframe containing the square multigrid.
+    paths : list[matplotlib.path.Path]
+        The cached geometry of the square multigrid (see
+        `helper_files.choropleth.load_geometry_paths`).
     file_list : list
         The list of files containing the reassignments for each step.
     file_to_title_dict : dict
@@ -34,14 +38,7 @@ def make_heatmap(gdf, file_list, file_to_title_dict, output_folder):
 
     outpath = Path(output_folder)
 
-    max_val = 0
-    min_val = float("inf")
-    for i, file in enumerate(file_list):
-        with open(file, "r") as f:
-            sq_data = f.readline()
-            sq_data = ast.literal_eval(sq_data)
-            max_val = max(max_val, max(sq_data))
-            min_val = min(min_val, min(sq_data))
+    min_val, max_val = global_value_range(file_list)
 
     for i, f_name in enumerate(file_to_title_dict.keys()):
         file = None
@@ -49,18 +46,14 @@ def make_heatmap(gdf, file_list, file_to_title_dict, output_folder):
             if f_name in f:
                 file = f
                 break
-        with open(file, "r") as f:
-            sq_data = f.readline()
-            sq_data = ast.literal_eval(sq_data)
-
-        gdf["reassign"] = sq_data
 
         col_pos = i % 3
         row_pos = i // 3
 
-        gdf.plot(
-            ax=ax[row_pos, col_pos],
-            column="reassign",
+        plot_choropleth(
+            ax[row_pos, col_pos],
+            paths,
+            read_node_values(file),
             cmap="viridis",
             vmin=min_val,
             vmax=max_val,
@@ -98,13 +91,13 @@ if __name__ == "__main__":
     script_dir = Path(__file__).resolve().parent
     top_dir = script_dir.parents[2]
 
-    file_list = sorted(
-        glob(
-            f"{top_dir}/example_files/example_processed_data/*seed_42*changed_assignments.txt",
-        )
+    file_list = glob_node_value_files(
+        f"{top_dir}/example_files/example_processed_data/*seed_42*changed_assignments"
     )
 
-    gdf = gpd.read_file(f"{top_dir}/example_files/5x5_example")
+    paths = load_geometry_paths(
+        f"{top_dir}/example_files/5x5_example", figsize=(18 / 3, 12 / 2), dpi=400
+    )
 
     base_file_names = [file.split("/")[-1].split(".")[0] for file in file_list]
 
@@ -118,7 +111,7 @@ if __name__ == "__main__":
     }
 
     make_heatmap(
-        gdf=gdf,
+        paths=paths,
         file_list=file_list,
         file_to_title_dict=flie_to_title,
         output_folder=f"{top_dir}/example_files/example_figures",
@@ -0,0 +1,193 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains functions for drawing choropleths (e.g. the multigrid heatmaps)
+from cached geometry rather than through `GeoDataFrame.plot`, which rebuilds the
+polygon patches from the shapely geometries for every panel.
+
+The geometry of a shapefile is converted once into the vertices and path codes of
+one matplotlib compound path per row (exterior rings and holes of every part) and
+saved next to the shapefile as `<name>.paths.npz`. Drawing a panel then only needs
+a `PathCollection` over the cached paths with a new array of values, and frames of
+an animation can reuse a single collection and call `set_array`.
+
+The geometry is read from the GeoParquet cache of the shapefile (see
+`geometry_cache.py`). When the size of the drawn map is known, a simplified level of
+the geometry is used and its paths are cached as `<name>.paths_<level>px.npz`.
+"""
+
+import numpy as np
+import shapely
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path as MplPath
+
+from helper_files.geometry_cache import (
+    _resolve_shapefile,
+    figure_pixels,
+    read_geometries,
+    select_level,
+)
+
+
+def geometry_cache_path(shapefile, level=None):
+    """
+    Returns the path of the geometry cache for a shapefile.
+
+    Parameters
+    ----------
+    shapefile : str or Path
+        The path to the `.shp` file, or to a directory holding a single `.shp` file.
+    level : int, optional
+        The simplification level (see `geometry_cache.SIMPLIFY_LEVELS`). If None,
+        the cache of the full-resolution geometry is returned.
+
+    Returns
+    -------
+    Path
+        The path to the cache, `<name>.paths.npz` or `<name>.paths_<level>px.npz`,
+        next to the shapefile.
+    """
+    shapefile = _resolve_shapefile(shapefile)
+    if level is None:
+        return shapefile.with_suffix(".paths.npz")
+    return shapefile.with_suffix(f".paths_{level}px.npz")
+
+
+def build_geometry_cache(shapefile, level=None, write=True):
+    """
+    Converts the polygons of a shapefile into the vertices and codes of one
+    compound matplotlib path per row.
+
+    Parameters
+    ----------
+    shapefile : str or Path
+        The path to the `.shp` file, or to a directory holding a single `.shp` file.
+    level : int, optional
+        The simplification level to use. If None, the full-resolution geometry is
+        used.
+    write : bool
+        Whether to save the cache next to the shapefile.
+
+    Returns
+    -------
+    dict
+        The `vertices`, `codes` and `row_offsets` arrays of the cache.
+    """
+    shapefile = _resolve_shapefile(shapefile)
+    geometries = read_geometries(shapefile, level)
+
+    parts, part_row = shapely.get_parts(geometries, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    vertices, vertex_ring = shapely.get_coordinates(rings, return_index=True)
+
+    # Each ring is closed, so its first vertex starts a new sub-path and its last
+    # vertex (the repeated first vertex) closes it.
+    ring_starts = np.flatnonzero(np.diff(vertex_ring, prepend=-1))
+    ring_ends = np.append(ring_starts[1:], len(vertex_ring)) - 1
+    codes = np.full(len(vertices), MplPath.LINETO, dtype=np.uint8)
+    codes[ring_starts] = MplPath.MOVETO
+    codes[ring_ends] = MplPath.CLOSEPOLY
+
+    vertex_row = part_row[ring_part[vertex_ring]]
+    row_offsets = np.concatenate(
+        [[0], np.cumsum(np.bincount(vertex_row, minlength=len(geometries)))]
+    )
+
+    stat = shapefile.stat()
+    cache = {
+        "vertices": vertices.astype(np.float64),
+        "codes": codes,
+        "row_offsets": row_offsets.astype(np.int64),
+        "source_size": np.int64(stat.st_size),
+        "source_mtime": np.float64(stat.st_mtime),
+    }
+    if write:
+        np.savez(geometry_cache_path(shapefile, level), **cache)
+    return cache
+
+
+def load_geometry_paths(shapefile, figsize=None, dpi=None, pixels=None):
+    """
+    Loads the cached paths of a shapefile, (re)building the cache if it is
+    missing or if the shapefile has changed since it was written.
+
+    The level of simplification is picked from the size the map will be drawn at,
+    given either as the size and resolution of the panel it is drawn in or
+    directly as a number of pixels. If neither is given, the full-resolution
+    geometry is used.
+
+    Parameters
+    ----------
+    shapefile : str or Path
+        The path to the `.shp` file, or to a directory holding a single `.shp` file.
+    figsize : (float, float), optional
+        The width and height in inches of the panel the map is drawn in.
+    dpi : float, optional
+        The resolution the figure is saved at.
+    pixels : int, optional
+        The number of pixels across the longer side of the drawn map.
+
+    Returns
+    -------
+    list[matplotlib.path.Path]
+        One compound path per row of the shapefile.
+    """
+    shapefile = _resolve_shapefile(shapefile)
+    if pixels is None and figsize is not None and dpi is not None:
+        pixels = figure_pixels(figsize, dpi)
+    level = select_level(pixels)
+    cache_file = geometry_cache_path(shapefile, level)
+    cache = None
+    if cache_file.exists():
+        cache = dict(np.load(cache_file))
+        stat = shapefile.stat()
+        if (
+            cache["source_size"] != stat.st_size
+            or cache["source_mtime"] != stat.st_mtime
+        ):
+            cache = None
+    if cache is None:
+        cache = build_geometry_cache(shapefile, level)
+
+    vertices = cache["vertices"]
+    codes = cache["codes"]
+    offsets = cache["row_offsets"]
+    return [
+        MplPath(vertices[start:stop], codes[start:stop])
+        for start, stop in zip(offsets[:-1], offsets[1:])
+    ]
+
+
+def plot_choropleth(ax, paths, values, cmap="viridis", vmin=None, vmax=None, **kwargs):
+    """
+    Draws a choropleth of the given values over cached paths.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        The axes to draw on.
+    paths : list[matplotlib.path.Path]
+        The paths returned by `load_geometry_paths`.
+    values : array-like
+        The value of each row, in the same order as the paths.
+    cmap : str or matplotlib.colors.Colormap
+        The colormap to use.
+    vmin, vmax : float, optional
+        The color limits.
+    **kwargs
+        Passed on to `PathCollection`.
+
+    Returns
+    -------
+    matplotlib.collections.PathCollection
+        The collection. Its colors can be updated with `set_array` to draw other
+        values over the same geometry.
+    """
+    kwargs.setdefault("edgecolor", "face")
+    collection = PathCollection(paths, cmap=cmap, **kwargs)
+    collection.set_array(np.asarray(values))
+    collection.set_clim(vmin, vmax)
+    ax.add_collection(collection, autolim=True)
+    ax.autoscale_view()
+    ax.set_aspect("equal")
+    return collection
@@ -0,0 +1,329 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains a GeoParquet cache for the shapefiles in `shapefiles/` so that the
+map figures do not re-parse the SHP and DBF files on every run, and do not draw
+full-resolution boundaries into panels that are only a few hundred pixels wide.
+
+The first time a shapefile is used, it is converted to `<name>.geometry.parquet`
+next to it. Along with the attributes and the original `geometry` column, the file
+holds one simplified copy of the geometry per level in `SIMPLIFY_LEVELS`, e.g.
+`geometry_1024px` is simplified so that it looks the same as the original when the
+whole map is drawn 1024 pixels across. The simplification is done on the coverage
+as a whole (`shapely.coverage_simplify`), so neighboring units keep sharing their
+boundaries and no gaps or overlaps appear between them. With shapely < 2.1 or
+GEOS < 3.12, where it is not available, every unit is simplified on its own with
+`shapely.simplify(..., preserve_topology=True)` instead, which keeps each unit
+valid but can leave slivers between neighbors of up to the tolerance. Readers pick the coarsest
+level that is still fine enough for the size of the figure with `figure_pixels`.
+
+The cache is rebuilt whenever the size or mtime of the shapefile changes.
+"""
+
+import json
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+from pathlib import Path
+
+# The resolutions (in pixels across the longer side of the map) of the stored
+# simplification levels, finest first.
+SIMPLIFY_LEVELS = (4096, 2048, 1024, 512, 256)
+GEOMETRY_CACHE_KEY = b"rrc_geometry_cache"
+FULL_RESOLUTION = "geometry"
+# `shapely.coverage_simplify` was added in shapely 2.1 and needs GEOS 3.12.
+_HAS_COVERAGE_SIMPLIFY = hasattr(shapely, "coverage_simplify") and (
+    shapely.geos_version >= (3, 12, 0)
+)
+
+
+def _simplify(geometries, tolerance):
+    """
+    Simplifies the geometries as a coverage if the installed shapely and GEOS
+    support it, and one by one while preserving their topology otherwise.
+    """
+    if _HAS_COVERAGE_SIMPLIFY:
+        return shapely.coverage_simplify(geometries, tolerance)
+    return shapely.simplify(geometries, tolerance, preserve_topology=True)
+
+
+def _resolve_shapefile(shapefile):
+    shapefile = Path(shapefile)
+    if shapefile.is_dir():
+        shp_files = sorted(shapefile.glob("*.shp"))
+        if len(shp_files) != 1:
+            raise ValueError(f"Expected a single .shp file in {shapefile}")
+        shapefile = shp_files[0]
+    return shapefile
+
+
+def geoparquet_path(shapefile):
+    """
+    Returns the path of the GeoParquet cache for a shapefile.
+
+    Parameters
+    ----------
+    shapefile : str or Path
+        The path to the `.shp` file, or to a directory holding a single `.shp` file.
+
+    Returns
+    -------
+    Path
+        The path to the cache, `<name>.geometry.parquet`, next to the shapefile.
+    """
+    shapefile = _resolve_shapefile(shapefile)
+    return shapefile.with_suffix(".geometry.parquet")
+
+
+def level_column(pixels):
+    """
+    Returns the name of the geometry column of a simplification level.
+    """
+    return FULL_RESOLUTION if pixels is None else f"geometry_{pixels}px"
+
+
+def figure_pixels(figsize, dpi, nrows=1, ncols=1):
+    """
+    Returns the size in pixels of the longer side of one panel of a figure.
+
+    Parameters
+    ----------
+    figsize : (float, float)
+        The width and height of the figure in inches.
+    dpi : float
+        The resolution the figure is saved at.
+    nrows, ncols : int
+        The number of rows and columns of panels in the figure.
+
+    Returns
+    -------
+    int
+        The number of pixels across the longer side of one panel.
+    """
+    width, height = figsize
+    return int(np.ceil(max(width / ncols, height / nrows) * dpi))
+
+
+def select_level(pixels, levels=SIMPLIFY_LEVELS):
+    """
+    Picks the coarsest simplification level that is at least as fine as the
+    given resolution.
+
+    Parameters
+    ----------
+    pixels : int or None
+        The number of pixels across the longer side of the drawn map. If None,
+        the full-resolution geometry is used.
+    levels : tuple[int]
+        The stored levels.
+
+    Returns
+    -------
+    int or None
+        The chosen level, or None for the full-resolution geometry.
+    """
+    if pixels is None:
+        return None
+    fine_enough = [level for level in levels if level >= pixels]
+    return min(fine_enough) if fine_enough else None
+
+
+def _geometry_type_names(geometries):
+    names = {
+        shapely.GeometryType.POLYGON: "Polygon",
+        shapely.GeometryType.MULTIPOLYGON: "MultiPolygon",
+        shapely.GeometryType.LINESTRING: "LineString",
+        shapely.GeometryType.MULTILINESTRING: "MultiLineString",
+        shapely.GeometryType.POINT: "Point",
+        shapely.GeometryType.MULTIPOINT: "MultiPoint",
+    }
+    type_ids = np.unique(
+        shapely.get_type_id(geometries[~shapely.is_missing(geometries)])
+    )
+    return [names[shapely.GeometryType(t)] for t in type_ids if t in names]
+
+
+def build_geoparquet(shapefile, levels=SIMPLIFY_LEVELS):
+    """
+    Converts a shapefile to GeoParquet, adding one coverage-simplified geometry
+    column per level.
+
+    Parameters
+    ----------
+    shapefile : str or Path
+        The path to the `.shp` file, or to a directory holding a single `.shp` file.
+    levels : tuple[int]
+        The resolutions (in pixels across the longer side of the map) to simplify
+        the geometry for.
+
+    Returns
+    -------
+    Path
+        The path to the GeoParquet file.
+    """
+    import geopandas as gpd
+
+    shapefile = _resolve_shapefile(shapefile)
+    gdf = gpd.read_file(shapefile)
+    geometries = np.asarray(gdf.geometry.values)
+    crs = gdf.crs.to_json_dict() if gdf.crs is not None else None
+
+    x0, y0, x1, y1 = shapely.total_bounds(geometries)
+    extent = max(x1 - x0, y1 - y0)
+
+    columns = {FULL_RESOLUTION: geometries}
+    level_info = []
+    for pixels in levels:
+        # Half a pixel at the level's resolution, so that the simplified boundaries
+        # are drawn at most half a pixel away from the original ones.
+        tolerance = 0.5 * extent / pixels
+        columns[level_column(pixels)] = _simplify(geometries, tolerance)
+        level_info.append(
+            {
+                "pixels": pixels,
+                "column": level_column(pixels),
+                "tolerance": tolerance,
+                "coverage": _HAS_COVERAGE_SIMPLIFY,
+            }
+        )
+
+    table = pa.Table.from_pandas(
+        gdf.drop(columns=gdf.geometry.name), preserve_index=False
+    )
+    for name, values in columns.items():
+        table = table.append_column(name, pa.array(shapely.to_wkb(values)))
+
+    stat = shapefile.stat()
+    geo = {
+        "version": "1.0.0",
+        "primary_column": FULL_RESOLUTION,
+        "columns": {
+            name: {
+                "encoding": "WKB",
+                "geometry_types": _geometry_type_names(values),
+                "bbox": [float(b) for b in shapely.total_bounds(values)],
+                "crs": crs,
+            }
+            for name, values in columns.items()
+        },
+    }
+    cache = {
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime,
+        "levels": level_info,
+    }
+    table = table.replace_schema_metadata(
+        {b"geo": json.dumps(geo), GEOMETRY_CACHE_KEY: json.dumps(cache)}
+    )
+
+    out_file = geoparquet_path(shapefile)
+    pq.write_table(table, out_file, compression="zstd")
+    return out_file
+
+
+def _cache_info(cache_file):
+    metadata = pq.read_schema(cache_file).metadata or {}
+    if GEOMETRY_CACHE_KEY not in metadata:
+        return None
+    return json.loads(metadata[GEOMETRY_CACHE_KEY])
+
+
+def geoparquet_file(shapefile):
+    """
+    Returns the GeoParquet cache of a shapefile, (re)building it if it is missing
+    or if the shapefile has changed since it was written.
+
+    Parameters
+    ----------
+    shapefile : str or Path
+        The path to the `.shp` file, or to a directory holding a single `.shp` file.
+
+    Returns
+    -------
+    Path
+        The path to the GeoParquet file.
+    """
+    shapefile = _resolve_shapefile(shapefile)
+    cache_file = geoparquet_path(shapefile)
+    if cache_file.exists():
+        info = _cache_info(cache_file)
+        stat = shapefile.stat()
+        if (
+            info is not None
+            and info["source_size"] == stat.st_size
+            and info["source_mtime"] == stat.st_mtime
+        ):
+            return cache_file
+    return build_geoparquet(shapefile)
+
+
+def read_geometries(shapefile, pixels=None):
+    """
+    Reads only the geometry of a shapefile from its GeoParquet cache, at the
+    coarsest simplification level fine enough for the given resolution.
+
+    Parameters
+    ----------
+    shapefile : str or Path
+        The path to the `.shp` file, or to a directory holding a single `.shp` file.
+    pixels : int, optional
+        The number of pixels across the longer side of the drawn map (see
+        `figure_pixels`). If None, the full-resolution geometry is returned.
+
+    Returns
+    -------
+    numpy.ndarray
+        The shapely geometry of each row, in the order of the shapefile.
+    """
+    cache_file = geoparquet_file(shapefile)
+    levels = [level["pixels"] for level in _cache_info(cache_file)["levels"]]
+    column = level_column(select_level(pixels, levels))
+    wkb = (
+        pq.read_table(cache_file, columns=[column])
+        .column(0)
+        .to_numpy(zero_copy_only=False)
+    )
+    return shapely.from_wkb(wkb)
+
+
+def read_geodataframe(shapefile, pixels=None, columns=None):
+    """
+    Reads a shapefile from its GeoParquet cache as a GeoDataFrame, as a drop-in
+    replacement for `gpd.read_file`.
+
+    Parameters
+    ----------
+    shapefile : str or Path
+        The path to the `.shp` file, or to a directory holding a single `.shp` file.
+    pixels : int, optional
+        The number of pixels across the longer side of the drawn map (see
+        `figure_pixels`). If None, the full-resolution geometry is used.
+    columns : list[str], optional
+        The attribute columns to read. Defaults to all of them.
+
+    Returns
+    -------
+    geopandas.GeoDataFrame
+        The attributes along with the chosen geometry as the `geometry` column.
+    """
+    import geopandas as gpd
+
+    cache_file = geoparquet_file(shapefile)
+    info = _cache_info(cache_file)
+    geometry_columns = {FULL_RESOLUTION} | {level["column"] for level in info["levels"]}
+    if columns is None:
+        columns = [
+            name
+            for name in pq.read_schema(cache_file).names
+            if name not in geometry_columns
+        ]
+    levels = [level["pixels"] for level in info["levels"]]
+    column = level_column(select_level(pixels, levels))
+    table = pq.read_table(cache_file, columns=list(columns) + [column])
+
+    geo = json.loads(pq.read_schema(cache_file).metadata[b"geo"])
+    crs = geo["columns"][FULL_RESOLUTION]["crs"]
+    df = table.drop([column]).to_pandas()
+    geometry = shapely.from_wkb(table.column(column).to_numpy(zero_copy_only=False))
+    return gpd.GeoDataFrame(df, geometry=geometry, crs=crs)
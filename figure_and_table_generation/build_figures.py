@@ -0,0 +1,415 @@
+"""
+Last Updated: 19-10-2026
+
+This script rebuilds the figures and tables of the paper. Each figure or table
+script is declared in `TARGETS` as a target with
+
+    script   : the script to run (relative to this folder)
+    inputs   : glob patterns (relative to the top of the repository) of the data
+               files the script reads
+    outputs  : glob patterns of the files the script writes, each of which must
+               match at least one file for the target to be up to date
+    params   : command line options passed on to the script
+    deps     : other targets that have to be built first
+
+The `helper_files` modules and the shared modules of
+`data_processing/other_processing_scripts` that a script imports (directly or
+through other helpers) are found automatically and count as inputs. A target is rebuilt only if the
+SHA-256 hash of its inputs, script and parameters differs from the hash recorded
+after its last successful build, or if one of its outputs is missing. File hashes
+are cached by size and mtime in `.build_state.json`, so unchanged multi-GB inputs
+are not read again.
+
+Targets whose dependencies are built run concurrently in a process pool, each in
+its own Python process from the folder of its script. A full rebuild therefore uses
+all of the cores, and an incremental rebuild only runs the targets whose inputs
+changed.
+
+Usage:
+
+    python figure_and_table_generation/build_figures.py [TARGETS ...] [--force]
+"""
+
+import ast
+import hashlib
+import json
+import os
+import queue
+import subprocess
+import sys
+import time
+from glob import glob
+from multiprocessing import Pool
+from pathlib import Path
+
+import click
+
+script_dir = Path(__file__).resolve().parent
+top_dir = script_dir.parent
+STATE_FILE = script_dir.joinpath(".build_state.json")
+# The folder of the modules shared with the processing scripts, which the figure
+# and table scripts add to `sys.path`.
+SHARED_DIR = top_dir.joinpath("data_processing/other_processing_scripts")
+
+TARGETS = {
+    "box_share_VA": {
+        "script": "figure_scripts/box_share_VA.py",
+        "inputs": ["hpc_files/hpc_processed_data/VA/VA_*_tallies.parquet"],
+        "outputs": [
+            "figure_and_table_generation/figures/dem_share_boxplots_VA.png",
+            "figure_and_table_generation/figures/dem_share_boxplots_VA_legend.png",
+        ],
+    },
+    "histogram_comparison_50x50": {
+        "script": "figure_scripts/histogram_comparison_50x50.py",
+        "inputs": ["hpc_files/hpc_processed_data/50x50/*_cut_edges.parquet"],
+        "outputs": [
+            "figure_and_table_generation/figures/50x50_*_dist_ReCom_comparison.png",
+            "figure_and_table_generation/figures/50x50_*_dist_forest_rrc_comparison.png",
+        ],
+    },
+    "histogram_comparison_7x7": {
+        "script": "figure_scripts/histogram_comparison_7x7.py",
+        "inputs": ["hpc_files/hpc_processed_data/7x7/*_ReCom*_cut_edges.parquet"],
+        "outputs": ["figure_and_table_generation/figures/7x7_ReCom_comparison_*.png"],
+    },
+    "multigrid_visualization": {
+        "script": "figure_scripts/multigrid_visualization.py",
+        "inputs": [
+            "other_data_files/processed_data_files/*_multigrid/*changed_assignments.*",
+            "shapefiles/*_multigrid/*_multigrid.*",
+            "JSON_dualgraphs/*_multigrid.json",
+        ],
+        "outputs": [
+            "figure_and_table_generation/figures/square_multigrid_*.png",
+            "figure_and_table_generation/figures/linear_multigrid_*.png",
+        ],
+    },
+    "pa_averages_report": {
+        "script": "table_scripts/pa_averages_report.py",
+        "inputs": ["hpc_files/hpc_processed_data/PA/*_tallies.parquet"],
+        "outputs": ["figure_and_table_generation/table_outputs/pa_averages_report.txt"],
+    },
+    "pa_dotplot": {
+        "script": "figure_scripts/pa_dotplot.py",
+        "inputs": ["hpc_files/hpc_processed_data/PA/*_tallies.parquet"],
+        "outputs": ["figure_and_table_generation/figures/pa_pres_sen_dotplot.png"],
+        # Both scripts fill the same summary store, so they run one after the other.
+        "deps": ["pa_averages_report"],
+    },
+    "smc_scatterplots": {
+        "script": "figure_scripts/smc_scatterplots.py",
+        "inputs": [
+            "other_data_files/processed_data_files/7x7/7x7_wasserstein_*_data.csv"
+        ],
+        "outputs": [
+            "figure_and_table_generation/figures/7x7_wasserstein_scatter_plot_*.png"
+        ],
+    },
+    "wasserstein_trace_7x7": {
+        "script": "figure_scripts/wasserstein_trace_7x7.py",
+        "inputs": [
+            "other_data_files/processed_data_files/true_counts_7x7_7.csv",
+            "hpc_files/hpc_processed_data/7x7/*_cut_edges.parquet",
+        ],
+        "outputs": [
+            "figure_and_table_generation/figures/Wasserstein_distances_7x7_*.png"
+        ],
+    },
+    "wasserstein_trace_VA": {
+        "script": "figure_scripts/wasserstein_trace_VA.py",
+        "inputs": ["hpc_files/hpc_processed_data/VA/VA_*_tallies.parquet"],
+        "outputs": [
+            "figure_and_table_generation/figures/Wasserstein_distances_VA_*.png"
+        ],
+    },
+}
+
+
+def helper_sources(script):
+    """
+    Finds the `helper_files` and shared modules imported by a script, following the
+    imports of the helpers themselves.
+
+    Parameters
+    ----------
+    script : Path
+        The script.
+
+    Returns
+    -------
+    list[Path]
+        The sorted helper files.
+    """
+    found = set()
+    todo = [Path(script)]
+    while todo:
+        source = todo.pop()
+        tree = ast.parse(source.read_text())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.module:
+                names = [node.module]
+            elif isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            else:
+                continue
+            for name in names:
+                if name.startswith("helper_files."):
+                    helper = Path(script).parent.joinpath(*name.split("."))
+                else:
+                    helper = SHARED_DIR.joinpath(*name.split("."))
+                helper = helper.with_suffix(".py")
+                if helper.exists() and helper not in found:
+                    found.add(helper)
+                    todo.append(helper)
+    return sorted(found)
+
+
+class FileHasher:
+    """
+    Hashes files, reusing the hashes in the build state for files whose size and
+    mtime have not changed.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __call__(self, file):
+        file = Path(file)
+        stat = file.stat()
+        key = str(file.relative_to(top_dir))
+        cached = self.cache.get(key)
+        if (
+            cached is not None
+            and cached["size"] == stat.st_size
+            and cached["mtime"] == stat.st_mtime
+        ):
+            return cached["sha256"]
+
+        sha = hashlib.sha256()
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        self.cache[key] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": sha.hexdigest(),
+        }
+        return sha.hexdigest()
+
+
+def _expand(patterns):
+    files = set()
+    for pattern in patterns:
+        files.update(Path(file) for file in glob(str(top_dir.joinpath(pattern))))
+    return sorted(file for file in files if file.is_file())
+
+
+def target_digest(name, hasher):
+    """
+    Computes the hash of everything a target depends on: its script, the helpers
+    the script imports, its input files and its parameters.
+
+    Parameters
+    ----------
+    name : str
+        The target.
+    hasher : FileHasher
+        The file hasher.
+
+    Returns
+    -------
+    str
+        The hex digest.
+    """
+    target = TARGETS[name]
+    script = script_dir.joinpath(target["script"])
+    files = [script] + helper_sources(script) + _expand(target.get("inputs", []))
+
+    sha = hashlib.sha256()
+    sha.update(json.dumps(target.get("params", {}), sort_keys=True).encode())
+    for file in files:
+        sha.update(str(file.relative_to(top_dir)).encode())
+        sha.update(hasher(file).encode())
+    return sha.hexdigest()
+
+
+def outputs_exist(name):
+    """
+    Checks that every output pattern of a target matches at least one file.
+    """
+    return all(
+        glob(str(top_dir.joinpath(pattern))) for pattern in TARGETS[name]["outputs"]
+    )
+
+
+def _command(name):
+    target = TARGETS[name]
+    command = [sys.executable, Path(target["script"]).name]
+    for key, value in target.get("params", {}).items():
+        command += [f"--{key.replace('_', '-')}", str(value)]
+    return command
+
+
+def _run_target(name, command, cwd):
+    """
+    Runs the script of a target in its own process.
+    """
+    start = time.perf_counter()
+    env = dict(os.environ, MPLBACKEND="Agg")
+    result = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+    return name, result.returncode, time.perf_counter() - start, result.stderr
+
+
+def _load_state():
+    if STATE_FILE.exists():
+        with open(STATE_FILE, "r") as f:
+            return json.load(f)
+    return {"files": {}, "targets": {}}
+
+
+def _save_state(state):
+    tmp_file = STATE_FILE.with_name(STATE_FILE.name + ".tmp")
+    with open(tmp_file, "w") as f:
+        json.dump(state, f, indent=1)
+    tmp_file.replace(STATE_FILE)
+
+
+def _with_deps(names):
+    selected = set()
+    todo = list(names)
+    while todo:
+        name = todo.pop()
+        if name not in TARGETS:
+            raise click.BadParameter(f"Unknown target {name!r}")
+        if name not in selected:
+            selected.add(name)
+            todo.extend(TARGETS[name].get("deps", []))
+    return selected
+
+
+def build(names=None, force=False, n_processes=None, dry_run=False):
+    """
+    Builds the given targets (and their dependencies) that are out of date.
+
+    Parameters
+    ----------
+    names : list[str], optional
+        The targets to build. Defaults to all of them.
+    force : bool
+        Whether to rebuild the targets even if they are up to date.
+    n_processes : int, optional
+        The number of targets to build at once. Defaults to the number of CPUs.
+    dry_run : bool
+        Whether to only print which targets would be built.
+
+    Returns
+    -------
+    dict[str, str]
+        The status of each target: "up to date", "built", "failed", "skipped"
+        (a dependency failed) or "out of date" (for dry runs).
+    """
+    selected = _with_deps(names or list(TARGETS))
+    state = _load_state()
+    hasher = FileHasher(state["files"])
+    status = {}
+    rebuilt = set()
+    done = queue.Queue()
+    running = 0
+
+    def ready():
+        return [
+            name
+            for name in sorted(selected)
+            if name not in status
+            and all(
+                status.get(dep, "building") != "building"
+                for dep in TARGETS[name].get("deps", [])
+            )
+        ]
+
+    with Pool(processes=n_processes) as pool:
+        while running or len(status) < len(selected):
+            for name in ready():
+                deps = TARGETS[name].get("deps", [])
+                if any(status[dep] in ("failed", "skipped") for dep in deps):
+                    status[name] = "skipped"
+                    continue
+                up_to_date = (
+                    not force
+                    and not rebuilt.intersection(deps)
+                    and state["targets"].get(name) == target_digest(name, hasher)
+                    and outputs_exist(name)
+                )
+                if up_to_date:
+                    status[name] = "up to date"
+                    print(f"[up to date] {name}")
+                elif dry_run:
+                    status[name] = "out of date"
+                    rebuilt.add(name)
+                    print(f"[out of date] {name}")
+                else:
+                    status[name] = "building"
+                    running += 1
+                    print(f"[building] {name}")
+                    script = script_dir.joinpath(TARGETS[name]["script"])
+                    pool.apply_async(
+                        _run_target,
+                        (name, _command(name), str(script.parent)),
+                        callback=done.put,
+                        # A target that fails to start at all (e.g. a missing
+                        # interpreter or folder) must still be reported as done.
+                        error_callback=lambda exc, name=name: done.put(
+                            (name, -1, 0.0, repr(exc))
+                        ),
+                    )
+
+            if running == 0:
+                continue
+            name, returncode, elapsed, stderr = done.get()
+            running -= 1
+            if returncode == 0:
+                status[name] = "built"
+                rebuilt.add(name)
+                # The digest is taken after the build so that the sidecars and
+                # caches that a script writes next to its inputs do not count as
+                # changes on the next build.
+                state["targets"][name] = target_digest(name, hasher)
+                _save_state(state)
+                print(f"[built] {name} ({elapsed:.1f}s)")
+            else:
+                status[name] = "failed"
+                state["targets"].pop(name, None)
+                _save_state(state)
+                print(f"[failed] {name} ({elapsed:.1f}s)\n{stderr[-2000:]}")
+
+    if not dry_run:
+        _save_state(state)
+    return status
+
+
+@click.command()
+@click.argument("targets", nargs=-1)
+@click.option("--force", is_flag=True, help="Rebuild the targets even if up to date.")
+@click.option("--n-processes", type=int, default=None)
+@click.option("--dry-run", is_flag=True, help="Only print the out of date targets.")
+@click.option("--list", "list_targets", is_flag=True, help="List the targets.")
+def main(targets, force, n_processes, dry_run, list_targets):
+    if list_targets:
+        for name, target in TARGETS.items():
+            print(f"{name}: {target['script']}")
+        return
+
+    start = time.perf_counter()
+    status = build(list(targets), force, n_processes, dry_run)
+    counts = {}
+    for value in status.values():
+        counts[value] = counts.get(value, 0) + 1
+    summary = ", ".join(f"{n} {value}" for value, n in sorted(counts.items()))
+    print(f"{summary} in {time.perf_counter() - start:.1f}s")
+    if "failed" in counts:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
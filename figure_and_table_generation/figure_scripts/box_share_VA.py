@@ -1,5 +1,5 @@
 """
-Last Updated: 10-11-2025 (Nov 10)
+Last Updated: 19-10-2026
 Author: Peter Rock <peter@mggg.org>
 
 This script is used to generate the boxplots for the Democratic Vote Shares for
@@ -9,13 +9,23 @@ ensembles of Reversible ReCom and one ensemble of Forest ReCom.
 The reversible ensembles each contain 5B proposed steps and start from 3 different seed
 plans: CD_12, CD_16, and rand_dist_eps0p01 (random districts with population deviance
 of 0.01). The Forest ReCom ensemble is a single ensemble containing 1M proposed steps.
+
+The box statistics are computed once and saved as the figure-data artifact
+`figure_data/box_share_VA.parquet` (one row per ensemble and district), which is
+only recomputed when the ensembles change. Use `--stage render` to redraw the
+figure from the saved statistics alone, or `--stage compute` to force the
+statistics to be recomputed.
 """
 
-import pandas as pd
+import click
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from tqdm import tqdm
 from helper_files.box_share_helpers import get_weighted_stats, weighted_quantile
+from helper_files.figure_data import figure_data
+from helper_files.instrumentation import arg_rows, instrument, stage
 from helper_files.legend_saver import save_legend_png, box_handles
 
 colors = [
@@ -25,128 +35,111 @@ colors = [
     "#00cd99",
 ]
 
-if __name__ == "__main__":
-    script_dir = Path(__file__).resolve().parent
-    top_dir = script_dir.parents[1]
-
-    reversible_sample_1 = f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_RevReCom_steps_5000000000_rng_seed_278986_plan_CD_12_20241106_152157_tallies.parquet"
-    reversible_sample_2 = f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_RevReCom_steps_5000000000_rng_seed_278986_plan_CD_16_20240618_174413_tallies.parquet"
-    reversible_sample_3 = f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_RevReCom_steps_5000000000_rng_seed_278986_plan_rand_dist_eps0p01_20241108_130356_tallies.parquet"
-    forest_sample = f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_Forest_steps_10000000_rng_seed_278986_gamma_0.0_alpha_1.0_ndists_11_20241112_124346_tallies.parquet"
-
-    out_folder = f"{top_dir}/figure_and_table_generation/figures"
-    out_path = Path(out_folder)
-
-    # ======================
-    # + REV RECOM SAMPLE 1 +
-    # ======================
-    rev_df1 = pd.read_parquet(reversible_sample_1)
-    rev_df2 = pd.read_parquet(reversible_sample_2)
-    rev_df3 = pd.read_parquet(reversible_sample_3)
-    forest_df = pd.read_parquet(forest_sample)
-
-    rev_df1_dem = rev_df1[rev_df1["sum_columns"] == "G16DPRS"].reset_index()
-    rev_df1_rep = rev_df1[rev_df1["sum_columns"] == "G16RPRS"].reset_index()
-    rev_df1_shares_total = rev_df1_dem[[f"district_{i}" for i in range(1, 12)]] / (
-        rev_df1_dem[[f"district_{i}" for i in range(1, 12)]]
-        + rev_df1_rep[[f"district_{i}" for i in range(1, 12)]]
+ENSEMBLES = ["RevReCom1", "RevReCom2", "RevReCom3", "Forest"]
+
+
+@instrument(rows=lambda result, *args, **kwargs: len(result[0]))
+def sorted_shares(file):
+    """
+    Reads the Democratic vote share of each district of each plan in a tallies file.
+
+    Parameters
+    ----------
+    file : str
+        The tallies file.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray):
+        The (plans x districts) array of vote shares, sorted within each plan, and
+        the weight of each plan.
+    """
+    df = pd.read_parquet(file)
+    df_dem = df[df["sum_columns"] == "G16DPRS"].reset_index()
+    df_rep = df[df["sum_columns"] == "G16RPRS"].reset_index()
+    df_shares_total = df_dem[[f"district_{i}" for i in range(1, 12)]] / (
+        df_dem[[f"district_{i}" for i in range(1, 12)]]
+        + df_rep[[f"district_{i}" for i in range(1, 12)]]
     )
-    rev_df1_shares_total.rename(
+    df_shares_total.rename(
         columns={f"district_{i}": f"district_{i:02d}" for i in range(1, 12)},
         inplace=True,
     )
-    rev_df1_shares_total.sort_index(axis=1, inplace=True)
-    rev_df1_weights = rev_df1_dem["n_reps"].to_numpy()
-    rev_array1 = rev_df1_shares_total.to_numpy()
-    rev_array1.sort(axis=1)
-
-    # ======================
-    # + REV RECOM SAMPLE 2 +
-    # ======================
-    rev_df2_dem = rev_df2[rev_df2["sum_columns"] == "G16DPRS"].reset_index()
-    rev_df2_rep = rev_df2[rev_df2["sum_columns"] == "G16RPRS"].reset_index()
-    rev_df2_shares_total = rev_df2_dem[[f"district_{i}" for i in range(1, 12)]] / (
-        rev_df2_dem[[f"district_{i}" for i in range(1, 12)]]
-        + rev_df2_rep[[f"district_{i}" for i in range(1, 12)]]
-    )
-    rev_df2_shares_total.rename(
-        columns={f"district_{i}": f"district_{i:02d}" for i in range(1, 12)},
-        inplace=True,
-    )
-    rev_df2_shares_total.sort_index(axis=1, inplace=True)
-    rev_df2_weights = rev_df2["n_reps"].to_numpy()
-    rev_array2 = rev_df2_shares_total.to_numpy()
-    rev_array2.sort(axis=1)
-
-    # ======================
-    # + REV RECOM SAMPLE 3 +
-    # ======================
-    rev_df3_dem = rev_df3[rev_df3["sum_columns"] == "G16DPRS"].reset_index()
-    rev_df3_rep = rev_df3[rev_df3["sum_columns"] == "G16RPRS"].reset_index()
-    rev_df3_shares_total = rev_df3_dem[[f"district_{i}" for i in range(1, 12)]] / (
-        rev_df3_dem[[f"district_{i}" for i in range(1, 12)]]
-        + rev_df3_rep[[f"district_{i}" for i in range(1, 12)]]
-    )
-    rev_df3_shares_total.rename(
-        columns={f"district_{i}": f"district_{i:02d}" for i in range(1, 12)},
-        inplace=True,
-    )
-    rev_df3_shares_total.sort_index(axis=1, inplace=True)
-    rev_df3_weights = rev_df3["n_reps"].to_numpy()
-    rev_array3 = rev_df3_shares_total.to_numpy()
-    rev_array3.sort(axis=1)
-
-    # =======================
-    # + FOREST RECOM SAMPLE +
-    # =======================
-    forest_df_dem = forest_df[forest_df["sum_columns"] == "G16DPRS"].reset_index()
-    forest_df_rep = forest_df[forest_df["sum_columns"] == "G16RPRS"].reset_index()
-    forest_df_shares_total = forest_df_dem[[f"district_{i}" for i in range(1, 12)]] / (
-        forest_df_dem[[f"district_{i}" for i in range(1, 12)]]
-        + forest_df_rep[[f"district_{i}" for i in range(1, 12)]]
-    )
-    forest_df_shares_total.rename(
-        columns={f"district_{i}": f"district_{i:02d}" for i in range(1, 12)},
-        inplace=True,
-    )
-    forest_df_shares_total.sort_index(axis=1, inplace=True)
-    forest_df_weights = forest_df["n_reps"].to_numpy()
-    forest_array = forest_df_shares_total.to_numpy()
-    forest_array.sort(axis=1)
-
-    # ======================
-    # + START MAKING PLOTS +
-    # ======================
-    fig, ax = plt.subplots(figsize=(15, 10), dpi=400)
+    df_shares_total.sort_index(axis=1, inplace=True)
+    shares = np.sort(df_shares_total.to_numpy(), axis=1)
+    return shares, df_dem["n_reps"].to_numpy()
+
+
+@instrument()
+def compute_box_stats(samples):
+    """
+    Computes the weighted box statistics of the sorted Democratic vote shares of
+    each ensemble.
+
+    Parameters
+    ----------
+    samples : list[str]
+        The tallies file of each ensemble in `ENSEMBLES`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The statistics, with the columns `ensemble`, `district` (the position in
+        the sorted order, starting at 1), `q1`, `med`, `q3`, `whislo` and `whishi`.
+    """
+    rows = []
+    for ensemble, file in zip(ENSEMBLES, samples):
+        arr, weights = sorted_shares(file)
+        for i in tqdm(range(arr.shape[1]), desc=ensemble):
+            data = arr[:, i]
+            q1, med, q3 = get_weighted_stats(data, weights)
+            rows.append(
+                {
+                    "ensemble": ensemble,
+                    "district": i + 1,
+                    "q1": q1,
+                    "med": med,
+                    "q3": q3,
+                    "whislo": weighted_quantile(data, 0.01, weights),
+                    "whishi": weighted_quantile(data, 0.99, weights),
+                }
+            )
+    return pd.DataFrame(rows)
 
-    arrs = [rev_array1, rev_array2, rev_array3, forest_array]
-    weights = [rev_df1_weights, rev_df2_weights, rev_df3_weights, forest_df_weights]
+
+@instrument(rows=arg_rows(0, "stats"))
+def render_box_stats(stats, out_path):
+    """
+    Draws the boxplots and their legend from the saved statistics.
+
+    Parameters
+    ----------
+    stats : pandas.DataFrame
+        The statistics (see `compute_box_stats`).
+    out_path : Path
+        The folder to save the figures to.
+    """
+    fig, ax = plt.subplots(figsize=(15, 10), dpi=400)
 
     ax.axhline(y=0.5, color="lightgrey", linestyle="--")
 
     handles = []
-    from tqdm import tqdm
-
-    for j in range(len(arrs)):
-        arr = arrs[j]
-        for i in tqdm(range(arr.shape[1])):
-            data = arr[:, i]
-            q1, med, q3 = get_weighted_stats(data, weights[j])
-            whislo = weighted_quantile(data, 0.01, weights[j])
-            whishi = weighted_quantile(data, 0.99, weights[j])
+    for j, ensemble in enumerate(ENSEMBLES):
+        ensemble_stats = stats[stats["ensemble"] == ensemble]
+        for i, row in enumerate(ensemble_stats.itertuples()):
             boxplot_stats = {
-                "med": med,
-                "q1": q1,
-                "q3": q3,
-                "iqr": q3 - q1,
-                "whislo": whislo,
-                "whishi": whishi,
+                "med": row.med,
+                "q1": row.q1,
+                "q3": row.q3,
+                "iqr": row.q3 - row.q1,
+                "whislo": row.whislo,
+                "whishi": row.whishi,
                 "fliers": [],
             }
 
             res = ax.bxp(
                 [boxplot_stats],
-                positions=[2 * (i + 1) + (j * 0.45)],
+                positions=[2 * row.district + (j * 0.45)],
                 capprops={"color": "black"},
                 boxprops={"facecolor": colors[j], "edgecolor": "black"},
                 whiskerprops={"color": "black"},
@@ -155,34 +148,69 @@ if __name__ == "__main__":
                 patch_artist=True,
             )
 
-            # If we haven't already added a handle for this dataset's color, add one now.
-            # We'll use the box to represent this dataset in the legend.
+            # We'll use the first box of each ensemble to represent it in the legend.
             if i == 0:
-                # Each call to bxp returns lists inside the dictionary
-                # For a single boxplot, there's one box element in res["boxes"]
                 handles.append(res["boxes"][0])
 
-        print(f"Done iteration {j+1}/{len(arrs)}")
-
-    ax.set_xticks([2 * i + 0.75 for i in range(1, arrs[0].shape[1] + 1)])
-    ax.set_xticklabels([i for i in range(1, arrs[0].shape[1] + 1)], fontsize=14)
+    n_districts = stats["district"].max()
+    ax.set_xticks([2 * i + 0.75 for i in range(1, n_districts + 1)])
+    ax.set_xticklabels([i for i in range(1, n_districts + 1)], fontsize=14)
     ax.set_yticklabels([f"{i:.1f}" for i in ax.get_yticks()], fontsize=14)
 
-    plt.savefig(
-        out_path.joinpath("dem_share_boxplots_VA.png"), dpi=300, bbox_inches="tight"
-    )
+    with stage("savefig"):
+        plt.savefig(
+            out_path.joinpath("dem_share_boxplots_VA.png"),
+            dpi=300,
+            bbox_inches="tight",
+        )
 
     plt.close()
 
     save_legend_png(
         handles=handles,
         filename=out_path.joinpath("dem_share_boxplots_VA_legend.png"),
-        labels=[
-            "RevReCom1",
-            "RevReCom2",
-            "RevReCom3",
-            "Forest",
-        ],
+        labels=ENSEMBLES,
         label_fontsize=16,
         frameon=True,
     )
+
+
+@click.command()
+@click.option(
+    "--stage",
+    type=click.Choice(["all", "compute", "render"]),
+    default="all",
+    show_default=True,
+    help="Recompute the statistics only if stale (all), always (compute), or never (render).",
+)
+def main(stage):
+    script_dir = Path(__file__).resolve().parent
+    top_dir = script_dir.parents[1]
+
+    reversible_sample_1 = f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_RevReCom_steps_5000000000_rng_seed_278986_plan_CD_12_20241106_152157_tallies.parquet"
+    reversible_sample_2 = f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_RevReCom_steps_5000000000_rng_seed_278986_plan_CD_16_20240618_174413_tallies.parquet"
+    reversible_sample_3 = f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_RevReCom_steps_5000000000_rng_seed_278986_plan_rand_dist_eps0p01_20241108_130356_tallies.parquet"
+    forest_sample = f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_Forest_steps_10000000_rng_seed_278986_gamma_0.0_alpha_1.0_ndists_11_20241112_124346_tallies.parquet"
+    samples = [
+        reversible_sample_1,
+        reversible_sample_2,
+        reversible_sample_3,
+        forest_sample,
+    ]
+
+    out_folder = f"{top_dir}/figure_and_table_generation/figures"
+    out_path = Path(out_folder)
+
+    stats = figure_data(
+        "box_share_VA",
+        lambda: compute_box_stats(samples),
+        sources=samples,
+        params={"ensembles": ENSEMBLES, "whiskers": [0.01, 0.99]},
+        stage=stage,
+    )
+    if stage != "compute":
+        render_box_stats(stats, out_path)
+
+
+if __name__ == "__main__":
+    main()
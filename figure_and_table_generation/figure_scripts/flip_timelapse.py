@@ -0,0 +1,87 @@
+"""
+Last Updated: 19-10-2026
+
+This script makes a time-lapse of the flip-frequency heatmap of an ensemble, with
+one frame per window of a flip frequency file (see
+`data_processing/other_processing_scripts/flip_frequencies.py`). For a frame per
+100k accepted plans, the flip frequency file can be made with
+
+    python flip_frequencies.py -b <ben_file> $(for i in $(seq 1 100); do echo -a ${i}00000; done)
+
+The frames are drawn with a cached raster index of the shapefile, so the cost of
+each frame is a single lookup of the node colors.
+"""
+
+import click
+import numpy as np
+from time import perf_counter
+from helper_files.raster_index import (
+    iter_flip_frequency_frames,
+    load_raster_index,
+    render_frame,
+    write_timelapse,
+)
+
+
+@click.command()
+@click.option(
+    "-f",
+    "--flip-file",
+    type=click.Path(exists=True),
+    required=True,
+    help="The flip frequency parquet file.",
+)
+@click.option(
+    "-s",
+    "--shapefile",
+    type=click.Path(exists=True),
+    required=True,
+    help="The shapefile (or a directory holding it) with one row per node.",
+)
+@click.option(
+    "-o",
+    "--out-file",
+    type=click.Path(),
+    required=True,
+    help="A .gif file, or a directory to write numbered PNG frames to.",
+)
+@click.option("--width", type=int, default=1000, show_default=True)
+@click.option(
+    "--kind",
+    type=click.Choice(["accept", "step"]),
+    default="accept",
+    show_default=True,
+)
+@click.option("--cmap", type=str, default="viridis", show_default=True)
+@click.option("--fps", type=int, default=10, show_default=True)
+def main(flip_file, shapefile, out_file, width, kind, cmap, fps):
+    pixel_to_node = load_raster_index(shapefile, width)
+
+    frames = [values for _, values in iter_flip_frequency_frames(flip_file, kind)]
+    if not frames:
+        raise click.ClickException(f"No {kind} windows found in {flip_file}")
+    if len(frames[0]) <= pixel_to_node.max():
+        raise click.ClickException(
+            f"{flip_file} has {len(frames[0])} nodes but the shapefile has "
+            f"{pixel_to_node.max() + 1}"
+        )
+
+    # All of the frames share the color limits so that they can be compared.
+    vmin = min(np.min(values) for values in frames)
+    vmax = max(np.max(values) for values in frames)
+
+    start = perf_counter()
+    n_frames = write_timelapse(
+        (
+            render_frame(pixel_to_node, values, cmap=cmap, vmin=vmin, vmax=vmax)
+            for values in frames
+        ),
+        out_file,
+        fps=fps,
+    )
+    elapsed = perf_counter() - start
+    print(f"Wrote {n_frames} frames to {out_file} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
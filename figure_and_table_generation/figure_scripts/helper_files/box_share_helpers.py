@@ -7,6 +7,7 @@ in this paper.
 """
 
 import numpy as np
+from helper_files.instrumentation import arg_rows, instrument
 
 
 def find_median(arr, wts):
@@ -57,6 +58,7 @@ def find_median(arr, wts):
     return arr[-1], len(arr) - 1, median_location
 
 
+@instrument(rows=arg_rows(0, "array"))
 def get_weighted_stats(array, weights):
     """
     Finds the q1, median, and q3 of a weighted array. That is, given an array of
@@ -118,6 +120,7 @@ def get_weighted_stats(array, weights):
     return q1, med, q3
 
 
+@instrument(rows=arg_rows(0, "values"))
 def weighted_quantile(
     values, quantiles, sample_weight=None, values_sorted=False, old_style=False
 ):
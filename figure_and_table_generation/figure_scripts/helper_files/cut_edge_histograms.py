@@ -0,0 +1,221 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains functions for computing the weighted cut edge histograms of the
+`_cut_edges.parquet` files and caching them next to each file as
+`<name>.hist.npz`.
+
+Only the `cut_edges` and `n_reps` columns (and `accepted_count`, when prefix
+histograms are requested) are streamed from the file in batches, and each batch is
+reduced with a pyarrow hash aggregate, so a histogram never needs the whole file
+in memory. Along with the histogram of the full chain, the cache can hold the
+histograms of prefixes of the chain, i.e. of the plans with `accepted_count` below
+given values, for plotting how the distribution settles. The cache is rebuilt
+when the source file changes or when a prefix that it does not hold is requested.
+"""
+
+import tempfile
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from helper_files.instrumentation import stage
+
+
+def histogram_path(file):
+    """
+    Returns the path of the histogram cache of a cut edges file.
+
+    Parameters
+    ----------
+    file : str or Path
+        The cut edges parquet file.
+
+    Returns
+    -------
+    Path
+        The path to the cache, `<name>.hist.npz`, next to the file.
+    """
+    file = Path(file)
+    return file.with_name(f"{file.stem}.hist.npz")
+
+
+def _aggregate(values, weights):
+    """
+    Sums the weights of each distinct value with a pyarrow hash aggregate.
+    """
+    table = pa.table({"value": values, "weight": weights})
+    grouped = table.group_by("value").aggregate([("weight", "sum")])
+    return (
+        grouped.column("value").to_numpy(),
+        grouped.column("weight_sum").to_numpy(),
+    )
+
+
+def _add(totals, values, weights):
+    for value, weight in zip(values.tolist(), weights.tolist()):
+        totals[value] = totals.get(value, 0) + weight
+
+
+def build_histogram(file, prefixes=(), batch_size=1 << 20, write=True):
+    """
+    Computes the `n_reps`-weighted histogram of the `cut_edges` column of a file.
+
+    Parameters
+    ----------
+    file : str or Path
+        The cut edges parquet file.
+    prefixes : list[int]
+        The accepted counts to also compute prefix histograms at. The prefix
+        histogram at `a` counts the plans with `accepted_count < a`. If the file has
+        no `accepted_count` column, the (1-based) row number is used instead.
+    batch_size : int
+        The number of rows to read at a time.
+    write : bool
+        Whether to save the histograms next to the file.
+
+    Returns
+    -------
+    dict
+        The distinct `cut_edges` values (sorted), the total weight of each in
+        `weights`, the sorted `prefixes` and a (prefixes x values) array of the
+        prefix weights in `prefix_weights`.
+    """
+    file = Path(file)
+    prefixes = np.unique(np.asarray(prefixes, dtype=np.int64))
+    parquet_file = pq.ParquetFile(file)
+    has_acc = "accepted_count" in parquet_file.schema_arrow.names
+    columns = ["cut_edges", "n_reps"]
+    if len(prefixes) and has_acc:
+        columns.append("accepted_count")
+
+    totals = {}
+    snapshots = []
+    next_prefix = 0
+    row = 0
+    with stage("build_histogram", rows=parquet_file.metadata.num_rows):
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            cut_edges = batch.column("cut_edges")
+            n_reps = batch.column("n_reps")
+            if next_prefix < len(prefixes):
+                if has_acc:
+                    acc = batch.column("accepted_count").to_numpy()
+                else:
+                    acc = np.arange(row + 1, row + batch.num_rows + 1)
+                # Accepted counts are in increasing order, so each prefix boundary
+                # falls at a single split point of the batch.
+                start = 0
+                while next_prefix < len(prefixes):
+                    stop = int(np.searchsorted(acc, prefixes[next_prefix]))
+                    if stop >= len(acc):
+                        break
+                    if stop > start:
+                        _add(
+                            totals,
+                            *_aggregate(
+                                cut_edges.slice(start, stop - start),
+                                n_reps.slice(start, stop - start),
+                            ),
+                        )
+                    snapshots.append(dict(totals))
+                    next_prefix += 1
+                    start = stop
+                cut_edges = cut_edges.slice(start)
+                n_reps = n_reps.slice(start)
+            _add(totals, *_aggregate(cut_edges, n_reps))
+            row += batch.num_rows
+
+    # Prefixes past the end of the chain hold the full histogram.
+    while len(snapshots) < len(prefixes):
+        snapshots.append(dict(totals))
+
+    values = np.array(sorted(totals), dtype=np.int64)
+    prefix_weights = np.zeros((len(prefixes), len(values)), dtype=np.int64)
+    for i, snapshot in enumerate(snapshots):
+        prefix_weights[i] = [snapshot.get(v, 0) for v in values.tolist()]
+
+    stat = file.stat()
+    hist = {
+        "values": values,
+        "weights": np.array([totals[v] for v in values.tolist()], dtype=np.int64),
+        "prefixes": prefixes,
+        "prefix_weights": prefix_weights,
+        "source_size": np.int64(stat.st_size),
+        "source_mtime": np.float64(stat.st_mtime),
+    }
+    if write:
+        # Written to a unique temporary file and moved into place, so that readers
+        # never see a partly written cache.
+        cache_file = histogram_path(file)
+        with tempfile.NamedTemporaryFile(
+            dir=cache_file.parent, prefix=cache_file.name, suffix=".tmp", delete=False
+        ) as tmp:
+            tmp_file = Path(tmp.name)
+        try:
+            with open(tmp_file, "wb") as f:
+                np.savez(f, **hist)
+            tmp_file.replace(cache_file)
+        except BaseException:
+            tmp_file.unlink(missing_ok=True)
+            raise
+    return hist
+
+
+def load_histogram(file, prefixes=()):
+    """
+    Loads the cached histograms of a cut edges file, (re)building them if the
+    cache is missing, if the file has changed since it was written, or if it does
+    not hold all of the requested prefixes.
+
+    Parameters
+    ----------
+    file : str or Path
+        The cut edges parquet file.
+    prefixes : list[int]
+        The accepted counts of the prefix histograms that are needed.
+
+    Returns
+    -------
+    dict
+        The histograms (see `build_histogram`).
+    """
+    file = Path(file)
+    cache_file = histogram_path(file)
+    if cache_file.exists():
+        hist = dict(np.load(cache_file))
+        stat = file.stat()
+        if (
+            hist["source_size"] == stat.st_size
+            and hist["source_mtime"] == stat.st_mtime
+            and np.isin(prefixes, hist["prefixes"]).all()
+        ):
+            return hist
+        prefixes = np.union1d(prefixes, hist["prefixes"])
+    return build_histogram(file, prefixes)
+
+
+def cut_edge_percentages(file, prefix=None):
+    """
+    Returns the cut edge distribution of a file in percent, as used by the
+    histogram figures.
+
+    Parameters
+    ----------
+    file : str or Path
+        The cut edges parquet file.
+    prefix : int, optional
+        If given, the distribution of the plans with `accepted_count < prefix`.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray):
+        The distinct numbers of cut edges and the percentage of steps with each.
+    """
+    if prefix is None:
+        hist = load_histogram(file)
+        weights = hist["weights"]
+    else:
+        hist = load_histogram(file, [prefix])
+        weights = hist["prefix_weights"][np.searchsorted(hist["prefixes"], prefix)]
+    keep = weights > 0
+    return hist["values"][keep], 100 * weights[keep] / weights.sum()
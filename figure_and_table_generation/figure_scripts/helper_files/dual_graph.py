@@ -0,0 +1,123 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains functions for drawing dual graphs straight from the JSON files
+in `JSON_dualgraphs/` without going through networkx. The node positions, edges and
+node sizes are read into arrays from the compiled graph cache (see `graph_cache.py`),
+the edges are drawn as a single `LineCollection` and the nodes as a single scatter,
+so the cost of a drawing does not depend on creating one artist per node or edge.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+from matplotlib.collections import LineCollection
+
+# The graph cache lives with the processing scripts.
+processing_dir = Path(__file__).resolve().parents[3].joinpath("data_processing")
+sys.path.append(str(processing_dir.joinpath("other_processing_scripts")))
+from graph_cache import load_graph
+
+
+def load_dual_graph_arrays(JSON_file, x_key="x", y_key="y", size_key="TOTPOP"):
+    """
+    Reads the node positions, node sizes and edges of a JSON dual graph.
+
+    Parameters
+    ----------
+    JSON_file : str or Path
+        The path to the JSON dual graph (in networkx adjacency format).
+    x_key, y_key : str
+        The node attributes holding the position of each node.
+    size_key : str, optional
+        The node attribute used for the node sizes (e.g. the population). If
+        None, every node gets a size of 1.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray, numpy.ndarray):
+        The (nodes x 2) positions, the (edges x 2) edge endpoints (by node
+        position in the file) and the size attribute of each node.
+    """
+    graph = load_graph(JSON_file)
+    positions = np.column_stack(
+        [
+            graph.node_attribute(x_key, np.float64),
+            graph.node_attribute(y_key, np.float64),
+        ]
+    )
+    if size_key is None:
+        sizes = np.ones(graph.n_nodes)
+    else:
+        sizes = graph.node_attribute(size_key, np.float64)
+    edges = np.asarray(graph.edges)
+    return positions, edges, sizes
+
+
+def draw_dual_graph(
+    ax,
+    positions,
+    edges,
+    node_sizes,
+    node_color="black",
+    edge_color="black",
+    edge_width=1.0,
+    edge_values=None,
+    edge_cmap="viridis",
+    edge_vmin=None,
+    edge_vmax=None,
+):
+    """
+    Draws a dual graph with one artist for all of the edges and one for all of the
+    nodes. The result matches `nx.draw(..., with_labels=False)`.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        The axes to draw on.
+    positions : numpy.ndarray
+        The (nodes x 2) node positions.
+    edges : numpy.ndarray
+        The (edges x 2) edge endpoints.
+    node_sizes : float or array-like
+        The marker area of each node (in points^2, as in `nx.draw`).
+    node_color : color
+        The color of the nodes.
+    edge_color : color
+        The color of the edges when `edge_values` is not given.
+    edge_width : float or array-like
+        The width of each edge.
+    edge_values : array-like, optional
+        A statistic for each edge (e.g. how often it was cut) used to color the
+        edges with `edge_cmap`.
+    edge_cmap : str or matplotlib.colors.Colormap
+        The colormap for `edge_values`.
+    edge_vmin, edge_vmax : float, optional
+        The color limits for `edge_values`.
+
+    Returns
+    -------
+    (matplotlib.collections.LineCollection, matplotlib.collections.PathCollection):
+        The edge and node collections.
+    """
+    segments = positions[edges]
+    edge_collection = LineCollection(segments, linewidths=edge_width, zorder=1)
+    if edge_values is None:
+        edge_collection.set_color(edge_color)
+    else:
+        edge_collection.set_array(np.asarray(edge_values))
+        edge_collection.set_cmap(edge_cmap)
+        edge_collection.set_clim(edge_vmin, edge_vmax)
+    ax.add_collection(edge_collection)
+
+    node_collection = ax.scatter(
+        positions[:, 0],
+        positions[:, 1],
+        s=node_sizes,
+        c=node_color,
+        zorder=2,
+    )
+    ax.autoscale_view()
+    ax.set_axis_off()
+    return edge_collection, node_collection
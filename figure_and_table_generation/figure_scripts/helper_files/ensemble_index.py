@@ -0,0 +1,345 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains functions for random access into the processed ensemble parquet
+files (`_cut_edges.parquet`, `_tallies.parquet` and `_wide_tallies.parquet`).
+
+Each processed file gets a small JSON sidecar (`<file>.index.json`) recording, for
+every row group, the first row, the range of accepted counts, and the first
+proposed step. With this index, reading the first `n_accepted` plans, any range of
+accepted plans, or the plan that was active at proposed step `s` only decodes the
+row groups that contain those plans rather than the entire file.
+"""
+
+import json
+import tempfile
+import numpy as np
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pathlib import Path
+from helper_files.instrumentation import instrument, result_rows
+
+
+def index_path(file):
+    """
+    Returns the path of the index sidecar for a processed ensemble file.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the processed ensemble parquet file.
+
+    Returns
+    -------
+    Path
+        The path to the sidecar, `<file>.index.json`.
+    """
+    file = Path(file)
+    return file.with_name(file.name + ".index.json")
+
+
+def _column_min_max(metadata, rg, name):
+    """
+    Reads the min/max statistics of a column in a row group, if they exist.
+    """
+    row_group = metadata.row_group(rg)
+    for j in range(row_group.num_columns):
+        column = row_group.column(j)
+        if column.path_in_schema == name:
+            stats = column.statistics
+            if stats is not None and stats.has_min_max:
+                return stats.min, stats.max
+            return None
+    raise KeyError(f"Column {name} not found in row group {rg}")
+
+
+def build_index(file, write=True):
+    """
+    Builds the index for a processed ensemble file. The row group statistics are
+    used when they are available; otherwise only the `accepted_count` and `step`
+    columns are read.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the processed ensemble parquet file.
+    write : bool
+        Whether to save the index to the sidecar file.
+
+    Returns
+    -------
+    dict
+        The index.
+    """
+    file = Path(file)
+    parquet_file = pq.ParquetFile(file)
+    metadata = parquet_file.metadata
+
+    row_offsets = []
+    n_rows = []
+    first_accepted = []
+    last_accepted = []
+    first_step = []
+
+    offset = 0
+    for rg in range(metadata.num_row_groups):
+        acc_stats = _column_min_max(metadata, rg, "accepted_count")
+        step_stats = _column_min_max(metadata, rg, "step")
+        if acc_stats is None or step_stats is None:
+            table = parquet_file.read_row_group(rg, columns=["accepted_count", "step"])
+            acc_stats = pc.min_max(table.column("accepted_count")).values()
+            step_stats = pc.min_max(table.column("step")).values()
+            acc_stats = tuple(x.as_py() for x in acc_stats)
+            step_stats = tuple(x.as_py() for x in step_stats)
+
+        row_offsets.append(offset)
+        n_rows.append(metadata.row_group(rg).num_rows)
+        first_accepted.append(int(acc_stats[0]))
+        last_accepted.append(int(acc_stats[1]))
+        first_step.append(int(step_stats[0]))
+        offset += metadata.row_group(rg).num_rows
+
+    total_steps = 0
+    if metadata.num_row_groups > 0:
+        last = parquet_file.read_row_group(
+            metadata.num_row_groups - 1, columns=["step", "n_reps"]
+        )
+        total_steps = int(last.column("step")[-1].as_py()) + int(
+            last.column("n_reps")[-1].as_py()
+        )
+        total_steps -= 1
+
+    stat = file.stat()
+    index = {
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime,
+        "row_offsets": row_offsets,
+        "n_rows": n_rows,
+        "first_accepted": first_accepted,
+        "last_accepted": last_accepted,
+        "first_step": first_step,
+        "total_steps": total_steps,
+    }
+
+    if write:
+        # Written to a unique temporary file and moved into place, so that readers
+        # never see a partly written sidecar.
+        sidecar = index_path(file)
+        with tempfile.NamedTemporaryFile(
+            dir=sidecar.parent, prefix=sidecar.name, suffix=".tmp", delete=False
+        ) as tmp:
+            tmp_file = Path(tmp.name)
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(index, f)
+            tmp_file.replace(sidecar)
+        except BaseException:
+            tmp_file.unlink(missing_ok=True)
+            raise
+
+    return index
+
+
+def load_index(file):
+    """
+    Loads the index for a processed ensemble file, (re)building the sidecar if it
+    is missing, unreadable, or if the parquet file has changed since it was written.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the processed ensemble parquet file.
+
+    Returns
+    -------
+    dict
+        The index.
+    """
+    file = Path(file)
+    sidecar = index_path(file)
+    if sidecar.exists():
+        try:
+            with open(sidecar, "r") as f:
+                index = json.load(f)
+            stat = file.stat()
+            if (
+                index["source_size"] == stat.st_size
+                and index["source_mtime"] == stat.st_mtime
+            ):
+                return index
+        except (json.JSONDecodeError, KeyError):
+            # A truncated or foreign sidecar is rebuilt below.
+            pass
+    return build_index(file)
+
+
+def _row_groups_for_accepted(index, first, last):
+    """
+    Returns the row groups that contain plans with accepted counts in
+    [first, last].
+    """
+    first_acc = np.asarray(index["first_accepted"])
+    last_acc = np.asarray(index["last_accepted"])
+    return np.flatnonzero((first_acc <= last) & (last_acc >= first)).tolist()
+
+
+@instrument(rows=result_rows)
+def read_accepted_range(file, first, last, columns=None):
+    """
+    Reads all of the rows belonging to the plans with accepted counts in the
+    (inclusive) range [first, last].
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the processed ensemble parquet file.
+    first : int
+        The first accepted count to read (accepted counts start at 1).
+    last : int
+        The last accepted count to read.
+    columns : list[str], optional
+        The columns to read. If None, all columns are read.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The rows for the requested plans with a fresh index.
+    """
+    index = load_index(file)
+    parquet_file = pq.ParquetFile(file)
+    row_groups = _row_groups_for_accepted(index, first, last)
+
+    read_columns = columns
+    if columns is not None and "accepted_count" not in columns:
+        read_columns = list(columns) + ["accepted_count"]
+
+    table = parquet_file.read_row_groups(row_groups, columns=read_columns)
+    acc = table.column("accepted_count")
+    mask = pc.and_(pc.greater_equal(acc, first), pc.less_equal(acc, last))
+    table = table.filter(mask)
+    if read_columns is not columns:
+        table = table.drop_columns(["accepted_count"])
+    return table.to_pandas()
+
+
+def read_accepted_prefix(file, n_accepted, columns=None):
+    """
+    Reads the rows for the first `n_accepted` plans of an ensemble. For files with
+    one row per plan this is the same as `pd.read_parquet(file).iloc[:n_accepted]`.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the processed ensemble parquet file.
+    n_accepted : int
+        The number of accepted plans to read.
+    columns : list[str], optional
+        The columns to read. If None, all columns are read.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The rows for the requested plans.
+    """
+    return read_accepted_range(file, 1, n_accepted, columns=columns)
+
+
+def locate_accepted(file, accepted_count):
+    """
+    Finds the location of the first row of a particular accepted plan.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the processed ensemble parquet file.
+    accepted_count : int
+        The accepted count of the plan to locate.
+
+    Returns
+    -------
+    (int, int):
+        The row group containing the plan and the offset of its first row within
+        that row group.
+    """
+    index = load_index(file)
+    row_groups = _row_groups_for_accepted(index, accepted_count, accepted_count)
+    if not row_groups:
+        raise ValueError(f"Accepted count {accepted_count} is not in {file}")
+
+    rg = row_groups[0]
+    acc = (
+        pq.ParquetFile(file)
+        .read_row_group(rg, columns=["accepted_count"])
+        .column(0)
+        .to_numpy()
+    )
+    return rg, int(np.searchsorted(acc, accepted_count, side="left"))
+
+
+def locate_step(file, step):
+    """
+    Finds the location of the plan that was active at a given proposed step. That
+    is, the plan whose `step` is at most `step` and whose `step + n_reps` is
+    greater than `step`.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the processed ensemble parquet file.
+    step : int
+        The proposed step (steps start at 1).
+
+    Returns
+    -------
+    (int, int):
+        The row group containing the plan and the offset of its first row within
+        that row group.
+    """
+    index = load_index(file)
+    if step < 1 or step > index["total_steps"]:
+        raise ValueError(
+            f"Step {step} is outside of the range [1, {index['total_steps']}]"
+        )
+
+    rg = int(np.searchsorted(index["first_step"], step, side="right")) - 1
+    steps = (
+        pq.ParquetFile(file).read_row_group(rg, columns=["step"]).column(0).to_numpy()
+    )
+    # Rows that belong to the same plan share a step, so we move back to the first
+    # row with the matching step.
+    offset = int(np.searchsorted(steps, step, side="right")) - 1
+    offset = int(np.searchsorted(steps, steps[offset], side="left"))
+    return rg, offset
+
+
+def read_plan_at_step(file, step, columns=None):
+    """
+    Reads the rows of the plan that was active at a given proposed step.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path to the processed ensemble parquet file.
+    step : int
+        The proposed step (steps start at 1).
+    columns : list[str], optional
+        The columns to read. If None, all columns are read.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The rows of the plan (one row for cut edge and wide tallies files, one row
+        per key for long tallies files).
+    """
+    rg, offset = locate_step(file, step)
+    parquet_file = pq.ParquetFile(file)
+    read_columns = columns
+    if columns is not None and "step" not in columns:
+        read_columns = list(columns) + ["step"]
+
+    table = parquet_file.read_row_group(rg, columns=read_columns)
+    plan_step = table.column("step")[offset]
+    table = table.filter(pc.equal(table.column("step"), plan_step))
+    if read_columns is not columns:
+        table = table.drop_columns(["step"])
+    return table.to_pandas()
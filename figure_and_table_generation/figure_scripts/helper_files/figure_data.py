@@ -0,0 +1,233 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains functions for saving and loading figure-data artifacts, i.e. the
+exact series that a figure plots, so that the expensive part of a figure script
+(reading the ensembles and computing traces, weighted statistics, etc.) can be run
+separately from the part that draws the figure.
+
+An artifact is a tidy parquet file `figure_and_table_generation/figure_data/<name>.parquet`.
+Its schema metadata records the parameters of the computation, a hash of the code
+that computed it (the script defining the compute function and the loaded
+`helper_files` and shared processing modules) and the size and mtime of each
+source file, so that an artifact is recomputed when the parameters, the code or
+the data change. Sources that are not on disk are not checked, so that the
+artifacts can be rendered on a machine that does not have the ensembles.
+"""
+
+import hashlib
+import inspect
+import json
+import sys
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from helper_files.instrumentation import arg_rows, instrument, result_rows
+
+FIGURE_DATA_DIR = Path(__file__).resolve().parents[2].joinpath("figure_data")
+FIGURE_DATA_KEY = b"rrc_figure_data"
+# The folders whose loaded modules count as the code of a computation.
+helper_dir = Path(__file__).resolve().parent
+CODE_DIRS = (
+    helper_dir,
+    helper_dir.parents[2].joinpath("data_processing/other_processing_scripts"),
+)
+
+
+def figure_data_path(name):
+    """
+    Returns the path of the figure-data artifact with the given name.
+    """
+    return FIGURE_DATA_DIR.joinpath(f"{name}.parquet")
+
+
+def _source_info(sources):
+    info = []
+    for source in sources:
+        source = Path(source).resolve()
+        stat = source.stat()
+        info.append({"path": str(source), "size": stat.st_size, "mtime": stat.st_mtime})
+    return info
+
+
+def code_digest(compute):
+    """
+    Returns the SHA-256 hash of the code behind a compute function, i.e. of the
+    file defining it and of every loaded module from the `CODE_DIRS`.
+
+    Parameters
+    ----------
+    compute : callable
+        The compute function.
+
+    Returns
+    -------
+    str
+        The hex digest.
+    """
+    files = set()
+    try:
+        source = inspect.getsourcefile(compute)
+    except TypeError:
+        source = None
+    if source is not None and Path(source).is_file():
+        files.add(Path(source).resolve())
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path is not None and Path(path).resolve().parent in CODE_DIRS:
+            files.add(Path(path).resolve())
+
+    sha = hashlib.sha256()
+    for file in sorted(files):
+        sha.update(file.name.encode())
+        sha.update(file.read_bytes())
+    return sha.hexdigest()
+
+
+@instrument(rows=arg_rows(1, "data"))
+def save_figure_data(name, data, sources=(), params=None, code=None):
+    """
+    Saves the data of a figure.
+
+    Parameters
+    ----------
+    name : str
+        The name of the artifact.
+    data : pandas.DataFrame
+        The tidy data that the figure plots.
+    sources : list[str or Path]
+        The files the data was computed from.
+    params : dict, optional
+        The (JSON serializable) parameters of the computation.
+    code : str, optional
+        The hash of the code of the computation (see `code_digest`).
+
+    Returns
+    -------
+    Path
+        The path to the artifact.
+    """
+    info = {"sources": _source_info(sources), "params": params or {}, "code": code}
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[FIGURE_DATA_KEY] = json.dumps(info)
+    table = table.replace_schema_metadata(metadata)
+
+    out_file = figure_data_path(name)
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=out_file.parent, prefix=out_file.name, suffix=".tmp", delete=False
+    ) as tmp:
+        tmp_file = Path(tmp.name)
+    try:
+        pq.write_table(table, tmp_file)
+        tmp_file.replace(out_file)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+    return out_file
+
+
+def is_stale(name, sources=(), params=None, code=None):
+    """
+    Checks whether an artifact is missing or out of date, i.e. whether it was
+    computed with other parameters or other code, or a source file that is on disk
+    has changed since.
+
+    Parameters
+    ----------
+    name : str
+        The name of the artifact.
+    sources : list[str or Path]
+        The files the data is computed from.
+    params : dict, optional
+        The parameters of the computation.
+    code : str, optional
+        The hash of the code of the computation (see `code_digest`).
+
+    Returns
+    -------
+    bool
+        Whether the artifact has to be recomputed.
+    """
+    data_file = figure_data_path(name)
+    if not data_file.exists():
+        return True
+
+    metadata = pq.read_schema(data_file).metadata or {}
+    if FIGURE_DATA_KEY not in metadata:
+        return True
+    info = json.loads(metadata[FIGURE_DATA_KEY])
+    if info["params"] != json.loads(json.dumps(params or {})):
+        return True
+    if info.get("code") != code:
+        return True
+
+    recorded = {source["path"]: source for source in info["sources"]}
+    for source in sources:
+        source = Path(source).resolve()
+        if not source.exists():
+            continue
+        old = recorded.get(str(source))
+        stat = source.stat()
+        if old is None or old["size"] != stat.st_size or old["mtime"] != stat.st_mtime:
+            return True
+    return False
+
+
+@instrument(rows=result_rows)
+def load_figure_data(name):
+    """
+    Loads the data of a figure.
+
+    Parameters
+    ----------
+    name : str
+        The name of the artifact.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The tidy data that the figure plots.
+    """
+    data_file = figure_data_path(name)
+    if not data_file.exists():
+        raise FileNotFoundError(
+            f"No figure data at {data_file}. Run the compute stage first."
+        )
+    return pd.read_parquet(data_file)
+
+
+def figure_data(name, compute, sources=(), params=None, stage="all"):
+    """
+    Returns the data of a figure, running the compute stage only when needed.
+
+    Parameters
+    ----------
+    name : str
+        The name of the artifact.
+    compute : callable
+        Called without arguments to compute the data as a pandas.DataFrame.
+    sources : list[str or Path]
+        The files the data is computed from.
+    params : dict, optional
+        The parameters of the computation.
+    stage : str
+        "all" to recompute the data if it is stale, "compute" to always
+        recompute it, or "render" to only load the saved data.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The tidy data that the figure plots.
+    """
+    if stage == "render":
+        return load_figure_data(name)
+    code = code_digest(compute)
+    if stage == "compute" or is_stale(name, sources, params, code):
+        data = compute()
+        save_figure_data(name, data, sources, params, code)
+        return data
+    return load_figure_data(name)
@@ -0,0 +1,387 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains the stage-level instrumentation of the figure scripts. A stage
+is a named part of a run (reading an ensemble, computing a trace, saving a figure,
+...) and `stage` records its wall time, CPU time, the peak resident memory of the
+process when it ends and the number of rows it processed:
+
+    with stage("read tallies") as s:
+        df = pd.read_parquet(file)
+        s.add_rows(len(df))
+
+    @instrument(rows=arg_rows(0))
+    def get_weighted_stats(array, weights):
+        ...
+
+The loaders, the trace functions, the weighted statistics and the save calls in
+`helper_files` are instrumented this way. Nothing is recorded unless a profile is
+requested through the environment, so the instrumentation costs one function
+call per stage otherwise:
+
+    RRC_PROFILE=profile.json        writes every stage and a per-stage summary
+    RRC_PROFILE=profile.trace.json  writes a Chrome trace (chrome://tracing or
+                                    https://ui.perfetto.dev) of the nested stages
+    RRC_PROFILE_SAMPLE=5            also samples the Python stack every 5 ms
+                                    inside the stages marked `sample=True` (the
+                                    hot loops) and writes the samples as folded
+                                    stacks to `<profile>.folded` for flame graphs
+
+A summary table of the stages is printed to stderr at the end of a profiled run.
+Stages run in pool workers are written to `<profile>.<pid>.json` by each worker.
+"""
+
+import atexit
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+PROFILE_ENV = "RRC_PROFILE"
+SAMPLE_ENV = "RRC_PROFILE_SAMPLE"
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class SamplingProfiler:
+    """
+    A sampling profiler that records the Python stack of one thread at a fixed
+    interval from a background thread.
+
+    Parameters
+    ----------
+    interval : float
+        The time between samples in seconds.
+    thread_id : int, optional
+        The thread to sample. Defaults to the thread that calls `start`.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stack(self, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{Path(code.co_filename).name}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._stack(frame)] += 1
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def folded(self):
+        """
+        Returns the samples as folded stacks, one `frame;frame;... count` line per
+        distinct stack, as read by flamegraph.pl and speedscope.
+        """
+        return "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+
+class _Recorder:
+    """
+    Collects the stages of a profiled run and writes them out at exit.
+    """
+
+    def __init__(self, path, sample_interval=None):
+        self.path = Path(path) if path else None
+        self.sample_interval = sample_interval
+        self.pid = os.getpid()
+        self.start = time.perf_counter()
+        self.events = []
+        self.events_pid = self.pid
+        self.samples = Counter()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def stack(self):
+        # The stack of open stages of the current thread (of this process, as a
+        # forked worker inherits the stack of the thread that forked it).
+        if getattr(self.local, "pid", None) != os.getpid():
+            self.local.stack = []
+            self.local.pid = os.getpid()
+        return self.local.stack
+
+    def add(self, event, samples=None):
+        with self.lock:
+            if event["pid"] != self.events_pid:
+                # A forked worker starts with a copy of the stages of its parent.
+                self.events_pid = event["pid"]
+                self.events = []
+                self.samples = Counter()
+            self.events.append(event)
+            if samples:
+                self.samples.update(samples)
+
+    def summary(self):
+        summary = {}
+        for event in self.events:
+            entry = summary.setdefault(
+                event["name"],
+                {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "rows": 0, "peak_rss_mb": 0},
+            )
+            entry["calls"] += 1
+            entry["wall_s"] += event["wall_s"]
+            entry["cpu_s"] += event["cpu_s"]
+            entry["rows"] += event["rows"] or 0
+            entry["peak_rss_mb"] = max(entry["peak_rss_mb"], event["peak_rss_mb"])
+        return summary
+
+    def _out_path(self):
+        if self.path is None or os.getpid() == self.pid:
+            return self.path
+        # Forked pool workers write their own files next to the main profile.
+        name = self.path.name
+        stem = (
+            name[: -len(".trace.json")]
+            if name.endswith(".trace.json")
+            else self.path.stem
+        )
+        suffix = name[len(stem) :]
+        return self.path.with_name(f"{stem}.{os.getpid()}{suffix}")
+
+    def write(self):
+        out_path = self._out_path()
+        if out_path is not None:
+            if out_path.name.endswith(".trace.json"):
+                doc = {
+                    "traceEvents": [
+                        {
+                            "name": event["name"],
+                            "cat": "stage",
+                            "ph": "X",
+                            "ts": event["start_s"] * 1e6,
+                            "dur": event["wall_s"] * 1e6,
+                            "pid": event["pid"],
+                            "tid": event["tid"],
+                            "args": {
+                                "cpu_s": event["cpu_s"],
+                                "rows": event["rows"],
+                                "peak_rss_mb": event["peak_rss_mb"],
+                            },
+                        }
+                        for event in self.events
+                    ],
+                    "displayTimeUnit": "ms",
+                }
+            else:
+                doc = {"stages": self.events, "summary": self.summary()}
+            with open(out_path, "w") as f:
+                json.dump(doc, f, indent=1)
+
+            if self.samples:
+                folded_path = out_path.with_name(out_path.name + ".folded")
+                with open(folded_path, "w") as f:
+                    for stack, n in self.samples.most_common():
+                        f.write(f"{stack} {n}\n")
+
+    def report(self, file=sys.stderr):
+        summary = self.summary()
+        if not summary:
+            return
+        print(
+            f"{'stage':<40} {'calls':>7} {'wall (s)':>10} {'cpu (s)':>10} "
+            f"{'rows':>14} {'peak RSS (MB)':>14}",
+            file=file,
+        )
+        for name, entry in sorted(summary.items(), key=lambda kv: -kv[1]["wall_s"]):
+            print(
+                f"{name:<40} {entry['calls']:>7} {entry['wall_s']:>10.3f} "
+                f"{entry['cpu_s']:>10.3f} {entry['rows']:>14,} "
+                f"{entry['peak_rss_mb']:>14.1f}",
+                file=file,
+            )
+        if self.samples and self.path is None:
+            print("\nMost sampled stacks:", file=file)
+            for stack, n in self.samples.most_common(10):
+                print(f"{n:>7}  {stack.split(';')[-1]}", file=file)
+
+
+def _make_recorder():
+    path = os.environ.get(PROFILE_ENV)
+    interval = os.environ.get(SAMPLE_ENV)
+    if not path and not interval:
+        return None
+    recorder = _Recorder(path, float(interval) / 1000 if interval else None)
+
+    def finish():
+        if os.getpid() == recorder.pid:
+            recorder.write()
+            recorder.report()
+
+    atexit.register(finish)
+    return recorder
+
+
+_recorder = _make_recorder()
+
+
+def profiling_enabled():
+    """
+    Returns whether stages are being recorded.
+    """
+    return _recorder is not None
+
+
+class stage:
+    """
+    Records the wall time, CPU time, peak resident memory and rows processed of a
+    named stage of a run. Can be used as a context manager or as a decorator.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage.
+    rows : int, optional
+        The number of rows processed, if known up front. Rows can also be added
+        while the stage runs with `add_rows`.
+    sample : bool
+        Whether to run the sampling profiler in this stage when `RRC_PROFILE_SAMPLE`
+        is set. Meant for hot Python loops.
+    """
+
+    def __init__(self, name, rows=None, sample=False):
+        self.name = name
+        self.rows = rows
+        self.sample = sample
+        self._sampler = None
+
+    def add_rows(self, n):
+        self.rows = (self.rows or 0) + int(n)
+
+    def __enter__(self):
+        if _recorder is None:
+            return self
+        _recorder.stack().append(self.name)
+        if self.sample and _recorder.sample_interval:
+            self._sampler = SamplingProfiler(_recorder.sample_interval).start()
+        self._start_cpu = time.process_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if _recorder is None:
+            return False
+        end = time.perf_counter()
+        cpu = time.process_time() - self._start_cpu
+        samples = None
+        if self._sampler is not None:
+            samples = self._sampler.stop().samples
+            self._sampler = None
+        stack = _recorder.stack()
+        stack.pop()
+        _recorder.add(
+            {
+                "name": self.name,
+                "parent": stack[-1] if stack else None,
+                "start_s": self._start - _recorder.start,
+                "wall_s": end - self._start,
+                "cpu_s": cpu,
+                "rows": self.rows,
+                "peak_rss_mb": _peak_rss_mb(),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            },
+            samples,
+        )
+        if not stack and os.getpid() != _recorder.pid:
+            _recorder.write()
+        return False
+
+    def __call__(self, func):
+        return instrument(self.name, sample=self.sample)(func)
+
+
+def result_rows(result, *args, **kwargs):
+    """
+    Counts the rows of a stage as the length of the result of the function.
+    """
+    return len(result)
+
+
+def arg_rows(position, name=None):
+    """
+    Counts the rows of a stage as the length of one of the arguments of the
+    function, given by its position or (when passed as a keyword) its name.
+    """
+
+    def rows(result, *args, **kwargs):
+        if len(args) > position:
+            return len(args[position])
+        if name is not None and name in kwargs:
+            return len(kwargs[name])
+        return None
+
+    return rows
+
+
+def instrument(name=None, rows=None, sample=False):
+    """
+    Decorates a function so that each call is recorded as a stage.
+
+    Parameters
+    ----------
+    name : str, optional
+        The name of the stage. Defaults to the name of the function.
+    rows : callable, optional
+        Called with the result and the arguments of the function to count the
+        rows processed, e.g. `result_rows` or `arg_rows(0)`.
+    sample : bool
+        Whether to run the sampling profiler in the stage (see `stage`).
+    """
+
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return func(*args, **kwargs)
+            with stage(stage_name, sample=sample) as s:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    n = rows(result, *args, **kwargs)
+                    if n is not None:
+                        s.add_rows(n)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -2,8 +2,10 @@ import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 from matplotlib.lines import Line2D
 import numpy as np
+from helper_files.instrumentation import instrument
 
 
+@instrument()
 def save_legend_png(
     handles,
     filename,
@@ -0,0 +1,187 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains functions for reading and writing node-level values (e.g. the
+normalized changed-assignment counts used in the heatmaps) in a binary format.
+
+The values are stored in a single-column parquet file whose footer also records
+the min and max of the values under the key `rrc_node_values`, so the global color
+limits of a multi-panel heatmap can be found by reading only the footers. The
+`_changed_assignments.txt` files written by `ben-tally` are converted to this
+format the first time they are read, and the converted file
+(`<name>_changed_assignments.parquet`) is reused until the text file changes.
+`data_processing/other_processing_scripts/flip_frequencies.py` can also write these
+parquet files directly with `--heatmap-dir`.
+"""
+
+import json
+from glob import glob
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+NODE_VALUES_KEY = b"rrc_node_values"
+
+
+def write_node_values(file, values, **metadata):
+    """
+    Writes a vector of node values along with its min and max.
+
+    Parameters
+    ----------
+    file : str or Path
+        The path of the parquet file to write.
+    values : array-like
+        The value of each node, in node order.
+    **metadata
+        Any other JSON-serializable information to store in the footer.
+
+    Returns
+    -------
+    None
+    """
+    values = np.asarray(values, dtype=np.float64)
+    metadata = dict(metadata)
+    metadata["n_nodes"] = len(values)
+    metadata["min"] = float(values.min()) if len(values) else None
+    metadata["max"] = float(values.max()) if len(values) else None
+
+    table = pa.table({"value": values})
+    table = table.replace_schema_metadata({NODE_VALUES_KEY: json.dumps(metadata)})
+    pq.write_table(table, file)
+
+
+def _read_changed_assignments_txt(file):
+    """
+    Parses a `_changed_assignments.txt` file written by `ben-tally`. The first line
+    is the list of values and the second line is "Total Accepted: <n>".
+    """
+    with open(file, "r") as f:
+        values = np.array(json.loads(f.readline()), dtype=np.float64)
+        total_line = f.readline()
+    metadata = {}
+    if total_line.startswith("Total Accepted:"):
+        metadata["total_accepted"] = int(total_line.split(":")[1])
+    return values, metadata
+
+
+def node_values_file(file):
+    """
+    Returns the binary node values file for a heatmap input, converting a
+    `ben-tally` text file to parquet if it has not been converted yet (or if it
+    has changed since it was converted). A `.parquet` file with a `.txt` file of
+    the same name is treated as the converted text file.
+
+    Parameters
+    ----------
+    file : str or Path
+        A `.txt`, `.parquet` or `.npy` node values file.
+
+    Returns
+    -------
+    Path
+        The `.parquet` or `.npy` file holding the values.
+    """
+    file = Path(file)
+    if file.suffix == ".parquet" and file.with_suffix(".txt").exists():
+        file = file.with_suffix(".txt")
+    if file.suffix != ".txt":
+        return file
+
+    binary_file = file.with_suffix(".parquet")
+    if not binary_file.exists() or binary_file.stat().st_mtime < file.stat().st_mtime:
+        values, metadata = _read_changed_assignments_txt(file)
+        write_node_values(binary_file, values, source=file.name, **metadata)
+    return binary_file
+
+
+def read_node_values(file):
+    """
+    Reads a vector of node values.
+
+    Parameters
+    ----------
+    file : str or Path
+        A `.txt`, `.parquet` or `.npy` node values file.
+
+    Returns
+    -------
+    numpy.ndarray
+        The value of each node.
+    """
+    file = node_values_file(file)
+    if file.suffix == ".npy":
+        return np.load(file)
+    return pq.read_table(file, columns=["value"]).column(0).to_numpy()
+
+
+def node_value_range(file):
+    """
+    Returns the min and max of a vector of node values. For parquet files these
+    are read from the footer without reading the values.
+
+    Parameters
+    ----------
+    file : str or Path
+        A `.txt`, `.parquet` or `.npy` node values file.
+
+    Returns
+    -------
+    (float, float):
+        The min and max of the values.
+    """
+    file = node_values_file(file)
+    if file.suffix == ".npy":
+        values = np.load(file, mmap_mode="r")
+        return float(values.min()), float(values.max())
+
+    metadata = pq.read_schema(file).metadata
+    if metadata is not None and NODE_VALUES_KEY in metadata:
+        info = json.loads(metadata[NODE_VALUES_KEY])
+        return info["min"], info["max"]
+    values = read_node_values(file)
+    return float(values.min()), float(values.max())
+
+
+def global_value_range(files):
+    """
+    Returns the min and max over several vectors of node values, e.g. for the
+    shared color limits of a multi-panel heatmap.
+
+    Parameters
+    ----------
+    files : list[str or Path]
+        The node values files.
+
+    Returns
+    -------
+    (float, float):
+        The smallest min and the largest max of the files.
+    """
+    ranges = [node_value_range(file) for file in files]
+    return min(r[0] for r in ranges), max(r[1] for r in ranges)
+
+
+def glob_node_value_files(pattern):
+    """
+    Finds the node values files matching a glob pattern (given without a suffix),
+    preferring the text file when one exists for a name, so that its converted
+    parquet file is checked against it (see `node_values_file`), and the parquet
+    file over the `.npy` file otherwise.
+
+    Parameters
+    ----------
+    pattern : str
+        The glob pattern without a suffix, e.g. "<dir>/square*changed_assignments".
+
+    Returns
+    -------
+    list[str]
+        The sorted list of matching files.
+    """
+    files = {}
+    for suffix in (".npy", ".parquet", ".txt"):
+        for file in glob(pattern + suffix):
+            files[str(Path(file).with_suffix(""))] = file
+    return sorted(files.values())
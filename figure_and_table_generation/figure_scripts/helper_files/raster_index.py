@@ -0,0 +1,263 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains functions for drawing node-level heatmaps as raster images. A
+raster index, mapping each pixel of an image of the map to the node that covers it
+(or -1 for background), is built once from a shapefile and cached next to it as
+`<name>.raster_<width>x<height>.npz`. Drawing a frame is then a lookup of the
+node colors with `colors[pixel_to_node]`, so long time-lapses of statewide maps can
+be written without rendering any polygons.
+"""
+
+import json
+import numpy as np
+import pyarrow.parquet as pq
+from matplotlib import colormaps
+from pathlib import Path
+from PIL import Image
+
+from helper_files.choropleth import _resolve_shapefile, load_geometry_paths
+
+_SAMPLE_OFFSET = 0.5 + 1e-3
+
+
+def raster_index_path(shapefile, width, height):
+    """
+    Returns the path of the cached raster index of a shapefile.
+
+    Parameters
+    ----------
+    shapefile : str or Path
+        The path to the `.shp` file, or to a directory holding a single `.shp` file.
+    width, height : int
+        The size of the raster in pixels.
+
+    Returns
+    -------
+    Path
+        The path to the cache, `<name>.raster_<width>x<height>.npz`.
+    """
+    shapefile = _resolve_shapefile(shapefile)
+    return shapefile.with_suffix(f".raster_{width}x{height}.npz")
+
+
+def _raster_shape(paths, width, height):
+    vertices = np.concatenate([path.vertices for path in paths])
+    lo = vertices.min(axis=0)
+    hi = vertices.max(axis=0)
+    if height is None:
+        height = max(1, int(round(width * (hi[1] - lo[1]) / (hi[0] - lo[0]))))
+    return lo, hi, int(width), int(height)
+
+
+def build_raster_index(shapefile, width, height=None, write=True):
+    """
+    Builds the raster index of a shapefile by testing which node contains the
+    center of each pixel. Each node only tests the pixels in its bounding box.
+
+    Parameters
+    ----------
+    shapefile : str or Path
+        The path to the `.shp` file, or to a directory holding a single `.shp` file.
+    width : int
+        The width of the raster in pixels.
+    height : int, optional
+        The height of the raster in pixels. Defaults to the height that keeps the
+        aspect ratio of the map.
+    write : bool
+        Whether to save the index next to the shapefile.
+
+    Returns
+    -------
+    numpy.ndarray
+        A (height x width) int32 array with the node of each pixel (row 0 is the
+        top of the map) and -1 for pixels outside of the map.
+    """
+    shapefile = _resolve_shapefile(shapefile)
+    paths = load_geometry_paths(shapefile)
+    lo, hi, width, height = _raster_shape(paths, width, height)
+    pixel_size = (hi - lo) / np.array([width, height])
+
+    pixel_to_node = np.full((height, width), -1, dtype=np.int32)
+    for node, path in enumerate(paths):
+        (x0, y0), (x1, y1) = path.vertices.min(axis=0), path.vertices.max(axis=0)
+        cols = np.arange(
+            max(int((x0 - lo[0]) / pixel_size[0]), 0),
+            min(int(np.ceil((x1 - lo[0]) / pixel_size[0])), width),
+        )
+        rows = np.arange(
+            max(int((y0 - lo[1]) / pixel_size[1]), 0),
+            min(int(np.ceil((y1 - lo[1]) / pixel_size[1])), height),
+        )
+        if len(cols) == 0 or len(rows) == 0:
+            continue
+        grid_cols, grid_rows = np.meshgrid(cols, rows)
+        # The sample points are nudged off of the pixel centers, which would
+        # otherwise land exactly on the shared edges of grid-aligned maps.
+        centers = np.column_stack(
+            [
+                lo[0] + (grid_cols.ravel() + _SAMPLE_OFFSET) * pixel_size[0],
+                lo[1] + (grid_rows.ravel() + _SAMPLE_OFFSET) * pixel_size[1],
+            ]
+        )
+        inside = path.contains_points(centers)
+        pixel_to_node[
+            height - 1 - grid_rows.ravel()[inside], grid_cols.ravel()[inside]
+        ] = node
+
+    if write:
+        stat = shapefile.stat()
+        np.savez(
+            raster_index_path(shapefile, width, height),
+            pixel_to_node=pixel_to_node,
+            source_size=np.int64(stat.st_size),
+            source_mtime=np.float64(stat.st_mtime),
+        )
+    return pixel_to_node
+
+
+def load_raster_index(shapefile, width, height=None):
+    """
+    Loads the raster index of a shapefile, (re)building it if it is missing or if
+    the shapefile has changed since it was written.
+
+    Parameters
+    ----------
+    shapefile : str or Path
+        The path to the `.shp` file, or to a directory holding a single `.shp` file.
+    width : int
+        The width of the raster in pixels.
+    height : int, optional
+        The height of the raster in pixels. Defaults to the height that keeps the
+        aspect ratio of the map.
+
+    Returns
+    -------
+    numpy.ndarray
+        The (height x width) pixel-to-node array.
+    """
+    shapefile = _resolve_shapefile(shapefile)
+    if height is None:
+        _, _, width, height = _raster_shape(load_geometry_paths(shapefile), width, None)
+
+    cache_file = raster_index_path(shapefile, width, height)
+    if cache_file.exists():
+        cache = np.load(cache_file)
+        stat = shapefile.stat()
+        if (
+            cache["source_size"] == stat.st_size
+            and cache["source_mtime"] == stat.st_mtime
+        ):
+            return cache["pixel_to_node"]
+    return build_raster_index(shapefile, width, height)
+
+
+def render_frame(
+    pixel_to_node, values, cmap="viridis", vmin=None, vmax=None, background=None
+):
+    """
+    Colors a raster of the map by node values.
+
+    Parameters
+    ----------
+    pixel_to_node : numpy.ndarray
+        The raster index returned by `load_raster_index`.
+    values : array-like
+        The value of each node.
+    cmap : str or matplotlib.colors.Colormap
+        The colormap to use. Values are binned into its 256 colors.
+    vmin, vmax : float, optional
+        The color limits. Default to the range of the values.
+    background : tuple[int], optional
+        The RGBA color of pixels outside of the map. Defaults to transparent.
+
+    Returns
+    -------
+    numpy.ndarray
+        A (height x width x 4) uint8 RGBA image.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    vmin = values.min() if vmin is None else vmin
+    vmax = values.max() if vmax is None else vmax
+    if isinstance(cmap, str):
+        cmap = colormaps[cmap]
+
+    lut = (cmap(np.linspace(0.0, 1.0, 256)) * 255).round().astype(np.uint8)
+    scale = 255 / (vmax - vmin) if vmax > vmin else 0.0
+    bins = np.clip(((values - vmin) * scale).astype(np.int64), 0, 255)
+
+    # The background color goes last so that the -1 entries of the index pick it.
+    node_colors = np.vstack(
+        [lut[bins], np.array(background or (0, 0, 0, 0), dtype=np.uint8)]
+    )
+    return node_colors[pixel_to_node]
+
+
+def iter_flip_frequency_frames(flip_file, kind="accept"):
+    """
+    Iterates over the windows of a flip frequency file written by
+    `data_processing/other_processing_scripts/flip_frequencies.py` in order of
+    size, e.g. one frame per 100k accepted plans when the file was made with
+    windows of 100k, 200k, ... accepted plans.
+
+    Parameters
+    ----------
+    flip_file : str or Path
+        The path to the flip frequency parquet file.
+    kind : str
+        The kind of window to use ("accept" or "step").
+
+    Yields
+    ------
+    (dict, numpy.ndarray):
+        The window metadata and the normalized change frequency of each node.
+    """
+    table = pq.read_table(flip_file)
+    windows = json.loads(table.schema.metadata[b"rrc_flip_windows"])
+    windows = sorted((w for w in windows if w["kind"] == kind), key=lambda w: w["size"])
+    for window in windows:
+        counts = table.column(window["name"]).to_numpy()
+        yield window, counts / max(window["n_transitions"], 1)
+
+
+def write_timelapse(frames, out_file, fps=10):
+    """
+    Writes a sequence of RGBA frames either as an animated GIF (if `out_file` ends
+    with ".gif") or as numbered PNG files in the directory `out_file`.
+
+    Parameters
+    ----------
+    frames : iterable[numpy.ndarray]
+        The (height x width x 4) uint8 frames.
+    out_file : str or Path
+        The GIF file or the directory to write the frames to.
+    fps : int
+        The frame rate of the GIF.
+
+    Returns
+    -------
+    int
+        The number of frames written.
+    """
+    out_file = Path(out_file)
+    if out_file.suffix == ".gif":
+        images = [Image.fromarray(frame) for frame in frames]
+        if images:
+            images[0].save(
+                out_file,
+                save_all=True,
+                append_images=images[1:],
+                duration=int(1000 / fps),
+                loop=0,
+                disposal=2,
+            )
+        return len(images)
+
+    out_file.mkdir(parents=True, exist_ok=True)
+    n_frames = 0
+    for i, frame in enumerate(frames):
+        Image.fromarray(frame).save(
+            out_file.joinpath(f"frame_{i:05d}.png"), compress_level=1
+        )
+        n_frames += 1
+    return n_frames
@@ -10,8 +10,10 @@ from collections import Counter, defaultdict
 from scipy.stats import wasserstein_distance
 from tqdm import tqdm
 import numpy as np
+from helper_files.instrumentation import arg_rows, instrument
 
 
+@instrument(rows=arg_rows(0, "counts1"), sample=True)
 def wasserstein_trace(counts1, counts2, weights1, weights2, resolution):
     """
     Computes the ongoing Wasserstein trace between two ensembles of maps. That is,
@@ -57,6 +59,7 @@ def wasserstein_trace(counts1, counts2, weights1, weights2, resolution):
     return xticks, trace
 
 
+@instrument(rows=arg_rows(0, "counts"), sample=True)
 def wasserstein_trace_ground_truth(
     counts, ref_counts, weights, ref_weights, resolution
 ):
@@ -100,6 +103,7 @@ def wasserstein_trace_ground_truth(
     return xticks, trace
 
 
+@instrument(rows=arg_rows(0, "shares_df"), sample=True)
 def wasserstein_trace_v_full(
     shares_df, full_df, weights, weights_full, resolution=10_000
 ):
@@ -171,6 +175,7 @@ def wasserstein_trace_v_full(
     return xticks, trace
 
 
+@instrument(rows=arg_rows(0, "shares1_df"), sample=True)
 def wasserstein_trace_shares(shares1_df, shares2_df, weights1, weights2, resolution):
     """
     Computes the Wasserstein trace between a full ensemble and an ongoing ensemble.
@@ -239,6 +244,7 @@ def wasserstein_trace_shares(shares1_df, shares2_df, weights1, weights2, resolut
     return xticks, trace
 
 
+@instrument(rows=arg_rows(0, "shares1_df"), sample=True)
 def wasserstein_trace_shares(shares1_df, shares2_df, weights1, weights2, resolution):
     """
     Computes the Wasserstein trace between a full ensemble and an ongoing ensemble.
@@ -0,0 +1,138 @@
+"""
+Last Updated: 19-10-2026
+
+This file contains functions for reading the wide-format tallies files written by
+`data_processing/other_processing_scripts/compact_tallies.py`. These files have
+one row per plan and `{key}_d{NN}` columns, and they store the first
+`accepted_count` of each row group in the parquet footer so that prefixes of the
+chain can be read without decoding the whole file.
+"""
+
+import json
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+ACCEPTED_INDEX_KEY = b"rrc_accepted_index"
+
+
+def read_accepted_index(file):
+    """
+    Reads the accepted-count index stored in the footer of a wide tallies file.
+
+    Parameters
+    ----------
+    file : str or Path or pyarrow.parquet.ParquetFile
+        The wide tallies file.
+
+    Returns
+    -------
+    dict or None
+        A dictionary with the lists "accepted_count" and "step" giving the first
+        accepted count and step of each row group, or None if the file has no
+        index.
+    """
+    parquet_file = file if isinstance(file, pq.ParquetFile) else pq.ParquetFile(file)
+    metadata = parquet_file.metadata.metadata or {}
+    if ACCEPTED_INDEX_KEY not in metadata:
+        return None
+    return json.loads(metadata[ACCEPTED_INDEX_KEY])
+
+
+def read_wide_tallies(file, n_accepted=None, columns=None):
+    """
+    Reads the first `n_accepted` plans of a wide tallies file. This is
+    equivalent to `pd.read_parquet(file).iloc[:n_accepted]`, but only the row
+    groups that contain those plans are decoded.
+
+    Parameters
+    ----------
+    file : str or Path
+        The wide tallies file.
+    n_accepted : int, optional
+        The number of accepted plans to read. If None, the whole file is read.
+    columns : list[str], optional
+        The columns to read. If None, all columns are read.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The requested plans.
+    """
+    parquet_file = pq.ParquetFile(file)
+    index = read_accepted_index(parquet_file)
+
+    if n_accepted is None:
+        return parquet_file.read(columns=columns).to_pandas()
+
+    if index is None:
+        row_groups = range(parquet_file.num_row_groups)
+    else:
+        # Accepted counts are 1-indexed, so the i-th row group is needed
+        # whenever it starts at or before plan `n_accepted`.
+        n_groups = int(
+            np.searchsorted(index["accepted_count"], n_accepted, side="right")
+        )
+        row_groups = range(max(n_groups, 1))
+
+    table = parquet_file.read_row_groups(list(row_groups), columns=columns)
+    return table.slice(0, n_accepted).to_pandas()
+
+
+def wide_key_columns(columns, key):
+    """
+    Returns the sorted district columns for a particular key.
+
+    Parameters
+    ----------
+    columns : iterable of str
+        The columns of a wide tallies file.
+    key : str
+        The tallied key (e.g. "G16DPRS").
+
+    Returns
+    -------
+    list[str]
+        The columns `{key}_d01`, `{key}_d02`, ... in district order.
+    """
+    prefix = f"{key}_d"
+    # Sorted by the district number, since the two digit labels stop sorting as
+    # strings past district 99 (`_d100` < `_d11`).
+    found = [
+        (int(c[len(prefix) :]), c)
+        for c in columns
+        if c.startswith(prefix) and c[len(prefix) :].isdigit()
+    ]
+    return [c for _, c in sorted(found)]
+
+
+def wide_shares(df, dem_key, rep_key):
+    """
+    Computes the Democratic vote share in each district of each plan of a
+    wide tallies dataframe.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        A dataframe read from a wide tallies file.
+    dem_key : str
+        The key holding the Democratic votes (e.g. "G16DPRS").
+    rep_key : str
+        The key holding the Republican votes (e.g. "G16RPRS").
+
+    Returns
+    -------
+    pandas.DataFrame
+        The vote shares with columns `district_01`, `district_02`, ...
+    """
+    dem_cols = wide_key_columns(df.columns, dem_key)
+    rep_cols = wide_key_columns(df.columns, rep_key)
+    assert len(dem_cols) == len(rep_cols)
+
+    dem = df[dem_cols].to_numpy(dtype=np.float64)
+    rep = df[rep_cols].to_numpy(dtype=np.float64)
+    return pd.DataFrame(
+        dem / (dem + rep),
+        columns=[f"district_{c[len(dem_key) + 2 :]}" for c in dem_cols],
+        index=df.index,
+    )
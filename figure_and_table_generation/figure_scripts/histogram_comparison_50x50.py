@@ -6,12 +6,17 @@ This script is used to generate the histograms for comparing the 50x50 cut edge
 for Forest ReCom and Reversible ReCom.
 """
 
-import pandas as pd
-from glob import glob
+import sys
 import seaborn as sns
 import matplotlib.pyplot as plt
 from pathlib import Path
 from helper_files.legend_saver import save_legend_png, box_handles
+from helper_files.cut_edge_histograms import cut_edge_percentages
+
+# The shared modules live with the processing scripts.
+processing_dir = Path(__file__).resolve().parents[2].joinpath("data_processing")
+sys.path.append(str(processing_dir.joinpath("other_processing_scripts")))
+from ensemble_catalog import catalog_paths, find_ensembles, load_catalog
 
 colors = [
     "#0099cd",
@@ -59,13 +64,11 @@ def make_method_plot(rrc_forest, lower, upper, n_dists, methods="forest_rrc"):
     _, ax = plt.subplots(figsize=(25, 10), dpi=400)
 
     for i, (n, f) in enumerate(rrc_forest.items()):
-        df = pd.read_parquet(f)
-        prob_df = df.groupby("cut_edges").sum().reset_index()
-        prob_df["prob"] = 100 * (prob_df["n_reps"] / prob_df["n_reps"].sum())
+        cut_edges, prob = cut_edge_percentages(f)
 
         ax.bar(
-            prob_df["cut_edges"],
-            prob_df["prob"],
+            cut_edges,
+            prob,
             width=1,
             edgecolor=None,
             color=colors[i],
@@ -107,35 +110,34 @@ def make_recom_plot(lower, upper, n_dists, glob_expr):
     n_dists : int
         The number of districts the map is split into.
     glob_expr : str
-        The regex passed to glob to find the files to plot.
+        A glob pattern the names of the files to plot must match.
 
     Returns
     -------
     None
     """
     out_path = Path(f"{script_dir}/../figures")
-    data_path = Path(f"{top_dir}/hpc_files/hpc_processed_data/50x50")
+    data_root = Path(f"{top_dir}/hpc_files/hpc_processed_data")
     _, ax = plt.subplots(figsize=(25, 10), dpi=500)
 
-    recom_files = glob(str(data_path.joinpath(glob_expr).resolve()))
-    recom_files = [Path(file).resolve() for file in recom_files]
-    recom_files.sort()
-
-    all_recom_files = {}
+    recom_ensembles = find_ensembles(
+        load_catalog(data_root),
+        name_pattern=glob_expr,
+        state="50x50",
+        kind="cut_edges",
+        method=["ReComA", "ReComB", "ReComC", "ReComD"],
+    )
+    recom_files = catalog_paths(data_root, recom_ensembles)
 
-    for file in recom_files:
-        lst = file.name.split("_")
-        all_recom_files[f"{lst[1]}"] = file
+    all_recom_files = dict(zip(recom_ensembles["method"], recom_files))
 
     zorders = [0, 3, 2, 1]
     for i, (n, f) in enumerate(all_recom_files.items()):
-        df = pd.read_parquet(f)
-        prob_df = df.groupby("cut_edges").sum().reset_index()
-        prob_df["prob"] = 100 * (prob_df["n_reps"] / prob_df["n_reps"].sum())
+        cut_edges, prob = cut_edge_percentages(f)
 
         ax.bar(
-            prob_df["cut_edges"],
-            prob_df["prob"],
+            cut_edges,
+            prob,
             width=1,
             edgecolor=None,
             color=colors[i + 3],
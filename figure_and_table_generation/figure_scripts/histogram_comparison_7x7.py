@@ -3,12 +3,17 @@ Last Updated: 11-11-2025 (Nov 11)
 Author: Peter Rock <peter@mggg.org>
 """
 
-import pandas as pd
-from glob import glob
+import sys
 import seaborn as sns
 import matplotlib.pyplot as plt
 from pathlib import Path
 from helper_files.legend_saver import save_legend_png, box_handles
+from helper_files.cut_edge_histograms import cut_edge_percentages
+
+# The shared modules live with the processing scripts.
+processing_dir = Path(__file__).resolve().parents[2].joinpath("data_processing")
+sys.path.append(str(processing_dir.joinpath("other_processing_scripts")))
+from ensemble_catalog import catalog_paths, find_ensembles, load_catalog
 
 colors = [
     "#0099cd",
@@ -57,35 +62,36 @@ def make_recom_plot(lower, upper, glob_expr):
     upper : float
         The upper bound on the x-axis to plot.
     glob_expr : str
-        The regex passed to glob to find the files to plot.
+        A glob pattern the names of the files to plot must match.
 
     Returns
     -------
     None
     """
     out_path = Path(f"{script_dir}/../figures")
-    data_path = Path(f"{top_dir}/hpc_files/hpc_processed_data/7x7")
-
-    recom_files = glob(str(data_path.joinpath(glob_expr).resolve()))
-    recom_files = [Path(file).resolve() for file in recom_files]
-    recom_files.sort()
-
-    all_recom_files = {}
+    data_root = Path(f"{top_dir}/hpc_files/hpc_processed_data")
+
+    recom_ensembles = find_ensembles(
+        load_catalog(data_root),
+        name_pattern=glob_expr,
+        state="7x7",
+        kind="cut_edges",
+        method=["ReComA", "ReComB", "ReComC", "ReComD"],
+    )
+    recom_files = catalog_paths(data_root, recom_ensembles)
 
-    for file in recom_files:
-        lst = file.name.split("_")
-        all_recom_files[f"{lst[1]}"] = file
+    all_recom_files = dict(zip(recom_ensembles["method"], recom_files))
+    # The histograms are read from their cached sidecars and shared by the
+    # single and combined plots.
+    histograms = {n: cut_edge_percentages(f) for n, f in all_recom_files.items()}
 
     zorders = [1, 4, 3, 2]
-    for i, (n, f) in enumerate(all_recom_files.items()):
+    for i, (n, (cut_edges, prob)) in enumerate(histograms.items()):
         _, ax = plt.subplots(figsize=(25, 10), dpi=500)
-        df = pd.read_parquet(f)
-        prob_df = df.groupby("cut_edges").sum().reset_index()
-        prob_df["prob"] = 100 * (prob_df["n_reps"] / prob_df["n_reps"].sum())
 
         ax.bar(
-            prob_df["cut_edges"],
-            prob_df["prob"],
+            cut_edges,
+            prob,
             width=1,
             edgecolor=None,
             color=colors[i + 3],
@@ -95,7 +101,7 @@ def make_recom_plot(lower, upper, glob_expr):
 
         ax.bar(
             [x[0] for x in true_dist],
-            [x[1] * prob_df["prob"].sum() for x in true_dist],
+            [x[1] * prob.sum() for x in true_dist],
             width=1,
             edgecolor=None,
             color="#bbb",
@@ -113,14 +119,10 @@ def make_recom_plot(lower, upper, glob_expr):
 
     _, ax = plt.subplots(figsize=(25, 10), dpi=500)
     zorders = [1, 4, 3, 2]
-    for i, (n, f) in enumerate(all_recom_files.items()):
-        df = pd.read_parquet(f)
-        prob_df = df.groupby("cut_edges").sum().reset_index()
-        prob_df["prob"] = 100 * (prob_df["n_reps"] / prob_df["n_reps"].sum())
-
+    for i, (n, (cut_edges, prob)) in enumerate(histograms.items()):
         ax.bar(
-            prob_df["cut_edges"],
-            prob_df["prob"],
+            cut_edges,
+            prob,
             width=1,
             edgecolor=None,
             color=colors[i + 3],
@@ -10,25 +10,28 @@ import matplotlib.pyplot as plt
 from matplotlib import colormaps as cm
 import matplotlib.colors as colors
 import matplotlib
-import ast
-from glob import glob
-import geopandas as gpd
 from pathlib import Path
-from gerrychain import Graph
-import networkx as nx
 from matplotlib import font_manager
+from helper_files.dual_graph import draw_dual_graph, load_dual_graph_arrays
+from helper_files.choropleth import load_geometry_paths, plot_choropleth
+from helper_files.node_values import (
+    global_value_range,
+    glob_node_value_files,
+    read_node_values,
+)
 
 
 def make_square_multigrid_heatmap(
-    square_gdf, file_list, file_to_title_dict, output_folder
+    square_paths, file_list, file_to_title_dict, output_folder
 ):
     """
     Generates a heatmap for the square multigrid.
 
     Parameters
     ----------
-    square_gdf : geopandas.GeoDataFrame
-        The geodataframe containing the square multigrid.
+    square_paths : list[matplotlib.path.Path]
+        The cached geometry of the square multigrid (see
+        `helper_files.choropleth.load_geometry_paths`).
     file_list : list
         The list of files containing the reassignments for each step.
     file_to_title_dict : dict
@@ -44,14 +47,7 @@ def make_square_multigrid_heatmap(
 
     outpath = Path(output_folder)
 
-    max_val = 0
-    min_val = float("inf")
-    for i, file in enumerate(file_list):
-        with open(file, "r") as f:
-            sq_data = f.readline()
-            sq_data = ast.literal_eval(sq_data)
-            max_val = max(max_val, max(sq_data))
-            min_val = min(min_val, min(sq_data))
+    min_val, max_val = global_value_range(file_list)
 
     for i, f_name in enumerate(file_to_title_dict.keys()):
         file = None
@@ -59,18 +55,14 @@ def make_square_multigrid_heatmap(
             if f_name in f:
                 file = f
                 break
-        with open(file, "r") as f:
-            sq_data = f.readline()
-            sq_data = ast.literal_eval(sq_data)
-
-        square_gdf["reassign"] = sq_data
 
         col_pos = i % 3
         row_pos = i // 3
 
-        square_gdf.plot(
-            ax=ax[row_pos, col_pos],
-            column="reassign",
+        plot_choropleth(
+            ax[row_pos, col_pos],
+            square_paths,
+            read_node_values(file),
             cmap="viridis",
             vmin=min_val,
             vmax=max_val,
@@ -154,37 +146,28 @@ def make_square_multigrid(JSON_file, output_folder):
     -------
     None
     """
-    square_multigrid = Graph.from_json(JSON_file)
+    positions, edges, populations = load_dual_graph_arrays(JSON_file)
 
     out_path = Path(output_folder)
 
-    pos = {n: (d["x"], d["y"]) for n, d in square_multigrid.nodes(data=True)}
-    sizes = [20 * d["TOTPOP"] for _, d in square_multigrid.nodes(data=True)]
-
     _, ax = plt.subplots(figsize=(8, 8), dpi=400)
-    nx.draw(
-        square_multigrid,
-        pos,
-        ax=ax,
-        node_color="black",
-        node_size=sizes,
-        with_labels=False,
-    )
+    draw_dual_graph(ax, positions, edges, node_sizes=20 * populations)
     plt.savefig(
         out_path.joinpath("square_multigrid_dual_graph.png"), bbox_inches="tight"
     )
 
 
 def make_linear_multigrid_heatmap(
-    linear_gdf, file_list, file_to_title_dict, output_folder
+    linear_paths, file_list, file_to_title_dict, output_folder
 ):
     """
     Generates a heatmap for the linear multigrid.
 
     Parameters
     ----------
-    linear_gdf : geopandas.GeoDataFrame
-        The geodataframe containing the linear multigrid.
+    linear_paths : list[matplotlib.path.Path]
+        The cached geometry of the linear multigrid (see
+        `helper_files.choropleth.load_geometry_paths`).
     file_list : list
         The list of files containing the reassignments for each step.
     file_to_title_dict : dict
@@ -202,14 +185,7 @@ def make_linear_multigrid_heatmap(
 
     outpath = Path(output_folder)
 
-    max_val = 0
-    min_val = float("inf")
-    for i, file in enumerate(file_list):
-        with open(file, "r") as f:
-            lin_data = f.readline()
-            lin_data = ast.literal_eval(lin_data)
-            max_val = max(max_val, max(lin_data))
-            min_val = min(min_val, min(lin_data))
+    min_val, max_val = global_value_range(file_list)
 
     for i, f_name in enumerate(file_to_title_dict.keys()):
         file = None
@@ -217,18 +193,14 @@ def make_linear_multigrid_heatmap(
             if f_name in f:
                 file = f
                 break
-        with open(file, "r") as f:
-            lin_data = f.readline()
-            lin_data = ast.literal_eval(lin_data)
-
-        linear_gdf["reassign"] = lin_data
 
         col_pos = i % 2
         row_pos = i // 2
 
-        linear_gdf.plot(
-            ax=ax[row_pos, col_pos],
-            column="reassign",
+        plot_choropleth(
+            ax[row_pos, col_pos],
+            linear_paths,
+            read_node_values(file),
             cmap="viridis",
             vmin=min_val,
             vmax=max_val,
@@ -308,22 +280,12 @@ def make_linear_multigrid(JSON_file, output_folder):
     -------
     None
     """
-    linear_multigrid = Graph.from_json(JSON_file)
+    positions, edges, populations = load_dual_graph_arrays(JSON_file)
 
     out_path = Path(output_folder)
 
-    pos = {n: (d["x"], d["y"]) for n, d in linear_multigrid.nodes(data=True)}
-    sizes = [10 * d["TOTPOP"] for _, d in linear_multigrid.nodes(data=True)]
-
     _, ax = plt.subplots(figsize=(60, 10), dpi=400)
-    nx.draw(
-        linear_multigrid,
-        pos,
-        ax=ax,
-        node_color="black",
-        node_size=sizes,
-        with_labels=False,
-    )
+    draw_dual_graph(ax, positions, edges, node_sizes=10 * populations)
     plt.savefig(
         out_path.joinpath("linear_multigrid_dual_graph.png"), bbox_inches="tight"
     )
@@ -336,14 +298,15 @@ if __name__ == "__main__":
     # ===================================
     # == MAKE SQUARE MULTIGRID FIGURES ==
     # ===================================
-    file_list = sorted(
-        glob(
-            f"{top_dir}/other_data_files/processed_data_files/square_multigrid/square*changed_assignments.txt",
-        )
+    file_list = glob_node_value_files(
+        f"{top_dir}/other_data_files/processed_data_files/square_multigrid/square*changed_assignments"
     )
 
-    square_gdf = gpd.read_file(
-        f"{top_dir}/shapefiles/square_multigrid/square_multigrid.shp"
+    # Each map is one panel of the (2 x 3) heatmap figure.
+    square_paths = load_geometry_paths(
+        f"{top_dir}/shapefiles/square_multigrid/square_multigrid.shp",
+        figsize=(18 / 3, 12 / 2),
+        dpi=400,
     )
 
     base_file_names = [file.split("/")[-1].split(".")[0] for file in file_list]
@@ -358,7 +321,7 @@ if __name__ == "__main__":
     }
 
     make_square_multigrid_heatmap(
-        square_gdf=square_gdf,
+        square_paths=square_paths,
         file_list=file_list,
         file_to_title_dict=flie_to_title,
         output_folder=f"{top_dir}/figure_and_table_generation/figures",
@@ -373,14 +336,15 @@ if __name__ == "__main__":
     # == MAKE LINEAR MULTIGRID FIGURES ==
     # ===================================
 
-    file_list = sorted(
-        glob(
-            f"{top_dir}/other_data_files/processed_data_files/linear_multigrid/linear*changed_assignments.txt",
-        )
+    file_list = glob_node_value_files(
+        f"{top_dir}/other_data_files/processed_data_files/linear_multigrid/linear*changed_assignments"
     )
 
-    linear_gdf = gpd.read_file(
-        f"{top_dir}/shapefiles/linear_multigrid/linear_multigrid.shp"
+    # Each map is one panel of the (3 x 2) heatmap figure.
+    linear_paths = load_geometry_paths(
+        f"{top_dir}/shapefiles/linear_multigrid/linear_multigrid.shp",
+        figsize=(33 / 2, 9 / 3),
+        dpi=400,
     )
 
     base_file_names = [file.split("/")[-1].split(".")[0] for file in file_list]
@@ -395,7 +359,7 @@ if __name__ == "__main__":
     }
 
     make_linear_multigrid_heatmap(
-        linear_gdf=linear_gdf,
+        linear_paths=linear_paths,
         file_list=file_list,
         file_to_title_dict=flie_to_title,
         output_folder=f"{top_dir}/figure_and_table_generation/figures",
@@ -8,13 +8,16 @@ plotted into a dotplot that is used in the paper to demonstrate the stability
 of the various methods output statistics.
 """
 
-import pandas as pd
-from glob import glob
-from tqdm import tqdm
+import sys
 from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+# The shared modules live with the processing scripts.
+processing_dir = Path(__file__).resolve().parents[2].joinpath("data_processing")
+sys.path.append(str(processing_dir.joinpath("other_processing_scripts")))
+from ensemble_catalog import catalog_paths, find_ensembles, load_catalog
+from partisan_metrics import load_summaries
 
 colors = [
     "#0099cd",
@@ -35,39 +38,29 @@ if __name__ == "__main__":
     top_dir = script_dir.parents[1]
 
     out_folder = Path(f"{top_dir}/figure_and_table_generation/table_outputs")
-    all_files = glob(f"{top_dir}/hpc_files/hpc_processed_data/PA/*.parquet")
-    all_files = [Path(file).resolve() for file in all_files]
+    data_root = f"{top_dir}/hpc_files/hpc_processed_data"
+    pa_ensembles = find_ensembles(load_catalog(data_root), state="PA", kind="tallies")
+    all_files = catalog_paths(data_root, pa_ensembles)
 
-    sample_type_lst = [file.name.split("_")[1] for file in all_files]
+    sample_type_lst = pa_ensembles["method"].tolist()
     outputs_dict = {key: [] for key in sorted(sample_type_lst)}
 
-    for i in tqdm(range(len(all_files))):
-        file = all_files[i]
-        sample_type = sample_type_lst[i]
-        df = pd.read_parquet(file)
-        df_dem_pres = df[df["sum_columns"] == "PRES16D"].reset_index()[
-            [f"district_{i}" for i in range(1, 19)] + ["n_reps"]
-        ]
-        df_rep_pres = df[df["sum_columns"] == "PRES16R"].reset_index()[
-            [f"district_{i}" for i in range(1, 19)] + ["n_reps"]
-        ]
-        df_dem_sen = df[df["sum_columns"] == "SEND16D"].reset_index()[
-            [f"district_{i}" for i in range(1, 19)] + ["n_reps"]
-        ]
-        df_rep_sen = df[df["sum_columns"] == "SEND16R"].reset_index()[
-            [f"district_{i}" for i in range(1, 19)] + ["n_reps"]
-        ]
-
-        assert df_dem_pres["n_reps"].equals(df_rep_pres["n_reps"])
-        assert df_dem_sen["n_reps"].equals(df_rep_sen["n_reps"])
-
-        pres_mean = (
-            (df_dem_pres > df_rep_pres).sum(axis=1) * df_dem_pres["n_reps"]
-        ).sum() / df_dem_pres["n_reps"].sum()
-        sen_mean = (
-            (df_dem_sen > df_rep_sen).sum(axis=1) * df_dem_sen["n_reps"]
-        ).sum() / df_dem_sen["n_reps"].sum()
-        outputs_dict[sample_type].append((Path(file).name, pres_mean, sen_mean))
+    # The mean number of Democratic seats under PRES16 and SEN16, weighted by the
+    # number of times each plan was repeated. The summaries are shared with
+    # `pa_averages_report.py` through the summary store and only recomputed for
+    # new or changed files.
+    summary = load_summaries(
+        all_files,
+        elections=[("PRES16D", "PRES16R"), ("SEND16D", "SEND16R")],
+        metrics=["seats"],
+        store_file=out_folder.joinpath("pa_summary_store.parquet"),
+    )
+    seat_means = summary.set_index(["file", "dem_key"])["mean"]
+
+    for file, sample_type in zip(all_files, sample_type_lst):
+        pres_mean = seat_means[(file.name, "PRES16D")]
+        sen_mean = seat_means[(file.name, "SEND16D")]
+        outputs_dict[sample_type].append((file.name, pres_mean, sen_mean))
 
     with open(out_folder.joinpath("pa_averages_report.txt"), "w") as f:
         for key, list_tup in outputs_dict.items():
@@ -12,6 +12,7 @@ from helper_files.wasserstein_trace_tally import (
     wasserstein_trace_ground_truth,
 )
 from helper_files.legend_saver import save_legend_png, marker_handles
+from helper_files.ensemble_index import read_accepted_prefix
 import seaborn as sns
 import matplotlib.pyplot as plt
 
@@ -76,10 +77,11 @@ def make_rev_forest_comparison(
     df_truth["prob"] = df_truth["probability"] / 100
     df_truth.rename(columns={"cuts": "cut_edges", "tree_count": "n_reps"}, inplace=True)
 
-    rev_df1 = pd.read_parquet(reversible_sample_1)
-    rev_df2 = pd.read_parquet(reversible_sample_2)
+    columns = ["cut_edges", "n_reps"]
+    rev_df1 = read_accepted_prefix(reversible_sample_1, n_accepted, columns=columns)
+    rev_df2 = read_accepted_prefix(reversible_sample_2, n_accepted, columns=columns)
 
-    forest_df = pd.read_parquet(forest_sample)
+    forest_df = read_accepted_prefix(forest_sample, n_forest, columns=columns)
 
     was_compare_ticks, was_distances_compare = wasserstein_trace(
         counts1=rev_df1.iloc[:n_accepted, :]["cut_edges"],
@@ -228,10 +230,11 @@ def make_recom_comparison(
     df_truth["prob"] = df_truth["probability"] / 100
     df_truth.rename(columns={"cuts": "cut_edges", "tree_count": "n_reps"}, inplace=True)
 
-    recomA_df = pd.read_parquet(recomA_sample)
-    recomB_df = pd.read_parquet(recomB_sample)
-    recomC_df = pd.read_parquet(recomC_sample)
-    recomD_df = pd.read_parquet(recomD_sample)
+    columns = ["cut_edges", "n_reps"]
+    recomA_df = read_accepted_prefix(recomA_sample, n_accepted, columns=columns)
+    recomB_df = read_accepted_prefix(recomB_sample, n_accepted, columns=columns)
+    recomC_df = read_accepted_prefix(recomC_sample, n_accepted, columns=columns)
+    recomD_df = read_accepted_prefix(recomD_sample, n_accepted, columns=columns)
 
     was_recomA_ticks, was_distances_recomA = wasserstein_trace_ground_truth(
         counts=recomA_df.iloc[:n_accepted, :]["cut_edges"],
@@ -1,15 +1,24 @@
 """
-Last Updated: 10-11-2025 (Nov 10)
+Last Updated: 19-10-2026
 Author: Peter Rock <peter@mggg.org>
 
 This script is used to generate the Wasserstein trace plots for the VA ensembles.
+
+The traces are computed once and saved as the figure-data artifact
+`figure_data/wasserstein_trace_VA.parquet` (one row per comparison and tick), which
+is only recomputed when the ensembles or the parameters change. Use
+`--stage render` to redraw the figure from the saved traces alone, or
+`--stage compute` to force the traces to be recomputed.
 """
 
+import click
 import pandas as pd
 from pathlib import Path
 from helper_files.wasserstein_trace_tally import wasserstein_trace_shares
 from helper_files.legend_saver import save_legend_png, marker_handles
-import numpy as np
+from helper_files.ensemble_index import read_accepted_prefix
+from helper_files.figure_data import figure_data
+from helper_files.instrumentation import instrument, stage
 import seaborn as sns
 import matplotlib.pyplot as plt
 
@@ -52,151 +61,88 @@ def add_shares_df(df):
         inplace=True,
     )
     df_shares_total.sort_index(axis=1, inplace=True)
+    df_shares_total.reset_index(inplace=True, drop=True)
     return df_shares_total
 
 
-if __name__ == "__main__":
-    script_dir = Path(__file__).resolve().parent
-    top_dir = script_dir.parents[1]
-
-    reversible_sample_1 = f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_RevReCom_steps_5000000000_rng_seed_278986_plan_CD_12_20241106_152157_tallies.parquet"
-    reversible_sample_2 = f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_RevReCom_steps_5000000000_rng_seed_278986_plan_CD_16_20240618_174413_tallies.parquet"
-    forest_sample = f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_Forest_steps_10000000_rng_seed_278986_gamma_0.0_alpha_1.0_ndists_11_20241112_124346_tallies.parquet"
-
-    out_folder = f"{top_dir}/figure_and_table_generation/figures"
-    out_path = Path(out_folder)
+COMPARISONS = [
+    ("RevReCom1 vs RevReCom2", "rev1", "rev2", colors[0]),
+    ("RevReCom1 vs Forest", "rev1", "forest", colors[1]),
+    ("RevReCom2 vs Forest", "rev2", "forest", colors[3]),
+]
 
-    n_accepted = 1_900_000
-    n_items = 500
 
-    rev_df1 = pd.read_parquet(reversible_sample_1)
-    rev_df2 = pd.read_parquet(reversible_sample_2)
-    forest_df = pd.read_parquet(forest_sample)
-
-    # ======================
-    # + REV RECOM SAMPLE 1 +
-    # ======================
-    rev_df1_dem = rev_df1[rev_df1["sum_columns"] == "G16DPRS"].reset_index()
-    rev_df1_rep = rev_df1[rev_df1["sum_columns"] == "G16RPRS"].reset_index()
-    rev_df1_shares_total = rev_df1_dem[[f"district_{i}" for i in range(1, 12)]] / (
-        rev_df1_dem[[f"district_{i}" for i in range(1, 12)]]
-        + rev_df1_rep[[f"district_{i}" for i in range(1, 12)]]
-    )
-    rev_df1_shares_total.rename(
-        columns={f"district_{i}": f"district_{i:02d}" for i in range(1, 12)},
-        inplace=True,
-    )
-    rev_df1_shares_total.sort_index(axis=1, inplace=True)
-    rev_df1_shares_total.reset_index(inplace=True, drop=True)
-
-    # ======================
-    # + REV RECOM SAMPLE 2 +
-    # ======================
-    rev_df2_dem = rev_df2[rev_df2["sum_columns"] == "G16DPRS"].reset_index()
-    rev_df2_rep = rev_df2[rev_df2["sum_columns"] == "G16RPRS"].reset_index()
-    rev_df2_shares_total = rev_df2_dem[[f"district_{i}" for i in range(1, 12)]] / (
-        rev_df2_dem[[f"district_{i}" for i in range(1, 12)]]
-        + rev_df2_rep[[f"district_{i}" for i in range(1, 12)]]
-    )
-    rev_df2_shares_total.rename(
-        columns={f"district_{i}": f"district_{i:02d}" for i in range(1, 12)},
-        inplace=True,
-    )
-    rev_df2_shares_total.sort_index(axis=1, inplace=True)
-    rev_df2_shares_total.reset_index(inplace=True, drop=True)
-
-    # =======================
-    # + FOREST RECOM SAMPLE +
-    # =======================
-    forest_df_dem = forest_df[forest_df["sum_columns"] == "G16DPRS"].reset_index()
-    forest_df_rep = forest_df[forest_df["sum_columns"] == "G16RPRS"].reset_index()
-    forest_df_shares_total = forest_df_dem[[f"district_{i}" for i in range(1, 12)]] / (
-        forest_df_dem[[f"district_{i}" for i in range(1, 12)]]
-        + forest_df_rep[[f"district_{i}" for i in range(1, 12)]]
-    )
-    forest_df_shares_total.rename(
-        columns={f"district_{i}": f"district_{i:02d}" for i in range(1, 12)},
-        inplace=True,
-    )
-    forest_df_shares_total.sort_index(axis=1, inplace=True)
-    forest_df_shares_total.reset_index(inplace=True, drop=True)
-
-    # =======================
-    # + COLLECT WASSERSTEIN +
-    # =======================
-    was_rrc_compare_ticks, was_rrc_compare_distances = wasserstein_trace_shares(
-        shares1_df=rev_df1_shares_total.iloc[:n_accepted, :],
-        shares2_df=rev_df2_shares_total.iloc[:n_accepted, :],
-        weights1=rev_df1_dem.iloc[:n_accepted, :]["n_reps"],
-        weights2=rev_df2_dem.iloc[:n_accepted, :]["n_reps"],
-        resolution=n_accepted / n_items,
-    )
+@instrument()
+def compute_traces(samples, n_accepted, n_items):
+    """
+    Computes the Wasserstein traces between the Democratic vote shares of each pair
+    of ensembles in `COMPARISONS`.
 
-    import json
+    Parameters
+    ----------
+    samples : dict[str, str]
+        The tallies file of each ensemble ("rev1", "rev2" and "forest").
+    n_accepted : int
+        The number of accepted plans of each ensemble to use.
+    n_items : int
+        The number of points in each trace.
 
-    with open("wasserstein_trace_VA_rrc_compare.json", "w") as f:
-        json.dump(
-            {"ticks": was_rrc_compare_ticks, "distances": was_rrc_compare_distances},
-            f,
-            indent=4,
+    Returns
+    -------
+    pandas.DataFrame
+        The traces, with the columns `comparison`, `accepted` and `distance`.
+    """
+    shares = {}
+    weights = {}
+    for key, file in samples.items():
+        df = read_accepted_prefix(file, n_accepted)
+        shares[key] = add_shares_df(df).iloc[:n_accepted, :]
+        weights[key] = (
+            df[df["sum_columns"] == "G16DPRS"]
+            .reset_index()
+            .iloc[:n_accepted, :]["n_reps"]
         )
 
-    was_full_1f_ticks, was_full_1f_distances = wasserstein_trace_shares(
-        shares1_df=rev_df1_shares_total.iloc[:n_accepted, :],
-        shares2_df=forest_df_shares_total.iloc[:n_accepted, :],
-        weights1=rev_df1_dem.iloc[:n_accepted, :]["n_reps"],
-        weights2=forest_df_dem.iloc[:n_accepted, :]["n_reps"],
-        resolution=n_accepted / n_items,
-    )
-
-    with open("wasserstein_trace_VA_full_1f_compare.json", "w") as f:
-        json.dump(
-            {"ticks": was_full_1f_ticks, "distances": was_full_1f_distances},
-            f,
-            indent=4,
+    traces = []
+    for label, key1, key2, _ in COMPARISONS:
+        ticks, distances = wasserstein_trace_shares(
+            shares1_df=shares[key1],
+            shares2_df=shares[key2],
+            weights1=weights[key1],
+            weights2=weights[key2],
+            resolution=n_accepted / n_items,
+        )
+        traces.append(
+            pd.DataFrame(
+                {"comparison": label, "accepted": ticks, "distance": distances}
+            )
         )
+    return pd.concat(traces, ignore_index=True)
 
-    was_full_2f_ticks, was_full_2f_distances = wasserstein_trace_shares(
-        shares1_df=rev_df2_shares_total.iloc[:n_accepted, :],
-        shares2_df=forest_df_shares_total.iloc[:n_accepted, :],
-        weights1=rev_df2_dem.iloc[:n_accepted, :]["n_reps"],
-        weights2=forest_df_dem.iloc[:n_accepted, :]["n_reps"],
-        resolution=n_accepted / n_items,
-    )
 
-    with open("wasserstein_trace_VA_full_2f_compare.json", "w") as f:
-        json.dump(
-            {"ticks": was_full_2f_ticks, "distances": was_full_2f_distances},
-            f,
-            indent=4,
-        )
+@instrument()
+def render_traces(traces, out_path):
+    """
+    Draws the Wasserstein trace figure and its legend from the saved traces.
 
-    # ======================
-    # + START MAKING PLOTS +
-    # ======================
+    Parameters
+    ----------
+    traces : pandas.DataFrame
+        The traces (see `compute_traces`).
+    out_path : Path
+        The folder to save the figures to.
+    """
     _, ax = plt.subplots(figsize=(25, 10), dpi=400)
 
-    sns.lineplot(
-        x=was_rrc_compare_ticks,
-        y=was_rrc_compare_distances,
-        ax=ax,
-        linewidth=3,
-        color=colors[0],
-    )
-    sns.lineplot(
-        x=was_full_1f_ticks,
-        y=was_full_1f_distances,
-        ax=ax,
-        linewidth=3,
-        color=colors[1],
-    )
-    sns.lineplot(
-        x=was_full_2f_ticks,
-        y=was_full_2f_distances,
-        ax=ax,
-        linewidth=3,
-        color=colors[3],
-    )
+    for label, _, _, color in COMPARISONS:
+        trace = traces[traces["comparison"] == label]
+        sns.lineplot(
+            x=trace["accepted"].to_numpy(),
+            y=trace["distance"].to_numpy(),
+            ax=ax,
+            linewidth=3,
+            color=color,
+        )
 
     ax.tick_params(axis="both", labelsize=24)
     ax.set_xlabel("accepted", loc="right", fontsize=24)
@@ -205,20 +151,17 @@ if __name__ == "__main__":
     ax.set_xlim(0, 1_900_000)
     ax.set_xticklabels([f"{i/1_000_000:.2f}M" for i in ticks])
 
-    plt.savefig(
-        out_path.joinpath(
-            "Wasserstein_distances_VA_comparison_Dem_Shares_rrc_and_forest.png"
-        ),
-        bbox_inches="tight",
-    )
+    with stage("savefig"):
+        plt.savefig(
+            out_path.joinpath(
+                "Wasserstein_distances_VA_comparison_Dem_Shares_rrc_and_forest.png"
+            ),
+            bbox_inches="tight",
+        )
     plt.close()
 
-    labels = [
-        "RevReCom1 vs RevReCom2",
-        "RevReCom1 vs Forest",
-        "RevReCom2 vs Forest",
-    ]
-    colors_legend = [colors[0], colors[1], colors[3]]
+    labels = [label for label, _, _, _ in COMPARISONS]
+    colors_legend = [color for _, _, _, color in COMPARISONS]
     handles = marker_handles(labels=labels, colors=colors_legend, linestyle="-")
 
     save_legend_png(
@@ -231,3 +174,42 @@ if __name__ == "__main__":
         dpi=200,
         label_fontsize=14,
     )
+
+
+@click.command()
+@click.option(
+    "--stage",
+    type=click.Choice(["all", "compute", "render"]),
+    default="all",
+    show_default=True,
+    help="Recompute the traces only if stale (all), always (compute), or never (render).",
+)
+def main(stage):
+    script_dir = Path(__file__).resolve().parent
+    top_dir = script_dir.parents[1]
+
+    samples = {
+        "rev1": f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_RevReCom_steps_5000000000_rng_seed_278986_plan_CD_12_20241106_152157_tallies.parquet",
+        "rev2": f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_RevReCom_steps_5000000000_rng_seed_278986_plan_CD_16_20240618_174413_tallies.parquet",
+        "forest": f"{top_dir}/hpc_files/hpc_processed_data/VA/VA_Forest_steps_10000000_rng_seed_278986_gamma_0.0_alpha_1.0_ndists_11_20241112_124346_tallies.parquet",
+    }
+
+    out_folder = f"{top_dir}/figure_and_table_generation/figures"
+    out_path = Path(out_folder)
+
+    n_accepted = 1_900_000
+    n_items = 500
+
+    traces = figure_data(
+        "wasserstein_trace_VA",
+        lambda: compute_traces(samples, n_accepted, n_items),
+        sources=samples.values(),
+        params={"n_accepted": n_accepted, "n_items": n_items},
+        stage=stage,
+    )
+    if stage != "compute":
+        render_traces(traces, out_path)
+
+
+if __name__ == "__main__":
+    main()
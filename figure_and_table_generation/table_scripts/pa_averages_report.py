@@ -1,5 +1,5 @@
 """
-Last Updated: 11-02-2025
+Last Updated: 19-10-2026
 Author: Peter Rock <peter@mggg.org>
 
 This is a small script that is used to account for the average number of Dem
@@ -8,51 +8,61 @@ printed into a text file report that can be used to generate the corresponding
 table in the paper.
 """
 
-import pandas as pd
-from glob import glob
-from tqdm import tqdm
+import sys
 from pathlib import Path
 
-if __name__ == "__main__":
-    script_dir = Path(__file__).resolve().parent
-    top_dir = script_dir.parents[1]
+# The shared modules live with the processing scripts.
+processing_dir = Path(__file__).resolve().parents[2].joinpath("data_processing")
+sys.path.append(str(processing_dir.joinpath("other_processing_scripts")))
+from ensemble_catalog import catalog_paths, find_ensembles, load_catalog
+from partisan_metrics import load_summaries
 
-    out_folder = Path(f"{top_dir}/figure_and_table_generation/table_outputs")
-    all_files = glob(f"{top_dir}/hpc_files/hpc_processed_data/PA/*.parquet")
-    all_files = [Path(file).resolve() for file in all_files]
 
-    sample_type_lst = [file.name.split("_")[1] for file in all_files]
-    outputs_dict = {key: [] for key in sorted(sample_type_lst)}
+def write_pa_report(data_root, out_file, store_file=None, n_processes=None):
+    """
+    Writes the report of the average number of Democratic districts in PA under
+    PRES16 and SEN16 for each of the PA ensembles in the catalog.
+
+    Parameters
+    ----------
+    data_root : str or Path
+        The processed data folder.
+    out_file : str or Path
+        The report file to write.
+    store_file : str or Path, optional
+        The summary store shared with `pa_dotplot.py`. Defaults to
+        `pa_summary_store.parquet` next to the report.
+    n_processes : int, optional
+        The number of worker processes used for new or changed files.
+    """
+    out_file = Path(out_file)
+    if store_file is None:
+        store_file = out_file.with_name("pa_summary_store.parquet")
+    pa_ensembles = find_ensembles(load_catalog(data_root), state="PA", kind="tallies")
+    all_files = catalog_paths(data_root, pa_ensembles)
 
-    for i in tqdm(range(len(all_files))):
-        file = all_files[i]
-        sample_type = sample_type_lst[i]
-        df = pd.read_parquet(file)
-        df_dem_pres = df[df["sum_columns"] == "PRES16D"].reset_index()[
-            [f"district_{i}" for i in range(1, 19)] + ["n_reps"]
-        ]
-        df_rep_pres = df[df["sum_columns"] == "PRES16R"].reset_index()[
-            [f"district_{i}" for i in range(1, 19)] + ["n_reps"]
-        ]
-        df_dem_sen = df[df["sum_columns"] == "SEND16D"].reset_index()[
-            [f"district_{i}" for i in range(1, 19)] + ["n_reps"]
-        ]
-        df_rep_sen = df[df["sum_columns"] == "SEND16R"].reset_index()[
-            [f"district_{i}" for i in range(1, 19)] + ["n_reps"]
-        ]
+    sample_type_lst = pa_ensembles["method"].tolist()
+    outputs_dict = {key: [] for key in sorted(sample_type_lst)}
 
-        assert df_dem_pres["n_reps"].equals(df_rep_pres["n_reps"])
-        assert df_dem_sen["n_reps"].equals(df_rep_sen["n_reps"])
+    # The mean number of Democratic seats under PRES16 and SEN16, weighted by the
+    # number of times each plan was repeated. The summaries are shared with
+    # `pa_dotplot.py` through the summary store and only recomputed for new or
+    # changed files.
+    summary = load_summaries(
+        all_files,
+        elections=[("PRES16D", "PRES16R"), ("SEND16D", "SEND16R")],
+        metrics=["seats"],
+        store_file=store_file,
+        n_processes=n_processes,
+    )
+    seat_means = summary.set_index(["file", "dem_key"])["mean"]
 
-        pres_mean = (
-            (df_dem_pres > df_rep_pres).sum(axis=1) * df_dem_pres["n_reps"]
-        ).sum() / df_dem_pres["n_reps"].sum()
-        sen_mean = (
-            (df_dem_sen > df_rep_sen).sum(axis=1) * df_dem_sen["n_reps"]
-        ).sum() / df_dem_sen["n_reps"].sum()
-        outputs_dict[sample_type].append((Path(file).name, pres_mean, sen_mean))
+    for file, sample_type in zip(all_files, sample_type_lst):
+        pres_mean = seat_means[(file.name, "PRES16D")]
+        sen_mean = seat_means[(file.name, "SEND16D")]
+        outputs_dict[sample_type].append((file.name, pres_mean, sen_mean))
 
-    with open(out_folder.joinpath("pa_averages_report.txt"), "w") as f:
+    with open(out_file, "w") as f:
         for key, list_tup in outputs_dict.items():
             print("=" * 100, file=f)
             print(str(key).upper().center(100), file=f)
@@ -72,3 +82,12 @@ if __name__ == "__main__":
                 print(f"Average Pres {key}: {pres_avg}", file=f)
                 print(f"Average Sen {key}: {sen_avg}", file=f)
                 print("", file=f)
+
+
+if __name__ == "__main__":
+    script_dir = Path(__file__).resolve().parent
+    top_dir = script_dir.parents[1]
+
+    out_folder = Path(f"{top_dir}/figure_and_table_generation/table_outputs")
+    data_root = f"{top_dir}/hpc_files/hpc_processed_data"
+    write_pa_report(data_root, out_folder.joinpath("pa_averages_report.txt"))
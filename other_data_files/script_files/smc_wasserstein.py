@@ -7,8 +7,9 @@ adapted from code written by Parker Rule for an earlier version of the RRC paper
 """
 
 import glob
+import sys
+import numpy as np
 import pyreadr
-import geopandas as gpd
 from pathlib import Path
 from joblib import Parallel, delayed
 from joblib_progress import joblib_progress
@@ -17,8 +18,11 @@ import matplotlib.pyplot as plt
 from collections import Counter, defaultdict
 from scipy.stats import wasserstein_distance
 from tqdm import tqdm
-from gerrychain import Graph, Partition
-from gerrychain.updaters import cut_edges
+
+# The graph cache lives with the processing scripts.
+processing_dir = Path(__file__).resolve().parents[2].joinpath("data_processing")
+sys.path.append(str(processing_dir.joinpath("other_processing_scripts")))
+from graph_cache import load_graph
 
 GROUND_TRUTH = """32      7.32191421608e11
 40      2.82316256e8
@@ -41,22 +45,18 @@ def load_smc(graph, rds_path, weights_path=None) -> Counter:
     """Computes the cut edge count distribution of an SMC grid run."""
     run_plans = pyreadr.read_r(rds_path)
     assignments = run_plans[None].values.astype(int).T.copy()
-    partitions = [
-        Partition(
-            assignment=dict(enumerate(row)),
-            graph=graph,
-            updaters={"cut_edges": cut_edges},
-        )
-        for row in assignments
-    ]
+    edges = np.asarray(graph.edges)
+    cut_counts = (assignments[:, edges[:, 0]] != assignments[:, edges[:, 1]]).sum(
+        axis=1
+    )
 
     if weights_path is not None:
         weights = pyreadr.read_r(weights_path)[None].values.T
         weighted_hist = defaultdict(float)
-        for weight, part in zip(weights[0].tolist(), partitions):
-            weighted_hist[len(part["cut_edges"])] += weight
-        return partitions, weighted_hist
-    return partitions, Counter(len(part["cut_edges"]) for part in partitions)
+        for weight, n_cut in zip(weights[0].tolist(), cut_counts.tolist()):
+            weighted_hist[n_cut] += weight
+        return cut_counts, weighted_hist
+    return cut_counts, Counter(cut_counts.tolist())
 
 
 def determine_wasserstein_to_truth(weights_path, graph, ref_counts, ref_weights):
@@ -89,11 +89,10 @@ def collect_wasserstein_data(
     ref_weights = [float(line.split()[1]) for line in GROUND_TRUTH.split("\n")]
 
     if smc_shapefile is not None:
-        gdf = gpd.read_file(smc_shapefile)
-        gdf.crs = "epsg:26918"  # fake! (suppresses spurious projection warnings)
-        graph = Graph.from_geodataframe(gdf)
+        # The rook adjacency of the shapefile is compiled once and cached next to it.
+        graph = load_graph(smc_shapefile)
     else:
-        gdf = graph = None
+        graph = None
 
     weights_files = glob.glob(f"{smc_trace_prefix}*.rds .wgt")
     with joblib_progress(